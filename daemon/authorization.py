@@ -1,35 +1,114 @@
-from fastapi import Request, HTTPException, status
+from hmac import compare_digest
+from typing import Optional, Pattern
+
+from fastapi import status
 from fastapi.openapi.models import HTTPBearer
+from fastapi.routing import APIRoute
 from fastapi.security.base import SecurityBase
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Scope, Receive, Send
 
 from .environment import API_TOKEN
+from .responses import dumps
+from .utils import make_error
 
 
 class HTTPAuthorization(SecurityBase):
-    """FastAPI dependency class for http authorization"""
+    """
+    FastAPI dependency class for http authorization
+
+    The token is checked by the :class:`AuthorizationMiddleware` before the request is routed.
+    This dependency only marks the routes which require authorization and documents the security scheme.
+    """
 
     def __init__(self):
         self.model = HTTPBearer()
         self.scheme_name = self.__class__.__name__
-        self._token = API_TOKEN
 
-    async def _check_authorization(self, request: Request) -> bool:
+    async def __call__(self):
+        pass
+
+
+class AuthorizationMiddleware:
+    """ASGI middleware which rejects unauthorized requests to routes depending on :class:`HTTPAuthorization`"""
+
+    def __init__(self, app: ASGIApp, routes: list[BaseRoute], token: Optional[str] = API_TOKEN):
+        """
+        :param app: the next asgi app
+        :param routes: the routes of the FastAPI app (protected paths are collected on the first request)
+        :param token: the api token (any request is accepted if no token is specified)
+        """
+
+        self.app: ASGIApp = app
+        self._routes: list[BaseRoute] = routes
+        self._protected: Optional[frozenset[str]] = None
+        self._protected_patterns: tuple[Pattern, ...] = ()
+        self._token: Optional[bytes] = token.encode() if token else None
+        self._bearer: Optional[bytes] = f"Bearer {token}".encode() if token else None
+
+        body = dumps(make_error(status.HTTP_401_UNAUTHORIZED))
+        self._unauthorized_start: dict = {
+            "type": "http.response.start",
+            "status": status.HTTP_401_UNAUTHORIZED,
+            "headers": [(b"content-length", str(len(body)).encode()), (b"content-type", b"application/json")],
+        }
+        self._unauthorized_body: dict = {"type": "http.response.body", "body": body}
+
+    def _collect_protected(self) -> tuple[frozenset[str], tuple[Pattern, ...]]:
+        """
+        Collect the routes which depend on :class:`HTTPAuthorization`
+
+        :return: the paths of the protected routes without and the path patterns of those with path parameters
+        """
+
+        routes = [
+            route
+            for route in self._routes
+            if isinstance(route, APIRoute)
+            if any(isinstance(dependency.dependency, HTTPAuthorization) for dependency in route.dependencies)
+        ]
+
+        return (
+            frozenset(route.path for route in routes if not route.param_convertors),
+            tuple(route.path_regex for route in routes if route.param_convertors),
+        )
+
+    def _is_protected(self, path: str) -> bool:
+        """
+        Check whether a request path belongs to a route which requires authorization
+
+        Paths matching a protected route with path parameters are protected, even if they are routed to
+        an unprotected route which has been added before.
+
+        :param path: the path of the request
+        :return: whether the token must be checked
+        """
+
+        if self._protected is None:
+            self._protected, self._protected_patterns = self._collect_protected()
+
+        return path in self._protected or any(pattern.match(path) for pattern in self._protected_patterns)
+
+    def _check_authorization(self, scope: Scope) -> bool:
         """
-        Check authorization token of a request
+        Check the authorization header of a request in constant time
 
-        :param request: the request to check
+        :param scope: the asgi scope of the request
         :return: whether the token is valid
         """
 
-        # accept any request if no token is specified
-        if not self._token:
-            return True
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                # accept the token with and without the Bearer prefix
+                return compare_digest(value, self._bearer) | compare_digest(value, self._token)
 
-        # otherwise compare token with authorization header
-        authorization: str = request.headers.get("Authorization")
+        return False
 
-        return authorization and authorization.removeprefix("Bearer ") == self._token
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if self._bearer is not None and scope["type"] == "http":
+            if self._is_protected(scope["path"]) and not self._check_authorization(scope):
+                await send(self._unauthorized_start)
+                await send(self._unauthorized_body)
+                return
 
-    async def __call__(self, request: Request):
-        if not await self._check_authorization(request):
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        await self.app(scope, receive, send)
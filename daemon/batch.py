@@ -0,0 +1,117 @@
+from asyncio import create_task, iscoroutinefunction
+from typing import Any
+
+from fastapi import Request, status
+from fastapi.dependencies.utils import solve_dependencies
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute, run_endpoint_function
+from starlette.exceptions import HTTPException
+
+from .database import db, db_wrapper
+from .endpoints import get_route
+from .exceptions.api_exception import APIException
+from .logger import get_logger
+from .metrics import metrics, current_endpoint
+from .schemas.daemon import BatchItemModel
+from .streaming import StreamingJSONResponse
+from .utils import make_error
+
+logger = get_logger(__name__)
+
+
+async def call_endpoint(request: Request, route: APIRoute, body: dict) -> Any:
+    """
+    Call an endpoint directly without going through the http stack
+
+    :param request: the request to resolve header based dependencies (e.g. authorization) from
+    :param route: the route of the endpoint
+    :param body: the request body for the endpoint
+    :return: the json compatible response of the endpoint
+    """
+
+    # calls in a transaction share the context of the batch request, so the endpoint is restored afterwards
+    token = current_endpoint.set(route.path)
+    try:
+        with metrics.get(route.path).track():
+            values, errors, *_ = await solve_dependencies(request=request, dependant=route.dependant, body=body)
+            if errors:
+                raise RequestValidationError(errors)
+
+            result = await run_endpoint_function(
+                dependant=route.dependant,
+                values=values,
+                is_coroutine=iscoroutinefunction(route.dependant.call),
+            )
+
+            if isinstance(result, StreamingJSONResponse):
+                # the items of streaming endpoints are collected, as the session is closed by the batch request
+                db.streaming = False
+                result = [item async for item in result.items]
+    finally:
+        current_endpoint.reset(token)
+
+    return jsonable_encoder(result)
+
+
+@db_wrapper
+async def call_endpoint_in_session(request: Request, route: APIRoute, body: dict) -> Any:
+    """Call an endpoint in a separate database session."""
+
+    return await call_endpoint(request, route, body)
+
+
+def make_error_dict(exception: Exception) -> dict:
+    """
+    Create the error message for an exception as the exception handlers would do
+
+    :param exception: the exception raised by an endpoint
+    :return: the error message as specified in the protocol
+    """
+
+    if isinstance(exception, APIException):
+        return exception.make_dict()
+
+    if isinstance(exception, HTTPException):
+        return make_error(exception.status_code)
+
+    if isinstance(exception, RequestValidationError):
+        return make_error(status.HTTP_422_UNPROCESSABLE_ENTITY, detail=exception.errors())
+
+    logger.exception("exception in batch request", exc_info=exception)
+    return make_error(status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def run_batch(request: Request, items: list[BatchItemModel], transaction: bool) -> list[Any]:
+    """
+    Call multiple endpoints one after another
+
+    :param request: the batch request
+    :param items: the endpoint calls
+    :param transaction: whether to run all calls in the database session of the batch request and stop on
+                        the first error (rolling back all changes) instead of using one session per call
+    :return: the responses and error messages of the calls in the same order
+    """
+
+    if transaction:
+        # all calls must be rolled back together, so they must not write anything outside of the session
+        db.transaction = True
+
+    results = []
+    for item in items:
+        try:
+            if (route := get_route(item.collection, item.endpoint)) is None:
+                raise HTTPException(status.HTTP_404_NOT_FOUND)
+
+            if transaction:
+                results.append(await call_endpoint(request, route, item.body))
+            else:
+                # run in a separate task to keep the database session of the batch request in this context
+                results.append(await create_task(call_endpoint_in_session(request, route, item.body)))
+        except Exception as e:  # noqa: B902
+            results.append(make_error_dict(e))
+            if transaction:
+                await db.rollback()
+                break
+
+    return results
@@ -0,0 +1,321 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import secrets
+import socket
+import subprocess  # noqa: S404
+import sys
+import tempfile
+from math import ceil
+from multiprocessing.context import SpawnProcess
+from time import perf_counter
+from typing import Callable, Optional
+from uuid import UUID
+
+import aiohttp
+import uvicorn
+
+from .main import run_worker
+from .supervisor import bind_socket
+
+ENDPOINTS: list[str] = ["set", "increment", "get"]
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line arguments of the benchmark
+
+    :param argv: the command line arguments (defaults to sys.argv)
+    :return: the parsed arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="python -m daemon.bench",
+        description="Load benchmark for the counter endpoints. "
+        "The daemon is started in a separate process using the configured environment variables.",
+    )
+    parser.add_argument(
+        "--sqlite",
+        metavar="PATH",
+        nargs="?",
+        const="",
+        help="use a sqlite database instead of the configured sql server (temporary if no path is given)",
+    )
+    parser.add_argument("--concurrency", type=int, default=32, help="number of concurrent requests")
+    parser.add_argument("--duration", type=float, default=10, help="number of seconds to benchmark each endpoint")
+    parser.add_argument("--warmup", type=float, default=1, help="number of seconds to warm up each endpoint")
+    parser.add_argument("--users", type=int, default=1000, help="number of distinct counters")
+    parser.add_argument("--distribution", choices=["uniform", "hot"], default="uniform", help="counter distribution")
+    parser.add_argument("--hot-fraction", type=float, default=0.9, help="fraction of requests to the hot counter")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS, help="endpoints to benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="seed for counters and request order")
+    parser.add_argument("--output", help="file to write the json report to (defaults to stdout)")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args: argparse.Namespace, tmp: str) -> str:
+    """
+    Set the environment variables for the daemon process
+
+    :param args: the benchmark arguments
+    :param tmp: a temporary directory for the sqlite database
+    :return: the api token
+    """
+
+    # the counter endpoints are only available in debug mode
+    os.environ.update(DEBUG="true", SQL_CREATE_TABLES="true")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    if args.sqlite is not None:
+        path = args.sqlite or os.path.join(tmp, "bench.db")
+        os.environ.update(
+            SQL_DRIVER="sqlite+aiosqlite",
+            SQL_DATABASE=path,
+            SQL_HOST="",
+            SQL_PORT="0",
+            SQL_USERNAME="",
+            SQL_PASSWORD="",
+        )
+
+    return os.environ.setdefault("API_TOKEN", secrets.token_hex(16))
+
+
+def start_server(sock: socket.socket) -> SpawnProcess:
+    """
+    Start the daemon in a separate process
+
+    :param sock: the listening socket
+    :return: the server process
+    """
+
+    config = uvicorn.Config("daemon.daemon:app", access_log=False, log_level="warning")
+    process = multiprocessing.get_context("spawn").Process(target=run_worker, args=(config, sock), daemon=True)
+    process.start()
+    return process
+
+
+def make_user_chooser(users: list[str], distribution: str, hot_fraction: float, rng: random.Random) -> Callable:
+    """
+    Create a function which chooses the counter of the next request
+
+    :param users: the user ids of all counters
+    :param distribution: "uniform" or "hot" (the first counter receives hot_fraction of all requests)
+    :param hot_fraction: fraction of requests to the hot counter
+    :param rng: the random number generator
+    :return: the function
+    """
+
+    if distribution == "hot":
+        return lambda: users[0] if rng.random() < hot_fraction else rng.choice(users)
+
+    return lambda: rng.choice(users)
+
+
+def make_body(endpoint: str, user_id: str, rng: random.Random) -> dict:
+    """
+    Create the request body for a counter endpoint
+
+    :param endpoint: name of the endpoint
+    :param user_id: id of the user
+    :param rng: the random number generator
+    :return: the request body
+    """
+
+    if endpoint == "set":
+        return {"user_id": user_id, "password": "S3cr3t", "value": rng.randrange(1000)}  # noqa: S106
+
+    return {"user_id": user_id}
+
+
+async def run_endpoint(
+    session: aiohttp.ClientSession,
+    url: str,
+    endpoint: str,
+    choose_user: Callable[[], str],
+    concurrency: int,
+    duration: float,
+    rng: random.Random,
+) -> tuple[list[float], int, float]:
+    """
+    Send requests to an endpoint for a fixed duration
+
+    :param session: the http client session
+    :param url: base url of the daemon
+    :param endpoint: name of the counter endpoint
+    :param choose_user: function which chooses the counter of the next request
+    :param concurrency: number of concurrent requests
+    :param duration: number of seconds to send requests
+    :param rng: the random number generator
+    :return: the latencies of all requests, the number of failed requests and the elapsed time
+    """
+
+    latencies: list[float] = []
+    errors = 0
+    deadline = perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+
+        while perf_counter() < deadline:
+            body = make_body(endpoint, choose_user(), rng)
+            start = perf_counter()
+            async with session.post(f"{url}/counter/{endpoint}", json=body) as response:
+                await response.read()
+            latencies.append(perf_counter() - start)
+            errors += response.status != 200
+
+    start = perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, errors, perf_counter() - start
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Get a percentile of sorted values using the nearest-rank method
+
+    :param values: the sorted values
+    :param q: the percentile between 0 and 1
+    :return: the percentile
+    """
+
+    return values[max(ceil(q * len(values)) - 1, 0)]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    """
+    Summarize the results of an endpoint
+
+    :param latencies: the latencies of all requests
+    :param errors: the number of failed requests
+    :param elapsed: the elapsed time
+    :return: request count, error count, throughput (requests per second) and latency percentiles (milliseconds)
+    """
+
+    latencies = sorted(latencies)
+    if not latencies:
+        return {"requests": 0, "errors": errors, "throughput": 0, "latency_ms": None}
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 2),
+        "latency_ms": {
+            name: round(percentile(latencies, q) * 1000, 3)
+            for name, q in [("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1)]
+        },
+    }
+
+
+async def wait_until_ready(session: aiohttp.ClientSession, url: str, timeout: float = 30):
+    """
+    Wait until the daemon accepts requests
+
+    :param session: the http client session
+    :param url: base url of the daemon
+    :param timeout: maximum number of seconds to wait
+    """
+
+    deadline = perf_counter() + timeout
+    while True:
+        try:
+            async with session.get(f"{url}/daemon/endpoints") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientConnectionError:
+            pass
+
+        if perf_counter() > deadline:
+            raise TimeoutError("daemon did not start")
+
+        await asyncio.sleep(0.1)
+
+
+async def run(args: argparse.Namespace, url: str, token: str) -> dict:
+    """
+    Benchmark the counter endpoints
+
+    :param args: the benchmark arguments
+    :param url: base url of the daemon
+    :param token: the api token
+    :return: the results of all endpoints
+    """
+
+    rng = random.Random(args.seed)  # noqa: S311
+    users = [str(UUID(int=rng.getrandbits(128), version=4)) for _ in range(args.users)]
+    choose_user = make_user_chooser(users, args.distribution, args.hot_fraction, rng)
+
+    results = {}
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(headers={"Authorization": f"Bearer {token}"}, connector=connector) as session:
+        await wait_until_ready(session, url)
+
+        async def create_counter(user_id: str):
+            async with session.post(f"{url}/counter/set", json=make_body("set", user_id, rng)) as response:
+                await response.read()
+
+        # create all counters first so that counter/get does not fail for unknown counters
+        await asyncio.gather(*map(create_counter, users))
+
+        for endpoint in args.endpoints:
+            if args.warmup > 0:
+                await run_endpoint(session, url, endpoint, choose_user, args.concurrency, args.warmup, rng)
+
+            latencies, errors, elapsed = await run_endpoint(
+                session, url, endpoint, choose_user, args.concurrency, args.duration, rng
+            )
+            results[f"counter/{endpoint}"] = summarize(latencies, errors, elapsed)
+
+    return results
+
+
+def get_commit() -> Optional[str]:
+    """Get the current git commit hash if available"""
+
+    try:
+        return subprocess.check_output(  # noqa: S603,S607
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[list[str]] = None):
+    """Run the benchmark and write the json report"""
+
+    args = parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        token = configure_environment(args, tmp)
+
+        # served like a worker of the supervisor, so the socket must enable TCP_NODELAY on accepted connections
+        sock = bind_socket("127.0.0.1", 0)
+        process = start_server(sock)
+        try:
+            results = asyncio.run(run(args, f"http://127.0.0.1:{sock.getsockname()[1]}", token))
+        finally:
+            process.terminate()
+            process.join()
+            sock.close()
+
+    report = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "database": os.environ.get("SQL_DRIVER", "postgresql+asyncpg"),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()  # noqa: T001
+
+
+if __name__ == "__main__":
+    main()
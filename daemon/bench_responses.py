@@ -0,0 +1,83 @@
+import argparse
+import timeit
+from typing import Optional
+from uuid import uuid4
+
+from starlette.responses import JSONResponse
+
+from .responses import FastJSONResponse, orjson
+from .utils import make_error
+
+PAYLOADS: dict[str, object] = {
+    "counter": {"user_id": str(uuid4()), "value": 42},
+    "batch": [{"user_id": str(uuid4()), "value": i} for i in range(50)],
+    "endpoints": [
+        {
+            "id": f"collection_{i}",
+            "description": "Ünïcödé description of an endpoint collection",
+            "disabled": False,
+            "endpoints": [
+                {"id": f"endpoint_{j}", "description": "Some endpoint", "disabled": j == 3} for j in range(10)
+            ],
+        }
+        for i in range(5)
+    ],
+    "validation_error": make_error(
+        422,
+        detail=[
+            {"loc": ["body", "value"], "msg": "value is not a valid integer", "type": "type_error.integer"},
+            {"loc": ["body", "user_id"], "msg": "field required", "type": "value_error.missing"},
+        ],
+    ),
+}
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line arguments of the benchmark
+
+    :param argv: the command line arguments (defaults to sys.argv)
+    :return: the parsed arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="python -m daemon.bench_responses",
+        description="Microbenchmark comparing the response encoding of JSONResponse and FastJSONResponse.",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="number of measurements (the fastest one is reported)")
+    return parser.parse_args(argv)
+
+
+def measure(response_class: type, content: object, repeat: int) -> float:
+    """
+    Measure how long it takes to create a response
+
+    :param response_class: the response class
+    :param content: the response content
+    :param repeat: number of measurements
+    :return: the fastest time per response in microseconds
+    """
+
+    timer = timeit.Timer(lambda: response_class(content))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+
+def main(argv: Optional[list[str]] = None):
+    """Run the benchmark and print the results"""
+
+    args = parse_args(argv)
+
+    print(f"serializer: {'orjson' if orjson is not None else 'json (orjson is not installed)'}")  # noqa: T001
+    print(f"{'payload':<20}{'JSONResponse':>16}{'FastJSONResponse':>20}{'speedup':>10}")  # noqa: T001
+    for name, content in PAYLOADS.items():
+        if JSONResponse(content).body != FastJSONResponse(content).body:
+            raise AssertionError(f"output of FastJSONResponse differs for {name}")
+
+        default = measure(JSONResponse, content, args.repeat)
+        fast = measure(FastJSONResponse, content, args.repeat)
+        print(f"{name:<20}{default:>14.2f}us{fast:>18.2f}us{default / fast:>9.2f}x")  # noqa: T001
+
+
+if __name__ == "__main__":
+    main()
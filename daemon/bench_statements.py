@@ -0,0 +1,85 @@
+import argparse
+import timeit
+from typing import Callable, Optional
+from uuid import uuid4
+
+from sqlalchemy import create_engine
+from sqlalchemy.future import select as sa_select
+from sqlalchemy.orm import Session
+
+from .database import db
+from .database.database import prepared_filter_by
+from .models.counter import Counter
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line arguments of the benchmark
+
+    :param argv: the command line arguments (defaults to sys.argv)
+    :return: the parsed arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="python -m daemon.bench_statements",
+        description="Microbenchmark comparing the python overhead of building a new statement for each db.get "
+        "with the cached statements of prepared_filter_by, using an in-memory sqlite database.",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="number of measurements (the fastest one is reported)")
+    return parser.parse_args(argv)
+
+
+def measure(func: Callable, repeat: int) -> float:
+    """
+    Measure how long a function takes
+
+    :param func: the function
+    :param repeat: number of measurements
+    :return: the fastest time per call in microseconds
+    """
+
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+
+def main(argv: Optional[list[str]] = None):
+    """Run the benchmark and print the results"""
+
+    args = parse_args(argv)
+
+    engine = create_engine("sqlite://")
+    db.Base.metadata.create_all(engine, tables=[Counter.__table__])
+    user_id = str(uuid4())
+
+    with Session(engine) as session:
+        session.add(Counter(user_id=user_id, value=42))
+        session.commit()
+
+        def build():
+            return sa_select(Counter).filter_by(user_id=user_id)._generate_cache_key()
+
+        def build_prepared():
+            statement, _ = prepared_filter_by(Counter, user_id=user_id)
+            return statement._generate_cache_key()
+
+        def get():
+            return session.execute(sa_select(Counter).filter_by(user_id=user_id)).scalar()
+
+        def get_prepared():
+            return session.execute(*prepared_filter_by(Counter, user_id=user_id)).scalar()
+
+        if get() is not get_prepared():
+            raise AssertionError("prepared statement returned a different row")
+
+        print(f"{'operation':<30}{'new statement':>16}{'prepared':>12}{'speedup':>10}")  # noqa: T001
+        for name, default, prepared in [
+            ("build statement + cache key", build, build_prepared),
+            ("execute db.get", get, get_prepared),
+        ]:
+            default, prepared = measure(default, args.repeat), measure(prepared, args.repeat)
+            print(f"{name:<30}{default:>14.2f}us{prepared:>10.2f}us{default / prepared:>9.2f}x")  # noqa: T001
+
+
+if __name__ == "__main__":
+    main()
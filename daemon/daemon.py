@@ -1,37 +1,95 @@
-from fastapi import FastAPI, status, Request
+from fastapi import FastAPI, status, Request, Body
 from fastapi.exceptions import HTTPException, RequestValidationError
 from fastapi.params import Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse
 
-from .authorization import HTTPAuthorization
+from .authorization import HTTPAuthorization, AuthorizationMiddleware
+from .batch import run_batch
 from .database import db
+from .drain import in_flight
 from .endpoint_collection import format_docs
 from .endpoints import register_collections
-from .environment import SQL_CREATE_TABLES
+from .environment import (
+    SQL_CREATE_TABLES,
+    POOL_LOG_INTERVAL,
+    POOL_WARMUP,
+    POOL_WARMUP_STATEMENTS,
+    OPENAPI_FILE,
+    SHUTDOWN_TIMEOUT,
+)
 from .exceptions.api_exception import APIException
-from .schemas.daemon import EndpointCollectionModel
-from .utils import responses
+from .logger import get_logger
+from .metrics import metrics, current_endpoint
+from .openapi import setup_openapi
+from .responses import FastJSONResponse
+from .schemas.daemon import EndpointCollectionModel, BatchItemModel
+from .utils import responses, make_error
+
+logger = get_logger(__name__)
 
 # create fastapi app and register endpoint collections
-app = FastAPI(title="Python Daemon")
+app = FastAPI(title="Python Daemon", default_response_class=FastJSONResponse)
+app.state.ready = False
+app.state.stopping = False
 endpoints: list[dict] = register_collections(app)
+metrics.register(db.pool_metrics.render)
+metrics.register(db.statement_cache.render)
+metrics.register(db.query_monitor.render)
+metrics.register(db.slow_query_log.render)
+if db.single_flight is not None:
+    metrics.register(db.single_flight.render)
 
 
 @app.middleware("http")
 async def db_session(request: Request, call_next):
-    db.create_session()
-    try:
-        return await call_next(request)
-    finally:
-        await db.commit()
-        await db.close()
+    current_endpoint.set(request.url.path)
+    with in_flight.track():
+        db.create_session()
+        try:
+            return await call_next(request)
+        finally:
+            # streaming responses are still being sent, they commit and close the session themselves
+            if not db.streaming:
+                await db.commit()
+                await db.close()
+
+
+# check the api token before any other middleware (added last, so it is the outermost one)
+app.add_middleware(AuthorizationMiddleware, routes=app.routes)
 
 
 @app.on_event("startup")
 async def on_startup():
+    # build the openapi schema before the first request, so docs requests do not stall a worker
+    setup_openapi(app, OPENAPI_FILE)
+
     if SQL_CREATE_TABLES:
         await db.create_tables()
 
+    if db.cache is not None:
+        await db.cache.connect()
+
+    ready = True
+    if POOL_WARMUP > 0 and not await db.warm_up(POOL_WARMUP, POOL_WARMUP_STATEMENTS):
+        logger.warning("could not open any database connection, the worker is not ready until it can connect")
+        ready = False
+
+    if POOL_LOG_INTERVAL > 0:
+        db.pool_metrics.start_logging(POOL_LOG_INTERVAL)
+
+    app.state.ready = ready
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    app.state.ready = False
+    app.state.stopping = True
+
+    if unfinished := await in_flight.wait(SHUTDOWN_TIMEOUT):
+        logger.warning(f"shutting down with {unfinished} unfinished requests")
+
+    await db.dispose()
+
 
 @app.get(
     "/daemon/endpoints",
@@ -51,18 +109,86 @@ async def daemon_endpoints():
     return endpoints
 
 
-def _make_exception(status_code: int, **kwargs) -> JSONResponse:
+@app.post(
+    "/daemon/batch",
+    name="Batch Requests",
+    tags=["daemon"],
+    dependencies=[Depends(HTTPAuthorization())],
+    responses=responses(list[dict]),
+)
+@format_docs
+async def daemon_batch(
+    request: Request,
+    requests: list[BatchItemModel] = Body(...),
+    transaction: bool = Body(False),
+):
+    """
+    Call multiple endpoints in a single request
+
+    :param requests: the endpoint calls, consisting of collection id, endpoint id and request body
+    :param transaction: whether all calls should share one transaction which is rolled back on the first error
+    :return: a list containing the response or error message of each call in the same order
+    """
+
+    return await run_batch(request, requests, transaction)
+
+
+@app.get(
+    "/daemon/metrics",
+    name="Daemon Metrics",
+    tags=["daemon"],
+    dependencies=[Depends(HTTPAuthorization())],
+    response_class=PlainTextResponse,
+)
+@format_docs
+async def daemon_metrics():
+    """
+    Request metrics of all endpoints
+
+    :return: request counts, error counts, in-flight requests and latency histograms in the prometheus text format
+    """
+
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get(
+    "/daemon/ready",
+    name="Daemon Readiness",
+    tags=["daemon"],
+    responses={503: {"description": "Service Unavailable"}},
+)
+@format_docs
+async def daemon_ready():
+    """
+    Readiness check for load balancers (no authorization required)
+
+    Uvicorn only accepts connections after the startup, so the worker is not ready if the connection pool warm-up
+    could not open any connection (until a connection can be opened) or if it is shutting down.
+
+    :return: whether the worker is ready to handle requests
+    """
+
+    if not app.state.ready and not app.state.stopping and POOL_WARMUP > 0:
+        # the warm-up failed on startup, so check whether the database is reachable now
+        app.state.ready = await db.warm_up(1) > 0
+
+    if not app.state.ready:
+        return FastJSONResponse({"ready": False}, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    return {"ready": True}
+
+
+def _make_exception(status_code: int, **kwargs) -> FastJSONResponse:
     """
-    Create a JSONResponse object containing an error message
+    Create a response object containing an error message
     as specified in the protocol
 
     :param status_code: the http status code
     :param kwargs: any additional parameters
-    :return: the JSONResponse object
+    :return: the response object
     """
 
-    detail = HTTPException(status_code).detail
-    return JSONResponse({**kwargs, "error": f"{status_code} {detail}"}, status_code)
+    return FastJSONResponse(make_error(status_code, **kwargs), status_code)
 
 
 @app.exception_handler(APIException)
@@ -0,0 +1,97 @@
+from collections.abc import AsyncIterable
+from typing import AsyncIterator, Iterable, Union
+
+from sqlalchemy import Table
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# number of rows which are sent to the database at once
+BULK_BATCH_SIZE = 1000
+
+# minimum number of rows in a batch to use COPY instead of executemany (asyncpg only)
+COPY_THRESHOLD = 100
+
+Rows = Union[Iterable[dict], AsyncIterable]
+
+
+async def batches(rows: Rows, size: int) -> AsyncIterator[list[dict]]:
+    """
+    Split rows into batches, so only one batch is kept in memory at a time
+
+    :param rows: an iterable or async iterable of rows
+    :param size: maximum number of rows per batch
+    :return: async iterator of the batches
+    """
+
+    if size < 1:
+        raise ValueError("batch size must be positive")
+
+    batch: list[dict] = []
+    if isinstance(rows, AsyncIterable):
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    else:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+
+    if batch:
+        yield batch
+
+
+def apply_defaults(table: Table, rows: list[dict]) -> tuple[list[str], list[tuple]]:
+    """
+    Convert rows to records and fill in the python side column defaults, which COPY does not know about
+
+    :param table: the table
+    :param rows: the rows (all rows must have the same columns)
+    :return: the column names and the records
+    """
+
+    names = list(rows[0])
+    defaults = [
+        column
+        for column in table.columns
+        if column.name not in rows[0]
+        if column.default is not None
+        if column.default.is_scalar or column.default.is_callable
+    ]
+    names += [column.name for column in defaults]
+
+    records = []
+    for row in rows:
+        record = [row[name] for name in rows[0]]
+        for column in defaults:
+            # callable defaults are wrapped to accept an execution context
+            record.append(column.default.arg if column.default.is_scalar else column.default.arg(None))
+        records.append(tuple(record))
+
+    return names, records
+
+
+async def copy_rows(connection: AsyncConnection, table: Table, rows: list[dict]):
+    """
+    Insert rows using the binary COPY protocol of asyncpg within the transaction of a connection
+
+    :param connection: the async connection of the current session
+    :param table: the table
+    :param rows: the rows (all rows must have the same columns)
+    """
+
+    names, records = apply_defaults(table, rows)
+
+    adapted = (await connection.get_raw_connection()).connection
+    if not adapted._started:
+        # the adapter only begins its transaction on the first statement
+        await adapted._start_transaction()
+
+    await adapted._connection.copy_records_to_table(
+        table.name,
+        records=records,
+        columns=names,
+        schema_name=table.schema,
+    )
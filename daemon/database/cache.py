@@ -0,0 +1,220 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+from typing import Optional, Type, Any, Callable
+from uuid import UUID
+
+import aioredis
+from aioredis import Redis, RedisError
+from sqlalchemy import inspect
+
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+# values of columns with these python types are stored as strings and converted back when they are loaded
+DECODERS: dict[type, Callable[[str], Any]] = {
+    datetime: datetime.fromisoformat,
+    date: date.fromisoformat,
+    time: time.fromisoformat,
+    UUID: UUID,
+    Decimal: Decimal,
+}
+
+# values of columns with these python types are stored as they are
+JSON_TYPES = {str, int, float, bool, dict, list}
+
+# invalidated rows are replaced by an empty value for this number of seconds, so that rows read from the database
+# before the invalidation cannot be stored afterwards (which would serve the old values until their ttl expires)
+TOMBSTONE_TTL = 10
+
+
+def get_ttl(cls: type) -> Optional[int]:
+    """
+    Get the number of seconds rows of a model may be cached
+
+    :param cls: the model class
+    :return: the ttl or None if rows of this model should not be cached
+    """
+
+    return getattr(cls, "__cache_ttl__", None)
+
+
+def make_key(cls: type, primary_key: tuple) -> str:
+    """
+    Create the cache key of a row
+
+    :param cls: the model class
+    :param primary_key: the primary key values of the row
+    :return: the cache key
+    """
+
+    return ":".join([cls.__tablename__, *map(str, primary_key)])
+
+
+def get_identity_key(obj: Any) -> Optional[str]:
+    """
+    Get the cache key of an orm object
+
+    :param obj: the orm object
+    :return: the cache key or None if the object is not cached
+    """
+
+    if not get_ttl(cls := type(obj)):
+        return None
+
+    return make_key(cls, tuple(inspect(cls).primary_key_from_instance(obj)))
+
+
+def get_lookup_key(cls: type, kwargs: dict) -> Optional[str]:
+    """
+    Get the cache key for a lookup by primary key
+
+    :param cls: the model class
+    :param kwargs: the filter_by arguments of the lookup
+    :return: the cache key or None if the lookup is not a lookup by primary key of a cached model
+    """
+
+    if not get_ttl(cls):
+        return None
+
+    columns = [column.key for column in inspect(cls).primary_key]
+    if len(kwargs) != len(columns) or any(column not in kwargs for column in columns):
+        return None
+
+    return make_key(cls, tuple(kwargs[column] for column in columns))
+
+
+@lru_cache()
+def get_decoders(cls: type) -> Optional[list[Optional[Callable[[str], Any]]]]:
+    """
+    Get the functions which convert the stored column values of a model back to their python types
+
+    :param cls: the model class
+    :return: the decoder of each column (None for json types) or None if a column cannot be stored in the cache
+    """
+
+    decoders = []
+    for attr in inspect(cls).column_attrs:
+        try:
+            python_type = attr.expression.type.python_type
+        except NotImplementedError:
+            python_type = None
+
+        if python_type in DECODERS:
+            decoders.append(DECODERS[python_type])
+        elif python_type in JSON_TYPES:
+            decoders.append(None)
+        else:
+            logger.warning(f"rows of {cls.__name__} are not cached, as column {attr.key} is not json serializable")
+            return None
+
+    return decoders
+
+
+class Cache:
+    """Redis read-through cache for rows of models which define a `__cache_ttl__`"""
+
+    def __init__(self, host: str, port: int, db: int):
+        """
+        :param host: host of the redis server
+        :param port: port of the redis server
+        :param db: index of the redis database
+        """
+
+        self._address: tuple[str, int] = (host, port)
+        self._db: int = db
+        self._redis: Optional[Redis] = None
+
+    async def connect(self):
+        """Create the redis connection pool."""
+
+        try:
+            self._redis = await aioredis.create_redis_pool(self._address, db=self._db)
+        except (RedisError, OSError) as e:
+            logger.warning(f"could not connect to redis, cache is disabled: {e}")
+
+    async def close(self):
+        """Close the redis connection pool."""
+
+        if self._redis is not None:
+            self._redis.close()
+            await self._redis.wait_closed()
+            self._redis = None
+
+    def get_key(self, cls: type, kwargs: dict) -> Optional[str]:
+        """
+        Get the cache key for a lookup by primary key
+
+        :param cls: the model class
+        :param kwargs: the filter_by arguments of the lookup
+        :return: the cache key or None if the lookup cannot be served from the cache
+        """
+
+        if self._redis is None or (key := get_lookup_key(cls, kwargs)) is None or get_decoders(cls) is None:
+            return None
+
+        return key
+
+    async def load(self, cls: Type, key: str) -> Optional[dict]:
+        """
+        Load a row from the cache
+
+        :param cls: the model class
+        :param key: the cache key of the row
+        :return: the column values of the row or None on cache misses
+        """
+
+        try:
+            data = await self._redis.get(key)
+        except (RedisError, OSError) as e:
+            logger.warning(f"could not load {key} from cache: {e}")
+            return None
+
+        # rows which have been invalidated recently are loaded from the database
+        if not data:
+            return None
+
+        values = [
+            value if value is None or decoder is None else decoder(value)
+            for value, decoder in zip(json.loads(data), get_decoders(cls))
+        ]
+        return dict(zip((attr.key for attr in inspect(cls).column_attrs), values))
+
+    async def store(self, key: str, obj: Any):
+        """
+        Store a row in the cache, unless it has been invalidated recently (or has been stored by someone else)
+
+        :param key: the cache key of the row
+        :param obj: the orm object
+        """
+
+        cls = type(obj)
+        # values of the types in DECODERS are stored as strings (e.g. datetimes in iso format)
+        values = [getattr(obj, attr.key) for attr in inspect(cls).column_attrs]
+        data = json.dumps(values, separators=(",", ":"), default=str)
+
+        try:
+            await self._redis.set(key, data, expire=get_ttl(cls), exist=Redis.SET_IF_NOT_EXIST)
+        except (RedisError, OSError) as e:
+            logger.warning(f"could not store {key} in cache: {e}")
+
+    async def invalidate(self, keys: set[str]):
+        """
+        Remove rows from the cache and keep them from being stored again for TOMBSTONE_TTL seconds
+
+        :param keys: the cache keys of the rows
+        """
+
+        if not keys or self._redis is None:
+            return
+
+        pipeline = self._redis.pipeline()
+        for key in keys:
+            pipeline.set(key, b"", expire=TOMBSTONE_TTL)
+
+        try:
+            await pipeline.execute()
+        except (RedisError, OSError) as e:
+            logger.warning(f"could not invalidate {len(keys)} cache entries: {e}")
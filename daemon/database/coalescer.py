@@ -0,0 +1,124 @@
+from asyncio import Future, Task, get_running_loop, create_task, sleep, gather
+from typing import Optional, Any
+
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+Increment = tuple[int, Future]
+
+
+def lock_order(row: tuple) -> tuple:
+    """
+    Sort key for coalesced rows, so that all flushes lock rows in the same order and cannot deadlock each other
+
+    :param row: the model class, the column name and the primary key items of a row
+    :return: a key which is comparable between all rows
+    """
+
+    cls, column, key = row
+    return cls.__tablename__, column, tuple((name, str(value)) for name, value in key)
+
+
+class WriteCoalescer:
+    """Aggregates concurrent increments of the same row and writes them in a single batch"""
+
+    def __init__(self, db: Any, window: float):
+        """
+        :param db: the database connection object
+        :param window: number of seconds to collect increments before they are written
+        """
+
+        self._db = db
+        self._window: float = window
+        self._pending: dict[tuple, list[Increment]] = {}
+        self._flush_task: Optional[Task] = None
+        self._flushing: set[Task] = set()
+
+    async def increment(self, cls: type, column: str, delta: int, key: dict) -> tuple[Optional[int], int]:
+        """
+        Queue an increment and wait until it has been written to the database
+
+        :param cls: the model class
+        :param column: name of the column to increment
+        :param delta: the value to add
+        :param key: primary key of the row
+        :return: the old (None if the row has been inserted) and the new value of the column for this increment
+        """
+
+        future: Future = get_running_loop().create_future()
+        self._pending.setdefault((cls, column, tuple(key.items())), []).append((delta, future))
+
+        if self._flush_task is None:
+            self._flush_task = create_task(self._flush_later())
+
+        return await future
+
+    async def _flush_later(self):
+        """Wait for the coalescing window to pass and flush all increments collected in the meantime."""
+
+        await sleep(self._window)
+
+        # increments queued from now on start a new window, but drain still has to wait for this flush
+        task, self._flush_task = self._flush_task, None
+        self._flushing.add(task)
+        try:
+            pending, self._pending = self._pending, {}
+            await self._flush(pending)
+        finally:
+            self._flushing.discard(task)
+
+    async def drain(self) -> int:
+        """
+        Write all collected increments immediately instead of waiting for the coalescing window, e.g. on shutdown
+
+        :return: the number of written increments
+        """
+
+        # the flush task is still waiting for the window to pass, as it resets itself before flushing
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        pending, self._pending = self._pending, {}
+        if pending:
+            await self._flush(pending)
+
+        # flushes which had already started when the window passed
+        await gather(*self._flushing)
+
+        return sum(map(len, pending.values()))
+
+    async def _flush(self, pending: dict[tuple, list[Increment]]):
+        """
+        Write collected increments in one transaction and resolve the futures of the callers
+
+        :param pending: the increments grouped by row
+        """
+
+        results = []
+        self._db.create_session()
+        try:
+            for (cls, column, key), increments in sorted(pending.items(), key=lambda item: lock_order(item[0])):
+                total = sum(delta for delta, _ in increments)
+                results.append((await self._db.increment(cls, column, total, **dict(key)), increments))
+            await self._db.commit()
+        except Exception as e:  # noqa: B902
+            logger.exception("could not flush coalesced increments")
+            for increments in pending.values():
+                for _, future in increments:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        finally:
+            await self._db.close()
+
+        logger.debug(f"flushed {sum(map(len, pending.values()))} increments of {len(pending)} rows")
+
+        for (old, _), increments in results:
+            value = old
+            for delta, future in increments:
+                new = (value or 0) + delta
+                if not future.done():
+                    future.set_result((value, new))
+                value = new
@@ -1,18 +1,36 @@
 from asyncio import Event
 from contextvars import ContextVar
-from typing import TypeVar, Optional, Type
+from functools import lru_cache
+from itertools import chain, count as counter
+from os import getpid
+from typing import TypeVar, Optional, Type, Any, AsyncIterator, Callable, Sequence
 
 # noinspection PyProtectedMember
-from sqlalchemy.engine import URL
+from sqlalchemy import event, literal_column, inspect, bindparam
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.future import select as sa_select, Select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, Session, make_transient_to_detached, InstanceState
 from sqlalchemy.sql import Executable
+from sqlalchemy.sql.dml import Insert
 from sqlalchemy.sql.expression import exists as sa_exists, delete as sa_delete, Delete
 from sqlalchemy.sql.functions import count
 from sqlalchemy.sql.selectable import Exists
 
+from .bulk import BULK_BATCH_SIZE, COPY_THRESHOLD, Rows, batches, copy_rows
+from .cache import Cache, get_identity_key, get_lookup_key
+from .coalescer import WriteCoalescer
+from .pagination import Page, get_sort_keys, encode_cursor, decode_cursor, seek
+from .pool import InstrumentedPool, PoolMetrics
+from .query_stats import QueryBudget, QueryMonitor, QueryStats
+from .slow_queries import SlowQueryLog
+from .single_flight import SingleFlight, Snapshot, get_key, make_snapshot
+from .statement_cache import StatementCacheStats, get_connect_args
+from .warmup import warm_up
 from ..environment import (
     DB_DRIVER,
     DB_HOST,
@@ -20,20 +38,41 @@ from ..environment import (
     DB_DATABASE,
     DB_USERNAME,
     DB_PASSWORD,
+    DB_REPLICAS,
+    DB_REPLICA_STRATEGY,
     SQL_SHOW_STATEMENTS,
     POOL_RECYCLE,
     POOL_SIZE,
     MAX_OVERFLOW,
+    REDIS_CACHE,
+    REDIS_HOST,
+    REDIS_PORT,
+    REDIS_DB,
+    WRITE_COALESCING_WINDOW,
+    WORKERS,
+    SQL_STMT_CACHE_SIZE,
+    SQL_STMT_CACHE_LIFETIME,
+    SQL_PGBOUNCER,
+    SQL_SINGLE_FLIGHT,
+    SQL_REPEAT_THRESHOLD,
+    SQL_REPEAT_STRICT,
+    SQL_SLOW_QUERY_MS,
+    SQL_EXPLAIN_RATE,
 )
 from ..logger import get_logger
 
 T = TypeVar("T")
 
+REPLICA_STRATEGIES = ("round_robin", "least_loaded")
+
+# maximum number of cached select statements
+SELECT_CACHE_SIZE = 512
+
 logger = get_logger(__name__)
 
 
-def select(entity, *args) -> Select:
-    """Shortcut for :meth:`sqlalchemy.future.select`"""
+def _build_select(entity, *args) -> Select:
+    """Create a select statement with selectinload options for the given relationships."""
 
     if not args:
         return sa_select(entity)
@@ -52,12 +91,79 @@ def select(entity, *args) -> Select:
     return sa_select(entity).options(*options)
 
 
+def _hashable(args: tuple) -> tuple:
+    """Convert the relationship paths of select arguments to tuples, so they can be used as cache keys."""
+
+    return tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args)
+
+
+@lru_cache(maxsize=SELECT_CACHE_SIZE)
+def _cached_select(entity: type, args: tuple) -> Select:
+    """Create a select statement for a mapped class once and reuse it."""
+
+    return _build_select(entity, *args)
+
+
+@lru_cache(maxsize=SELECT_CACHE_SIZE)
+def _cached_filter_by(cls: type, args: tuple, names: tuple[str, ...]) -> Select:
+    """Create a select statement filtering by bound parameters named like the columns once and reuse it."""
+
+    return select(cls, *args).filter_by(**{name: bindparam(name) for name in names})
+
+
+def select(entity, *args) -> Select:
+    """
+    Shortcut for :meth:`sqlalchemy.future.select`
+
+    Statements are immutable, so the statements for mapped classes are cached.
+    Reusing them also lets sqlalchemy reuse their memoized cache keys.
+    """
+
+    if isinstance(entity, type):
+        return _cached_select(entity, _hashable(args))
+
+    return _build_select(entity, *args)
+
+
 def filter_by(cls, *args, **kwargs) -> Select:
     """Shortcut for :meth:`sqlalchemy.future.Select.filter_by`"""
 
     return select(cls, *args).filter_by(**kwargs)
 
 
+def prepared_filter_by(cls, *args, **kwargs) -> tuple[Select, dict]:
+    """
+    Like :func:`filter_by`, but the statement is cached and the values are passed as parameters
+
+    :return: the statement and its parameters, e.g. for ``db.first(*prepared_filter_by(...))``
+    """
+
+    return _cached_filter_by(cls, _hashable(args), tuple(kwargs)), kwargs
+
+
+@lru_cache(maxsize=SELECT_CACHE_SIZE)
+def _column_keys(cls: type) -> frozenset[str]:
+    """Get the attribute names of the columns of a mapped class."""
+
+    return frozenset(attr.key for attr in inspect(cls).column_attrs)
+
+
+def lookup_filter_by(cls, *args, **kwargs) -> tuple[Select, dict]:
+    """
+    Like :func:`prepared_filter_by`, but falls back to :func:`filter_by` if a filter cannot be a bound parameter
+
+    None must be compared using IS NULL and relationships by the primary key of the related object,
+    so these filters are passed to :func:`filter_by` as they are.
+
+    :return: the statement and its parameters, e.g. for ``db.first(*lookup_filter_by(...))``
+    """
+
+    if all(value is not None for value in kwargs.values()) and _column_keys(cls).issuperset(kwargs):
+        return prepared_filter_by(cls, *args, **kwargs)
+
+    return filter_by(cls, *args, **kwargs), {}
+
+
 def exists(*entities, **kwargs) -> Exists:
     """Shortcut for :meth:`sqlalchemy.future.select`"""
 
@@ -70,6 +176,81 @@ def delete(table) -> Delete:
     return sa_delete(table)
 
 
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, _):
+    """Remember that a session has flushed changes to the database and which cached rows have been changed."""
+
+    session.info["written"] = True
+
+    keys = {get_identity_key(obj) for obj in chain(session.new, session.dirty, session.deleted)}
+    keys.discard(None)
+    if keys:
+        session.info.setdefault("invalidate", set()).update(keys)
+
+
+class LazySession:
+    """Placeholder for an async session which is only created when it is used for the first time"""
+
+    def __init__(self, engine: AsyncEngine, choose_replica: Optional[Callable[[], AsyncEngine]] = None):
+        """
+        :param engine: the engine to bind the session to
+        :param choose_replica: function which chooses the replica engine for read-only queries (if there are replicas)
+        """
+
+        self._engine: AsyncEngine = engine
+        self._session: Optional[AsyncSession] = None
+        self._choose_replica: Optional[Callable[[], AsyncEngine]] = choose_replica
+        self._replica: Optional[AsyncSession] = None
+        self.streaming: bool = False
+        self.transaction: bool = False
+        self.stats: QueryStats = QueryStats()
+
+    @property
+    def created(self) -> bool:
+        """Whether the async session has been created"""
+
+        return self._session is not None
+
+    @property
+    def written(self) -> bool:
+        """Whether the async session has pending or flushed changes that need to be committed"""
+
+        if (session := self._session) is None:
+            return False
+
+        return bool(session.sync_session.info.get("written") or session.new or session.dirty or session.deleted)
+
+    def get(self) -> AsyncSession:
+        """Get the async session and create it if necessary"""
+
+        if self._session is None:
+            self._session = AsyncSession(self._engine)
+
+        return self._session
+
+    @property
+    def replica(self) -> Optional[AsyncSession]:
+        """The async session bound to a replica, if it has been created"""
+
+        return self._replica
+
+    def get_replica(self) -> Optional[AsyncSession]:
+        """
+        Get an async session bound to a replica for read-only queries and create it if necessary
+
+        :return: the replica session or None if there are no replicas or the session has written something
+        """
+
+        # reads after writes must see the changes, so they stay on the primary
+        if self._choose_replica is None or self.written:
+            return None
+
+        if self._replica is None:
+            self._replica = AsyncSession(self._choose_replica())
+
+        return self._replica
+
+
 class DB:
     """
     Database connection
@@ -92,6 +273,18 @@ class DB:
         pool_size: int = 20,
         max_overflow: int = 20,
         echo: bool = False,
+        cache: Optional[Cache] = None,
+        write_coalescing_window: float = 0,
+        replicas: Optional[list[str]] = None,
+        replica_strategy: str = "round_robin",
+        statement_cache_size: int = 100,
+        statement_cache_lifetime: int = 300,
+        pgbouncer: bool = False,
+        single_flight: bool = False,
+        repeat_threshold: int = 0,
+        repeat_strict: bool = False,
+        slow_query_threshold: float = 0,
+        explain_rate: float = 0,
     ):
         """
         :param driver: name of the sql connection driver
@@ -101,29 +294,128 @@ class DB:
         :param username: name of the sql user
         :param password: password of the sql user
         :param echo: whether sql queries should be logged
+        :param cache: optional redis cache for lookups by primary key
+        :param write_coalescing_window: number of seconds to collect coalescable increments (0 to disable)
+        :param replicas: urls of read replicas for read-only queries of sessions which have not written anything
+        :param replica_strategy: how to choose a replica, "round_robin" or "least_loaded"
+        :param statement_cache_size: number of prepared statements cached per asyncpg connection (0 to disable)
+        :param statement_cache_lifetime: seconds after which cached statements are prepared again (0 for no limit)
+        :param pgbouncer: whether the database is accessed through pgbouncer in transaction pooling mode
+        :param single_flight: whether concurrent identical read-only queries should share one database call
+        :param repeat_threshold: number of executions of a statement per session after which it is reported (0 = off)
+        :param repeat_strict: whether repeated statements should raise an exception instead of logging a warning
+        :param slow_query_threshold: number of seconds after which a statement is logged as slow (0 to disable)
+        :param explain_rate: fraction of the slow select statements to log the query plan of (postgresql only)
         """
 
-        self.engine: AsyncEngine = create_async_engine(
-            URL.create(
-                drivername=driver,
-                username=username,
-                password=password,
-                host=host,
-                port=port,
-                database=database,
-            ),
+        if replica_strategy not in REPLICA_STRATEGIES:
+            raise ValueError(f"unknown replica strategy: {replica_strategy}")
+
+        self._url: URL = URL.create(
+            drivername=driver,
+            username=username,
+            password=password,
+            host=host,
+            port=port,
+            database=database,
+        )
+        self._engine_options: dict[str, Any] = dict(
+            poolclass=InstrumentedPool,
             pool_pre_ping=True,
             pool_recycle=pool_recycle,
             pool_size=pool_size,
             max_overflow=max_overflow,
             echo=echo,
+            connect_args=get_connect_args(driver, statement_cache_size, statement_cache_lifetime, pgbouncer),
         )
+        self._engine: Optional[AsyncEngine] = None
+        self._engine_pid: Optional[int] = None
+        self._replica_urls: list[URL] = [make_url(url) for url in replicas or []]
+        self._replica_strategy: str = replica_strategy
+        self._replica_engines: list[AsyncEngine] = []
+        self._replica_engines_pid: Optional[int] = None
+        self._replica_counter = counter()
+        self.pool_metrics: PoolMetrics = PoolMetrics(pool_recycle)
+        self.statement_cache: StatementCacheStats = StatementCacheStats(statement_cache_lifetime)
+        self.query_monitor: QueryMonitor = QueryMonitor(self._get_query_stats, repeat_threshold, repeat_strict)
+        self.slow_query_log: SlowQueryLog = SlowQueryLog(slow_query_threshold, explain_rate)
 
         self.Base = declarative_base()
+        self.cache: Optional[Cache] = cache
+        self.coalescer: Optional[WriteCoalescer] = None
+        if write_coalescing_window > 0:
+            self.coalescer = WriteCoalescer(self, write_coalescing_window)
+        self.single_flight: Optional[SingleFlight] = SingleFlight() if single_flight else None
 
-        self._session: ContextVar[Optional[AsyncSession]] = ContextVar("session", default=None)
+        self._session: ContextVar[Optional[LazySession]] = ContextVar("session", default=None)
         self._close_event: ContextVar[Optional[Event]] = ContextVar("close_event", default=None)
 
+    @property
+    def engine(self) -> AsyncEngine:
+        """The async engine, which is created lazily by the process that uses it"""
+
+        # connection pools must not be shared between processes, so a forked worker creates its own engine
+        if self._engine is None or self._engine_pid != getpid():
+            self._engine = create_async_engine(self._url, **self._engine_options)
+            self._engine_pid = getpid()
+            self.pool_metrics.attach(self._engine.sync_engine)
+            self.statement_cache.attach(self._engine.sync_engine)
+            self.query_monitor.attach(self._engine.sync_engine)
+            self.slow_query_log.attach(self._engine.sync_engine)
+
+        return self._engine
+
+    @property
+    def replica_engines(self) -> list[AsyncEngine]:
+        """The async engines of the read replicas, which are created lazily by the process that uses them"""
+
+        if self._replica_engines_pid != getpid():
+            self._replica_engines = [create_async_engine(url, **self._engine_options) for url in self._replica_urls]
+            self._replica_engines_pid = getpid()
+            for engine in self._replica_engines:
+                self.statement_cache.attach(engine.sync_engine)
+                self.query_monitor.attach(engine.sync_engine)
+                self.slow_query_log.attach(engine.sync_engine)
+
+        return self._replica_engines
+
+    def _get_query_stats(self) -> Optional[QueryStats]:
+        """Get the query statistics of the current session."""
+
+        if session := self._session.get():
+            return session.stats
+
+        return None
+
+    def _count_rows(self, rows: int):
+        """Add fetched rows to the query statistics of the current session."""
+
+        if session := self._session.get():
+            session.stats.rows += rows
+
+    def query_budget(self, statements: int) -> QueryBudget:
+        """
+        Create a context manager which fails if more statements are executed while it is active, e.g. in tests
+
+        :param statements: maximum number of statements
+        :return: the context manager
+        """
+
+        return QueryBudget(self.query_monitor, statements)
+
+    def _choose_replica(self) -> AsyncEngine:
+        """Choose the replica engine for the read-only queries of a session."""
+
+        engines = self.replica_engines
+        start = next(self._replica_counter) % len(engines)
+        if self._replica_strategy == "round_robin":
+            return engines[start]
+
+        # use the replica with the fewest checked out connections, starting at the next one in turn
+        # so that equally loaded replicas are still used alternately
+        rotated = engines[start:] + engines[:start]
+        return min(rotated, key=lambda engine: engine.sync_engine.pool.checkedout())
+
     async def create_tables(self):
         """Create all tables defined in enabled cog packages."""
 
@@ -131,6 +423,58 @@ class DB:
         async with self.engine.begin() as conn:
             await conn.run_sync(self.Base.metadata.create_all)
 
+    def _lookup_statements(self) -> list[tuple[Select, dict]]:
+        """Create the primary key lookups of all models as used by :meth:`get`, with parameters matching no row."""
+
+        statements = []
+        for mapper in sorted(self.Base.registry.mappers, key=lambda m: m.class_.__name__):
+            names = [mapper.get_property_by_column(column).key for column in mapper.primary_key]
+            statements.append(prepared_filter_by(mapper.class_, **{name: None for name in names}))
+
+        return statements
+
+    async def warm_up(self, connections: int, statements: bool = False) -> int:
+        """
+        Open connections of the primary and replica pools in parallel before the first request
+
+        :param connections: number of connections to open per pool (at most the pool size)
+        :param statements: whether the primary key lookups of all models should be executed on each connection,
+                           so they are compiled and prepared
+        :return: the number of opened connections
+        """
+
+        connections = min(connections, self._engine_options["pool_size"])
+        lookups = self._lookup_statements() if statements else []
+
+        opened = 0
+        for engine in [self.engine, *self.replica_engines]:
+            opened += await warm_up(engine, connections, lookups)
+
+        logger.debug(f"warmed up {opened} connections")
+        return opened
+
+    async def dispose(self):
+        """Write pending increments, stop the background tasks and close all connections, e.g. on shutdown."""
+
+        flushed = await self.coalescer.drain() if self.coalescer is not None else 0
+        self.pool_metrics.stop_logging()
+        if self.cache is not None:
+            await self.cache.close()
+
+        # only dispose the engines created by this process instead of creating new ones
+        engines = []
+        if self._engine is not None and self._engine_pid == getpid():
+            engines.append(self._engine)
+        if self._replica_engines_pid == getpid():
+            engines += self._replica_engines
+
+        closed = 0
+        for engine in engines:
+            closed += engine.sync_engine.pool.checkedin()
+            await engine.dispose()
+
+        logger.info(f"flushed {flushed} increments and closed {closed} database connections")
+
     async def add(self, obj: T) -> T:
         """
         Add a new row to the database
@@ -142,6 +486,36 @@ class DB:
         self.session.add(obj)
         return obj
 
+    async def add_all_fast(self, cls: Type[T], rows: Rows, batch_size: int = BULK_BATCH_SIZE) -> int:
+        """
+        Insert many rows without creating orm objects
+
+        The rows are sent in batches using executemany, so they can be streamed from an async iterator.
+        With asyncpg, batches of at least COPY_THRESHOLD rows are inserted using the binary COPY protocol.
+
+        :param cls: the model class
+        :param rows: the column values of the rows (all rows must have the same columns)
+        :param batch_size: maximum number of rows per batch
+        :return: the number of inserted rows
+        """
+
+        table = cls.__table__
+        use_copy: bool = self.engine.dialect.driver == "asyncpg"
+
+        total = 0
+        async for batch in batches(rows, batch_size):
+            if use_copy and len(batch) >= COPY_THRESHOLD:
+                # COPY bypasses the session, so pending objects the rows may refer to must be flushed first
+                await self.session.flush()
+                self._mark_written()
+                await copy_rows(await self.session.connection(), table, batch)
+            else:
+                await self.exec(table.insert(), batch)
+
+            total += len(batch)
+
+        return total
+
     async def delete(self, obj: T) -> T:
         """
         Remove a row from the database
@@ -156,22 +530,153 @@ class DB:
     async def exec(self, statement: Executable, *args, **kwargs):
         """Execute an sql statement and return the result."""
 
+        if not getattr(statement, "is_select", False):
+            self._mark_written()
+
         return await self.session.execute(statement, *args, **kwargs)
 
+    def _mark_written(self):
+        """Remember that the current session writes to the database, so all following queries use the primary."""
+
+        self.session.sync_session.info["written"] = True
+
+    def _replica_session(self, statement: Executable) -> Optional[AsyncSession]:
+        """
+        Get the replica session to execute a statement in
+
+        :param statement: the sql statement
+        :return: the replica session or None if the statement must be executed on the primary
+        """
+
+        if not getattr(statement, "is_select", False) or not (session := self._session.get()):
+            return None
+
+        return session.get_replica()
+
+    async def _merge(self, obj):
+        """Move a row loaded by a replica session into the primary session, so it can be modified."""
+
+        if isinstance(inspect(obj, raiseerr=False), InstanceState):
+            return await self.session.merge(obj, load=False)
+
+        return obj
+
+    async def _merge_all(self, result: AsyncIterator) -> AsyncIterator:
+        """Move all rows of a result streamed by a replica session into the primary session."""
+
+        async for obj in result:
+            yield await self._merge(obj)
+
+    async def _count_all(self, result: AsyncIterator) -> AsyncIterator:
+        """Count the rows of a streamed result as they are fetched."""
+
+        async for obj in result:
+            self._count_rows(1)
+            yield obj
+
     async def stream(self, statement: Executable, *args, **kwargs):
         """Execute an sql statement and stream the result."""
 
-        return (await self.session.stream(statement, *args, **kwargs)).scalars()
+        if (replica := self._replica_session(statement)) is not None:
+            return self._merge_all(self._count_all((await replica.stream(statement, *args, **kwargs)).scalars()))
+
+        return self._count_all((await self.session.stream(statement, *args, **kwargs)).scalars())
 
     async def all(self, statement: Executable, *args, **kwargs) -> list[T]:
         """Execute an sql statement and return all results as a list."""
 
         return [x async for x in await self.stream(statement, *args, **kwargs)]
 
-    async def first(self, *args, **kwargs):
-        """Execute an sql statement and return the first result."""
+    async def paginate(
+        self,
+        statement: Select,
+        order_by: Sequence = (),
+        after: Optional[str] = None,
+        limit: int = 50,
+    ) -> Page:
+        """
+        Fetch a page of the rows of a select statement using keyset pagination
+
+        Instead of skipping the rows of the previous pages with OFFSET, the rows are filtered by the sort key
+        of the last row of the previous page, so deep pages are as fast as the first one if there is an index.
+        The primary key is appended to the sort key to make the order unique. Sort columns must not be nullable,
+        as rows with null values cannot be compared with the cursor.
+
+        :param statement: the select statement of a model, e.g. from select() or filter_by()
+        :param order_by: the columns to sort by, optionally with .asc() or .desc()
+        :param after: the cursor of the previous page (None for the first page)
+        :param limit: maximum number of rows per page
+        :return: the rows and the cursor of the next page (None if this is the last page)
+        """
+
+        if limit < 1:
+            raise ValueError("limit must be positive")
+
+        keys = get_sort_keys(statement, list(order_by))
+        if after is not None:
+            statement = statement.where(seek(keys, decode_cursor(after, keys)))
+
+        statement = statement.order_by(None).order_by(
+            *(column.desc() if descending else column.asc() for column, descending in keys)
+        )
+        items = await self.all(statement.limit(limit + 1))
+        if len(items) <= limit:
+            return Page(items, None)
+
+        items = items[:limit]
+        return Page(items, encode_cursor([getattr(items[-1], column.key) for column, _ in keys]))
+
+    async def first(self, statement: Executable, *args, **kwargs):
+        """
+        Execute an sql statement and return the first result
+
+        If single flight is enabled, concurrent identical read-only queries of sessions which have not written
+        anything share one database call. Each session gets its own copy of a shared orm object.
+        """
+
+        if self.single_flight is not None and (key := self._single_flight_key(statement, args, kwargs)) is not None:
+            return await self._restore(
+                await self.single_flight.run(key, lambda: self._first_snapshot(statement, *args))
+            )
+
+        return await self._first(statement, *args, **kwargs)
+
+    def _single_flight_key(self, statement: Executable, args: tuple, kwargs: dict) -> Optional[Any]:
+        """Get the key identifying identical queries, or None if the query must not be shared."""
+
+        # reads after writes must see the changes of their own session
+        if not (session := self._session.get()) or session.written:
+            return None
+
+        return get_key(statement, args, kwargs)
 
-        return (await self.exec(*args, **kwargs)).scalar()
+    async def _first_snapshot(self, statement: Executable, *args):
+        """Execute an sql statement and return a snapshot of the first result, which can be shared."""
+
+        return make_snapshot(await self._first(statement, *args))
+
+    async def _restore(self, result):
+        """Turn a snapshot into an orm object of the current session."""
+
+        if not isinstance(result, Snapshot):
+            return result
+
+        obj = result.cls(**result.values)
+        make_transient_to_detached(obj)
+        return await self.session.merge(obj, load=False)
+
+    async def _first(self, statement: Executable, *args, **kwargs):
+        """Execute an sql statement and return the first result without single flight."""
+
+        if (replica := self._replica_session(statement)) is not None:
+            result = await self._merge((await replica.execute(statement, *args, **kwargs)).scalar())
+        else:
+            result = (await self.exec(statement, *args, **kwargs)).scalar()
+
+        if result is not None:
+            self._count_rows(1)
+
+        return result
 
     async def exists(self, *args, **kwargs):
         """Execute an sql statement and return whether it returned at least one row."""
@@ -184,35 +689,311 @@ class DB:
         return await self.first(select(count()).select_from(*args, **kwargs))
 
     async def get(self, cls: Type[T], *args, **kwargs) -> Optional[T]:
-        """Shortcut for first(filter_by(...))"""
+        """
+        Shortcut for first(filter_by(...))
+
+        Lookups by primary key are served from the cache (if enabled for this model)
+        unless the current session has already written something.
+        """
+
+        key: Optional[str] = None
+        if self.cache is not None and not args and not self._session.get().written:
+            key = self.cache.get_key(cls, kwargs)
+
+        if key is None:
+            return await self.first(*lookup_filter_by(cls, *args, **kwargs))
+
+        if (values := await self.cache.load(cls, key)) is not None:
+            return await self._restore(Snapshot(cls, values))
+
+        if (obj := await self.first(*lookup_filter_by(cls, **kwargs))) is not None:
+            await self.cache.store(key, obj)
+
+        return obj
+
+    def _invalidate(self, cls: Type[T], key: dict):
+        """
+        Invalidate the cache entry of a row after the current session has been committed
+
+        :param cls: the model class
+        :param key: primary key of the row
+        """
+
+        if self.cache is not None and (cache_key := get_lookup_key(cls, key)):
+            self.session.sync_session.info.setdefault("invalidate", set()).add(cache_key)
+
+    def _upsert_statement(self, cls: Type[T], values: dict, column: str, update) -> Insert:
+        """
+        Create an insert statement which updates a column of the existing row on primary key conflicts
+
+        :param cls: the model class
+        :param values: the values of the row to insert
+        :param column: name of the column to update if the row already exists
+        :param update: new value or sql expression for the column
+        :return: the dialect specific insert statement
+        """
+
+        table = cls.__table__
+        dialect: str = self.engine.dialect.name
+
+        if dialect == "postgresql":
+            return (
+                postgresql_insert(table)
+                .values(**values)
+                .on_conflict_do_update(
+                    index_elements=list(table.primary_key.columns),
+                    set_={column: update},
+                )
+            )
+
+        if dialect == "mysql":
+            return mysql_insert(table).values(**values).on_duplicate_key_update({column: update})
 
-        return await self.first(filter_by(cls, *args, **kwargs))
+        if dialect == "sqlite":
+            return (
+                sqlite_insert(table)
+                .values(**values)
+                .on_conflict_do_update(
+                    index_elements=list(table.primary_key.columns),
+                    set_={column: update},
+                )
+            )
+
+        raise NotImplementedError(f"upserts are not supported for the {dialect} dialect")
+
+    def _bulk_upsert_statement(self, cls: Type[T], conflict_cols: list[str], update_cols: list[str]) -> Insert:
+        """
+        Create an insert statement which overwrites the existing rows on conflicts, to be executed with many rows
+
+        :param cls: the model class
+        :param conflict_cols: names of the columns of the unique constraint (ignored by mysql, which checks all of them)
+        :param update_cols: names of the columns to overwrite if the row already exists
+        :return: the dialect specific insert statement
+        """
+
+        table = cls.__table__
+        dialect: str = self.engine.dialect.name
+
+        if dialect in ("postgresql", "sqlite"):
+            statement = (postgresql_insert if dialect == "postgresql" else sqlite_insert)(table)
+            if not update_cols:
+                return statement.on_conflict_do_nothing(index_elements=conflict_cols)
+
+            return statement.on_conflict_do_update(
+                index_elements=conflict_cols,
+                set_={column: statement.excluded[column] for column in update_cols},
+            )
+
+        if dialect == "mysql":
+            statement = mysql_insert(table)
+            if not update_cols:
+                # mysql needs at least one assignment, so existing rows are kept by assigning a column to itself
+                return statement.on_duplicate_key_update({conflict_cols[0]: table.c[conflict_cols[0]]})
+
+            return statement.on_duplicate_key_update({column: statement.inserted[column] for column in update_cols})
+
+        raise NotImplementedError(f"upserts are not supported for the {dialect} dialect")
+
+    async def upsert(self, cls: Type[T], column: str, value, **key) -> tuple[Optional[Any], Any]:
+        """
+        Set a column of a row or insert the row if it does not exist yet
+
+        :param cls: the model class
+        :param column: name of the column to set
+        :param value: the new value of the column
+        :param key: primary key of the row
+        :return: the old (None if the row has been inserted) and the new value of the column
+        """
+
+        table = cls.__table__
+        values = key | {column: value}
+        statement = self._upsert_statement(cls, values, column, value)
+        self._invalidate(cls, key)
+        self._mark_written()
+
+        dialect: str = self.engine.dialect.name
+        if dialect == "postgresql":
+            # rows can only be locked once they exist, so try to insert the row first (which waits for concurrent
+            # inserts of the same row to be committed or rolled back)
+            insert = (
+                postgresql_insert(table)
+                .values(values)
+                .on_conflict_do_nothing(index_elements=list(table.primary_key.columns))
+            )
+            if (await self.exec(insert.returning(table.c[column]))).first() is not None:
+                return None, value
+
+        old_statement = sa_select(table.c[column]).filter_by(**key)
+        if dialect in ("postgresql", "mysql"):
+            # the row stays locked until the end of the transaction, so nobody can change it before our update.
+            # concurrent first upserts of the same row on mysql may deadlock on the gap lock, which is reported
+            # as an error instead of a wrong old value
+            old_statement = old_statement.with_for_update()
+
+        old = await self.first(old_statement)
+        await self.exec(statement)
+        return old, value
+
+    async def increment(
+        self,
+        cls: Type[T],
+        column: str,
+        delta: int = 1,
+        *,
+        coalesce: bool = False,
+        **key,
+    ) -> tuple[Optional[int], int]:
+        """
+        Atomically add a value to a column of a row or insert the row if it does not exist yet
+
+        Coalesced increments are batched with concurrent increments of the same row and committed in a separate
+        transaction before this method returns, so they are neither part of the current session nor rolled back
+        with it. Therefore an increment is only coalesced if the current session has no pending writes (which
+        would otherwise be committed after the increment, or not at all) and is not shared by a transactional
+        batch request. In all other cases it is written in the current session like a normal increment.
+
+        :param cls: the model class
+        :param column: name of the column to increment
+        :param delta: the value to add (and the initial value of newly inserted rows)
+        :param coalesce: whether this increment may be coalesced (only if write coalescing is enabled)
+        :param key: primary key of the row
+        :return: the old (None if the row has been inserted) and the new value of the column
+        """
+
+        if coalesce and self.coalescer is not None and not self.transaction and not self._session.get().written:
+            return await self.coalescer.increment(cls, column, delta, key)
+
+        table = cls.__table__
+        statement = self._upsert_statement(cls, key | {column: delta}, column, table.c[column] + delta)
+        self._invalidate(cls, key)
+        self._mark_written()
+
+        if self.engine.dialect.name == "postgresql":
+            # xmax is only zero for freshly inserted row versions
+            result = await self.exec(statement.returning(table.c[column], literal_column("xmax = 0")))
+            new, inserted = result.one()
+        elif self.engine.dialect.name == "sqlite":
+            # sqlite reports one changed row for inserts and updates, so check whether the row exists beforehand
+            inserted = await self.first(sa_select(table.c[column]).filter_by(**key)) is None
+            await self.exec(statement)
+            new = await self.first(sa_select(table.c[column]).filter_by(**key))
+        else:
+            # the row stays locked until the end of the transaction, so the following select sees our update
+            inserted = (await self.exec(statement)).rowcount == 1
+            new = await self.first(sa_select(table.c[column]).filter_by(**key))
+
+        return (None if inserted else new - delta), new
+
+    async def bulk_upsert(
+        self,
+        cls: Type[T],
+        rows: Rows,
+        conflict_cols: list[str],
+        batch_size: int = BULK_BATCH_SIZE,
+    ) -> int:
+        """
+        Insert many rows or overwrite the existing rows on conflicts, without creating orm objects
+
+        The rows are sent in batches using executemany, so they can be streamed from an async iterator.
+
+        :param cls: the model class
+        :param rows: the column values of the rows (all rows must have the same columns)
+        :param conflict_cols: names of the columns of the unique constraint which identifies existing rows
+        :param batch_size: maximum number of rows per batch
+        :return: the number of inserted or updated rows
+        """
+
+        primary_key = [column.key for column in inspect(cls).primary_key]
+        statement: Optional[Insert] = None
+
+        total = 0
+        async for batch in batches(rows, batch_size):
+            if statement is None:
+                update_cols = [column for column in batch[0] if column not in conflict_cols]
+                statement = self._bulk_upsert_statement(cls, conflict_cols, update_cols)
+
+            if self.cache is not None:
+                for row in batch:
+                    self._invalidate(cls, {column: row[column] for column in primary_key if column in row})
+
+            await self.exec(statement, batch)
+            total += len(batch)
+
+        return total
 
     async def commit(self):
-        """Shortcut for :meth:`sqlalchemy.ext.asyncio.AsyncSession.commit`"""
+        """
+        Shortcut for :meth:`sqlalchemy.ext.asyncio.AsyncSession.commit`
+
+        The commit is skipped if the session has not been created or does not contain any changes.
+        """
+
+        if not (session := self._session.get()) or not session.written:
+            return
 
-        if self._session.get():
-            await self.session.commit()
+        await session.get().commit()
+
+        if self.cache is not None:
+            await self.cache.invalidate(session.get().sync_session.info.pop("invalidate", set()))
+
+    async def rollback(self):
+        """Shortcut for :meth:`sqlalchemy.ext.asyncio.AsyncSession.rollback`"""
+
+        if (session := self._session.get()) and session.created:
+            await session.get().rollback()
+            session.get().sync_session.info.clear()
 
     async def close(self):
         """Close the current session"""
 
-        if self._session.get():
-            await self.session.close()
+        if session := self._session.get():
+            if session.created:
+                await session.get().close()
+            if session.replica is not None:
+                await session.replica.close()
+            self.query_monitor.finish(session.stats)
             self._close_event.get().set()
 
-    def create_session(self) -> AsyncSession:
-        """Create a new async session and store it in the context variable."""
+    def create_session(self) -> LazySession:
+        """
+        Prepare a new async session and store it in the context variable.
+
+        The session itself (and therefore a connection from the pool) is only created on first use.
+        """
 
-        self._session.set(session := AsyncSession(self.engine))
+        choose_replica = self._choose_replica if self._replica_urls else None
+        self._session.set(session := LazySession(self.engine, choose_replica))
         self._close_event.set(Event())
         return session
 
     @property
-    def session(self) -> AsyncSession:
+    def session(self) -> Optional[AsyncSession]:
         """Get the session object for the current task"""
 
-        return self._session.get()
+        if session := self._session.get():
+            return session.get()
+
+        return None
+
+    @property
+    def streaming(self) -> bool:
+        """Whether the current session is kept open for a streaming response, which commits and closes it itself"""
+
+        return (session := self._session.get()) is not None and session.streaming
+
+    @streaming.setter
+    def streaming(self, value: bool):
+        self._session.get().streaming = value
+
+    @property
+    def transaction(self) -> bool:
+        """Whether the current session is shared by the calls of a transactional batch request"""
+
+        return (session := self._session.get()) is not None and session.transaction
+
+    @transaction.setter
+    def transaction(self, value: bool):
+        self._session.get().transaction = value
 
     async def wait_for_close_event(self):
         await self._close_event.get().wait()
@@ -233,7 +1014,19 @@ def get_database() -> DB:
         username=DB_USERNAME,
         password=DB_PASSWORD,
         pool_recycle=POOL_RECYCLE,
-        pool_size=POOL_SIZE,
-        max_overflow=MAX_OVERFLOW,
+        pool_size=max(POOL_SIZE // WORKERS, 1),
+        max_overflow=MAX_OVERFLOW // WORKERS,
         echo=SQL_SHOW_STATEMENTS,
+        cache=Cache(REDIS_HOST, REDIS_PORT, REDIS_DB) if REDIS_CACHE else None,
+        write_coalescing_window=WRITE_COALESCING_WINDOW / 1000,
+        replicas=[url for url in DB_REPLICAS.split(",") if url],
+        replica_strategy=DB_REPLICA_STRATEGY,
+        statement_cache_size=SQL_STMT_CACHE_SIZE,
+        statement_cache_lifetime=SQL_STMT_CACHE_LIFETIME,
+        pgbouncer=SQL_PGBOUNCER,
+        single_flight=SQL_SINGLE_FLIGHT,
+        repeat_threshold=SQL_REPEAT_THRESHOLD,
+        repeat_strict=SQL_REPEAT_STRICT,
+        slow_query_threshold=SQL_SLOW_QUERY_MS / 1000,
+        explain_rate=SQL_EXPLAIN_RATE,
     )
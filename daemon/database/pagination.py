@@ -0,0 +1,143 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, or_, tuple_, inspect
+from sqlalchemy.future import Select
+from sqlalchemy.sql import operators, ColumnElement
+from sqlalchemy.sql.elements import UnaryExpression
+
+from ..exceptions.pagination import InvalidCursorException
+
+Page = namedtuple("Page", ["items", "next"])
+
+# cursor values of these types are sent as strings and converted back using the python type of their column
+DECODERS = {
+    datetime: datetime.fromisoformat,
+    date: date.fromisoformat,
+    UUID: UUID,
+    Decimal: Decimal,
+}
+
+# cursor values of these types are sent as they are and must have the python type of their column
+JSON_TYPES = {str, int, float, bool}
+
+
+def get_sort_keys(statement: Select, order_by: list) -> list[tuple[ColumnElement, bool]]:
+    """
+    Get the columns of a keyset and their directions
+
+    The primary key columns of the selected model are appended, so the order is unique.
+
+    :param statement: the select statement of the model
+    :param order_by: the columns to sort by, optionally with .asc() or .desc()
+    :return: the columns and whether they are sorted in descending order
+    """
+
+    keys = []
+    for clause in order_by:
+        if isinstance(clause, UnaryExpression) and clause.modifier in (operators.desc_op, operators.asc_op):
+            keys.append((clause.element, clause.modifier is operators.desc_op))
+        else:
+            keys.append((clause, False))
+
+    for column, _ in keys:
+        # comparisons with null are never true, so rows with null values would be skipped
+        if getattr(column, "nullable", False):
+            raise ValueError(f"sort column {column.key} must not be nullable")
+
+    names = {column.key for column, _ in keys}
+    entity = statement.column_descriptions[0]["entity"]
+    descending = keys[-1][1] if keys else False
+    keys += [(column, descending) for column in inspect(entity).primary_key if column.key not in names]
+
+    return keys
+
+
+def encode_cursor(values: list) -> str:
+    """
+    Encode the sort key of a row as an opaque cursor
+
+    :param values: the values of the keyset columns
+    :return: the cursor
+    """
+
+    data = json.dumps(values, separators=(",", ":"), default=str)
+    return urlsafe_b64encode(data.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, keys: list[tuple[ColumnElement, bool]]) -> list:
+    """
+    Decode a cursor created by :func:`encode_cursor`
+
+    :param cursor: the cursor
+    :param keys: the keyset columns
+    :return: the values of the keyset columns
+    :raises InvalidCursorException: if the cursor is malformed or does not belong to this keyset
+    """
+
+    try:
+        values = json.loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+
+        return [_decode_value(value, column) for value, (column, _) in zip(values, keys)]
+    except (BinasciiError, UnicodeDecodeError, ValueError, TypeError, ArithmeticError):
+        raise InvalidCursorException
+
+
+def _decode_value(value: Any, column: ColumnElement) -> Any:
+    """Convert a cursor value back to the python type of its column and check that it has this type."""
+
+    if value is None:
+        return None
+
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+
+    if (decoder := DECODERS.get(python_type)) is not None:
+        if not isinstance(value, str):
+            raise TypeError
+        return decoder(value)
+
+    if python_type is float and type(value) is int:
+        return float(value)
+
+    # bool is a subclass of int, so the exact type is compared
+    if python_type in JSON_TYPES and type(value) is not python_type:
+        raise TypeError
+
+    return value
+
+
+def seek(keys: list[tuple[ColumnElement, bool]], values: list) -> ColumnElement:
+    """
+    Create the condition which selects the rows after a cursor
+
+    :param keys: the keyset columns
+    :param values: the values of the keyset columns of the last row of the previous page
+    :return: the where clause
+    """
+
+    if len(keys) == 1:
+        column, descending = keys[0]
+        return column < values[0] if descending else column > values[0]
+
+    if len({descending for _, descending in keys}) == 1:
+        # row value comparisons can use a composite index directly
+        columns, values = tuple_(*(column for column, _ in keys)), tuple_(*values)
+        return columns < values if keys[0][1] else columns > values
+
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal = [keys[j][0] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, column < values[i] if descending else column > values[i]))
+
+    return or_(*clauses)
@@ -0,0 +1,203 @@
+from asyncio import Task, create_task, sleep
+from time import perf_counter, time
+from typing import Optional, Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from ..logger import get_logger
+from ..metrics import Histogram, LATENCY_BUCKETS, render_histogram
+
+logger = get_logger(__name__)
+
+# upper bounds of the checkout wait histogram buckets in seconds
+WAIT_BUCKETS: tuple[float, ...] = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Async queue pool which measures how long it takes to check out a connection"""
+
+    # keep logging through the sqlalchemy pool logger instead of the daemon loggers
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+    metrics: Optional["PoolMetrics"] = None
+
+    def connect(self):
+        start = perf_counter()
+        try:
+            return super().connect()
+        finally:
+            if self.metrics is not None:
+                self.metrics.checkout_wait.observe(perf_counter() - start)
+
+    def recreate(self) -> "InstrumentedPool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class PoolMetrics:
+    """Collects usage statistics of a connection pool using pool events"""
+
+    def __init__(self, recycle: int):
+        """
+        :param recycle: number of seconds after which connections are recycled (-1 if they are never recycled)
+        """
+
+        self._recycle: int = recycle
+        self._engine: Optional[Engine] = None
+        self._log_task: Optional[Task] = None
+        self._last_summary: tuple = (0,) * 7
+
+        self.checkout_wait: Histogram = Histogram(WAIT_BUCKETS)
+        self.held: Histogram = Histogram(LATENCY_BUCKETS)
+        self.opened: int = 0
+        self.recycled: int = 0
+        self.invalidated: int = 0
+        self.pre_ping_failures: int = 0
+        self.overflow_checkouts: int = 0
+        self.peak_overflow: int = 0
+
+    def attach(self, engine: Engine):
+        """
+        Start collecting statistics of the connection pool of an engine
+
+        :param engine: the (sync) engine, which must use an :class:`InstrumentedPool`
+        """
+
+        self._engine = engine
+        pool: InstrumentedPool = engine.pool
+        pool.metrics = self
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+        event.listen(pool, "close", self._on_close)
+
+    def _on_connect(self, *_):
+        self.opened += 1
+
+    def _on_checkout(self, _, record: Any, __):
+        record.info["checkout_time"] = perf_counter()
+
+        if (overflow := self._engine.pool.overflow()) > 0:
+            self.overflow_checkouts += 1
+            self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def _on_checkin(self, _, record: Any):
+        if record is not None and (start := record.info.pop("checkout_time", None)) is not None:
+            self.held.observe(perf_counter() - start)
+
+    def _on_invalidate(self, _, record: Any, exception: Optional[BaseException]):
+        record.info["invalidated"] = True
+
+        # the pool raises a DisconnectionError on checkout if the pre-ping fails
+        if isinstance(exception, DisconnectionError):
+            self.pre_ping_failures += 1
+        else:
+            self.invalidated += 1
+
+    def _on_close(self, _, record: Any):
+        if not record.info.get("invalidated") and 0 <= self._recycle < time() - record.starttime:
+            self.recycled += 1
+
+    def render(self) -> list[str]:
+        """
+        Export the pool statistics
+
+        :return: the lines of the statistics in the prometheus text format
+        """
+
+        lines = []
+        if (engine := self._engine) is not None:
+            lines += [
+                "# HELP daemon_db_pool_size Number of connections the pool keeps open.",
+                "# TYPE daemon_db_pool_size gauge",
+                f"daemon_db_pool_size {engine.pool.size()}",
+                "# HELP daemon_db_pool_checked_out Number of connections currently checked out.",
+                "# TYPE daemon_db_pool_checked_out gauge",
+                f"daemon_db_pool_checked_out {engine.pool.checkedout()}",
+                "# HELP daemon_db_pool_overflow Number of open connections exceeding the pool size.",
+                "# TYPE daemon_db_pool_overflow gauge",
+                f"daemon_db_pool_overflow {max(engine.pool.overflow(), 0)}",
+            ]
+
+        for name, description, value in [
+            ("connections_opened", "Number of opened database connections.", self.opened),
+            ("connections_recycled", "Number of connections closed because of pool_recycle.", self.recycled),
+            ("connections_invalidated", "Number of invalidated connections.", self.invalidated),
+            ("pre_ping_failures", "Number of connections which failed the pre-ping.", self.pre_ping_failures),
+            ("overflow_checkouts", "Number of checkouts while overflow connections existed.", self.overflow_checkouts),
+        ]:
+            lines += [
+                f"# HELP daemon_db_pool_{name}_total {description}",
+                f"# TYPE daemon_db_pool_{name}_total counter",
+                f"daemon_db_pool_{name}_total {value}",
+            ]
+
+        lines += [
+            "# HELP daemon_db_pool_checkout_wait_seconds Time it took to check out a connection.",
+            "# TYPE daemon_db_pool_checkout_wait_seconds histogram",
+            *render_histogram("daemon_db_pool_checkout_wait_seconds", "", self.checkout_wait),
+            "# HELP daemon_db_pool_connection_held_seconds Time connections were checked out.",
+            "# TYPE daemon_db_pool_connection_held_seconds histogram",
+            *render_histogram("daemon_db_pool_connection_held_seconds", "", self.held),
+        ]
+        return lines
+
+    def summary(self, interval: float) -> str:
+        """
+        Summarize the pool usage since the last summary
+
+        :param interval: number of seconds since the last summary
+        :return: the summary
+        """
+
+        current = (
+            self.checkout_wait.count,
+            self.checkout_wait.sum,
+            self.held.count,
+            self.held.sum,
+            self.opened,
+            self.recycled,
+            self.pre_ping_failures,
+        )
+        checkouts, wait, checkins, held, opened, recycled, failures = (
+            now - last for now, last in zip(current, self._last_summary)
+        )
+        self._last_summary = current
+        peak_overflow, self.peak_overflow = self.peak_overflow, 0
+        per_minute = 60 / interval
+
+        return (
+            f"connection pool: {checkouts} checkouts (avg wait {wait / (checkouts or 1) * 1000:.2f}ms, "
+            f"avg held {held / (checkins or 1) * 1000:.2f}ms), peak overflow {peak_overflow}, "
+            f"{opened * per_minute:.1f} opened/min, {recycled * per_minute:.1f} recycled/min, "
+            f"{failures} pre-ping failures"
+        )
+
+    async def _log_summaries(self, interval: float):
+        """Log a summary of the pool usage periodically."""
+
+        while True:
+            await sleep(interval)
+            logger.info(self.summary(interval))
+
+    def start_logging(self, interval: float):
+        """
+        Start logging a summary of the pool usage periodically
+
+        :param interval: number of seconds between two summaries
+        """
+
+        if self._log_task is None:
+            self._log_task = create_task(self._log_summaries(interval))
+
+    def stop_logging(self):
+        """Stop logging summaries of the pool usage."""
+
+        if self._log_task is not None:
+            self._log_task.cancel()
+            self._log_task = None
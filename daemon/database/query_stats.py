@@ -0,0 +1,172 @@
+from collections import Counter
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..logger import get_logger
+from ..metrics import Histogram, LATENCY_BUCKETS, render_histogram
+
+# upper bounds of the statements per session histogram buckets
+STATEMENT_BUCKETS: tuple[float, ...] = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+logger = get_logger(__name__)
+
+
+class RepeatedStatementError(Exception):
+    """Raised in strict mode if a session executes the same statement too often (e.g. an N+1 query pattern)"""
+
+
+class QueryStats:
+    """Statements, fetched rows and database time of a single session"""
+
+    __slots__ = ("statements", "rows", "duration", "shapes")
+
+    def __init__(self):
+        self.statements: int = 0
+        self.rows: int = 0
+        self.duration: float = 0
+        # number of executions of each statement (without its parameters)
+        self.shapes: Counter = Counter()
+
+
+class QueryBudget:
+    """
+    Context manager which fails if more statements than allowed are executed while it is active
+
+    The statements of all sessions are counted, so requests sent by a test client are included. Usage::
+
+        with db.query_budget(2):
+            client.post("/counter/get", json={"user_id": 1})
+    """
+
+    def __init__(self, monitor: "QueryMonitor", statements: int):
+        """
+        :param monitor: the query monitor of the engines
+        :param statements: maximum number of statements
+        """
+
+        self._monitor: QueryMonitor = monitor
+        self.max_statements: int = statements
+        self.statements: list[str] = []
+
+    def __enter__(self) -> "QueryBudget":
+        self._monitor.budgets.append(self)
+        return self
+
+    def __exit__(self, exc_type, *_):
+        self._monitor.budgets.remove(self)
+        if exc_type is None and len(self.statements) > self.max_statements:
+            statements = "\n".join(self.statements)
+            raise AssertionError(
+                f"{len(self.statements)} statements executed, but only {self.max_statements} are allowed:\n{statements}"
+            )
+
+
+class QueryMonitor:
+    """Counts the statements, fetched rows and database time of each session and detects repeated statements"""
+
+    def __init__(
+        self,
+        get_stats: Callable[[], Optional[QueryStats]],
+        repeat_threshold: int = 0,
+        strict: bool = False,
+    ):
+        """
+        :param get_stats: function which returns the statistics of the current session (None outside of sessions)
+        :param repeat_threshold: number of executions of a statement per session after which it is reported (0 = off)
+        :param strict: whether to raise a RepeatedStatementError instead of logging a warning
+        """
+
+        self._get_stats: Callable[[], Optional[QueryStats]] = get_stats
+        self.repeat_threshold: int = repeat_threshold
+        self.strict: bool = strict
+        self.budgets: list[QueryBudget] = []
+
+        self.sessions: Histogram = Histogram(STATEMENT_BUCKETS)
+        self.duration: Histogram = Histogram(LATENCY_BUCKETS)
+        self.rows: int = 0
+        self.repeated: int = 0
+
+    def attach(self, engine: Engine):
+        """
+        Count the statements executed by an engine
+
+        :param engine: the (sync) engine
+        """
+
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn: Any, _, statement: str, parameters: Any, context: Any, executemany: bool):
+        for budget in self.budgets:
+            budget.statements.append(statement)
+
+        if (stats := self._get_stats()) is not None:
+            stats.statements += 1
+            stats.shapes[statement] += 1
+            if self.repeat_threshold and stats.shapes[statement] > self.repeat_threshold:
+                self._report(statement, stats.shapes[statement])
+
+        # after_cursor_execute is skipped if the statement fails, so the start must not outlive the execution context
+        if context is not None:
+            context.query_start = perf_counter()
+
+    def _after_cursor_execute(self, conn: Any, _, statement: str, parameters: Any, context: Any, executemany: bool):
+        if (start := getattr(context, "query_start", None)) is None:
+            return
+
+        duration = perf_counter() - start
+        if (stats := self._get_stats()) is not None:
+            stats.duration += duration
+
+    def _report(self, statement: str, executions: int):
+        """Report a statement which has been executed too often by one session."""
+
+        message = f"statement executed {executions} times in one session: {statement}"
+        if self.strict:
+            raise RepeatedStatementError(message)
+
+        # each statement is only reported once per session
+        if executions == self.repeat_threshold + 1:
+            self.repeated += 1
+            logger.warning(message)
+
+    def finish(self, stats: QueryStats):
+        """
+        Record the statistics of a closed session
+
+        :param stats: the statistics of the session
+        """
+
+        self.sessions.observe(stats.statements)
+        self.duration.observe(stats.duration)
+        self.rows += stats.rows
+        if stats.statements:
+            logger.debug(
+                f"session executed {stats.statements} statements, fetched {stats.rows} rows "
+                f"and spent {stats.duration * 1000:.2f} ms in the database"
+            )
+
+    def render(self) -> list[str]:
+        """
+        Export the query statistics
+
+        :return: the lines of the statistics in the prometheus text format
+        """
+
+        return [
+            "# HELP daemon_db_session_statements Number of statements executed per session.",
+            "# TYPE daemon_db_session_statements histogram",
+            *render_histogram("daemon_db_session_statements", "", self.sessions),
+            "# HELP daemon_db_session_duration_seconds Time each session spent executing statements.",
+            "# TYPE daemon_db_session_duration_seconds histogram",
+            *render_histogram("daemon_db_session_duration_seconds", "", self.duration),
+            "# HELP daemon_db_rows_fetched_total Number of rows fetched by sessions.",
+            "# TYPE daemon_db_rows_fetched_total counter",
+            f"daemon_db_rows_fetched_total {self.rows}",
+            "# HELP daemon_db_repeated_statements_total Number of statements repeated too often in one session.",
+            "# TYPE daemon_db_repeated_statements_total counter",
+            f"daemon_db_repeated_statements_total {self.repeated}",
+        ]
@@ -0,0 +1,126 @@
+from asyncio import CancelledError, Future, get_running_loop, shield
+from collections import namedtuple
+from typing import Any, Awaitable, Callable, Hashable, Optional, TypeVar
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import InstanceState
+from sqlalchemy.sql import Executable
+
+T = TypeVar("T")
+
+# column values of an orm object, which can be turned into a separate object for each session
+Snapshot = namedtuple("Snapshot", ["cls", "values"])
+
+
+def get_key(statement: Executable, args: tuple, kwargs: dict) -> Optional[Hashable]:
+    """
+    Get the key of a read-only query which identifies identical queries
+
+    :param statement: the sql statement
+    :param args: the positional arguments of the execution (only a dict of parameters is supported)
+    :param kwargs: the keyword arguments of the execution (not supported)
+    :return: the key or None if the query cannot be shared
+    """
+
+    if not getattr(statement, "is_select", False) or kwargs or len(args) > 1:
+        return None
+
+    # relationships loaded by loader options are not part of snapshots
+    if getattr(statement, "_with_options", ()):
+        return None
+
+    if (cache_key := statement._generate_cache_key()) is None:
+        return None
+
+    params = args[0] if args else {}
+    if not isinstance(params, dict):
+        return None
+
+    key = (
+        cache_key.key,
+        tuple(bindparam.effective_value for bindparam in cache_key.bindparams),
+        tuple(sorted(params.items())),
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+
+    return key
+
+
+def make_snapshot(result: Any) -> Any:
+    """
+    Copy the column values of an orm object, so it can be shared with other sessions
+
+    :param result: the result of a query
+    :return: the snapshot of an orm object or any other result unchanged
+    """
+
+    if not isinstance(state := inspect(result, raiseerr=False), InstanceState):
+        return result
+
+    return Snapshot(state.class_, {attr.key: getattr(result, attr.key) for attr in state.mapper.column_attrs})
+
+
+class SingleFlight:
+    """Lets concurrent identical calls share one execution and its result"""
+
+    def __init__(self):
+        self._calls: dict[Hashable, Future] = {}
+        self.shared: int = 0
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Call a function or wait for the result of an identical call which is already running
+
+        :param key: identifies identical calls
+        :param func: coroutine function to call if no identical call is running
+        :return: the (shared) result
+        """
+
+        while (future := self._calls.get(key)) is not None:
+            try:
+                result = await shield(future)
+            except CancelledError:
+                if not future.cancelled():
+                    raise
+
+                # the task running the call has been cancelled, so the call is started again
+                continue
+
+            self.shared += 1
+            return result
+
+        self._calls[key] = future = get_running_loop().create_future()
+        try:
+            result = await func()
+        except CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exception:
+            future.set_exception(exception)
+            # the exception is raised here, so it must not be logged if no other call waits for it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def render(self) -> list[str]:
+        """
+        Export the single flight statistics
+
+        :return: the lines of the statistics in the prometheus text format
+        """
+
+        return [
+            "# HELP daemon_db_single_flight_shared_total Number of queries which reused the result of another query.",
+            "# TYPE daemon_db_single_flight_shared_total counter",
+            f"daemon_db_single_flight_shared_total {self.shared}",
+            "# HELP daemon_db_single_flight_in_flight Number of running queries which can be shared.",
+            "# TYPE daemon_db_single_flight_in_flight gauge",
+            f"daemon_db_single_flight_in_flight {len(self._calls)}",
+        ]
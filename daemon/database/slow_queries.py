@@ -0,0 +1,157 @@
+from random import random
+from time import perf_counter
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+from ..logger import get_logger
+from ..metrics import current_endpoint
+
+logger = get_logger(__name__)
+
+
+def redact(parameters: Any, executemany: bool) -> str:
+    """
+    Describe the parameters of a statement without their values, which may contain personal data
+
+    :param parameters: the parameters passed to the dbapi cursor
+    :param executemany: whether the statement is executed once for each of multiple parameter sets
+    :return: the types of the parameters
+    """
+
+    if executemany:
+        return f"{len(parameters)} parameter sets"
+
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+
+    return "(" + ", ".join(type(value).__name__ for value in parameters or ()) + ")"
+
+
+def is_select(context: Any) -> bool:
+    """
+    Check whether a statement has been compiled from a select statement
+
+    :param context: the execution context of the statement
+    :return: False for writes, ddl and textual statements
+    """
+
+    compiled = getattr(context, "compiled", None)
+    return compiled is not None and getattr(compiled.statement, "is_select", False)
+
+
+def explain(conn: Connection, statement: str, parameters: Any) -> str:
+    """
+    Execute a select statement again using EXPLAIN (ANALYZE, BUFFERS) (postgresql only)
+
+    The statement is executed within a savepoint which is rolled back afterwards,
+    so a failing EXPLAIN does not abort the transaction of the session.
+
+    :param conn: the connection which executed the statement
+    :param statement: the sql statement
+    :param parameters: the parameters passed to the dbapi cursor
+    :return: the query plan
+    """
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            return "\n".join(row[0] for row in cursor.fetchall())
+        finally:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """Logs statements which take longer than a threshold, optionally with their query plan"""
+
+    def __init__(self, threshold: float, explain_rate: float = 0):
+        """
+        :param threshold: number of seconds after which a statement is logged (0 to disable)
+        :param explain_rate: fraction of the slow select statements to log the query plan of (postgresql only)
+        """
+
+        self.threshold: float = threshold
+        self.explain_rate: float = explain_rate
+        self.slow: int = 0
+
+    def attach(self, engine: Engine):
+        """
+        Measure the statements executed by an engine
+
+        :param engine: the (sync) engine
+        """
+
+        if self.threshold <= 0:
+            return
+
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(
+        self, conn: Connection, _, statement: str, parameters: Any, context: Any, executemany: bool
+    ):
+        # after_cursor_execute is skipped if the statement fails, so the start must not outlive the execution context
+        if context is not None:
+            context.slow_query_start = perf_counter()
+
+    def _after_cursor_execute(
+        self, conn: Connection, _, statement: str, parameters: Any, context: Any, executemany: bool
+    ):
+        if (start := getattr(context, "slow_query_start", None)) is None:
+            return
+
+        duration = perf_counter() - start
+        if duration < self.threshold:
+            return
+
+        self.slow += 1
+        message = (
+            f"slow statement ({duration * 1000:.2f} ms) in {current_endpoint.get() or 'no endpoint'}: "
+            f"{statement} parameters: {redact(parameters, executemany)}"
+        )
+        if (plan := self._explain(conn, statement, parameters, context, executemany)) is not None:
+            message += f"\n{plan}"
+
+        logger.warning(message)
+
+    def _explain(
+        self,
+        conn: Connection,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> Optional[str]:
+        """Get the query plan of a sampled slow select statement."""
+
+        # EXPLAIN ANALYZE executes the statement again, which is only safe for statements without side effects
+        if executemany or conn.dialect.name != "postgresql" or not is_select(context):
+            return None
+
+        if random() >= self.explain_rate:  # noqa: S311
+            return None
+
+        try:
+            return explain(conn, statement, parameters)
+        except Exception as e:  # noqa: B902
+            logger.warning(f"could not explain slow statement: {e}")
+            return None
+
+    def render(self) -> list[str]:
+        """
+        Export the slow query statistics
+
+        :return: the lines of the statistics in the prometheus text format
+        """
+
+        return [
+            "# HELP daemon_db_slow_statements_total Number of statements which exceeded the slow query threshold.",
+            "# TYPE daemon_db_slow_statements_total counter",
+            f"daemon_db_slow_statements_total {self.slow}",
+        ]
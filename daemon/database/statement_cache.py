@@ -0,0 +1,121 @@
+from time import time
+from typing import Any
+from uuid import uuid4
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.util import LRUCache
+
+
+def get_connect_args(driver: str, size: int, lifetime: int, pgbouncer: bool) -> dict[str, Any]:
+    """
+    Get the driver arguments which configure the prepared statement caches
+
+    :param driver: name of the sql connection driver
+    :param size: maximum number of cached prepared statements per connection (0 to disable the cache)
+    :param lifetime: number of seconds after which cached prepared statements are prepared again (0 for no limit)
+    :param pgbouncer: whether the database is accessed through pgbouncer in transaction pooling mode
+    :return: the connect_args for the engine
+    """
+
+    if not driver.startswith("postgresql+asyncpg"):
+        return {}
+
+    if pgbouncer:
+        # prepared statements must not outlive a transaction, as the next one may use another server connection
+        return {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+            "connection_class": get_pgbouncer_connection_class(),
+        }
+
+    return {
+        "prepared_statement_cache_size": size,
+        "statement_cache_size": size,
+        "max_cached_statement_lifetime": lifetime,
+    }
+
+
+def get_pgbouncer_connection_class() -> type:
+    """Get an asyncpg connection class which uses unique names for prepared statements."""
+
+    from asyncpg import Connection
+
+    class PgBouncerConnection(Connection):
+        """
+        asyncpg connection which uses globally unique names for prepared statements
+
+        asyncpg numbers prepared statements per process, so the names of different clients would collide
+        on server connections shared by pgbouncer.
+        """
+
+        def _get_unique_id(self, prefix: str) -> str:
+            return f"__asyncpg_{prefix}_{uuid4().hex}__"
+
+    return PgBouncerConnection
+
+
+class StatementCache(LRUCache):
+    """Prepared statement cache of the asyncpg adapter which counts hits and misses and expires old statements"""
+
+    __slots__ = ("_stats",)
+
+    def __init__(self, stats: "StatementCacheStats", capacity: int):
+        super().__init__(capacity)
+
+        self._stats: StatementCacheStats = stats
+
+    def __contains__(self, operation: str) -> bool:
+        # the cached values consist of the prepared statement, its attributes and the time it was prepared
+        entry = self.get(operation)
+        lifetime = self._stats.lifetime
+        if entry is None or lifetime and time() - entry[2] > lifetime:
+            self._stats.misses += 1
+            return False
+
+        self._stats.hits += 1
+        return True
+
+
+class StatementCacheStats:
+    """Counts hits and misses of the prepared statement caches of all connections of an engine"""
+
+    def __init__(self, lifetime: int):
+        """
+        :param lifetime: number of seconds after which cached prepared statements are prepared again (0 for no limit)
+        """
+
+        self.lifetime: int = lifetime
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def attach(self, engine: Engine):
+        """
+        Replace the prepared statement caches of new connections of an engine with counting caches
+
+        :param engine: the (sync) engine
+        """
+
+        event.listen(engine.pool, "connect", self._on_connect)
+
+    def _on_connect(self, dbapi_connection: Any, _):
+        # only the asyncpg adapter caches prepared statements
+        cache = getattr(dbapi_connection, "_prepared_statement_cache", None)
+        if isinstance(cache, LRUCache):
+            dbapi_connection._prepared_statement_cache = StatementCache(self, cache.capacity)
+
+    def render(self) -> list[str]:
+        """
+        Export the statement cache statistics
+
+        :return: the lines of the statistics in the prometheus text format
+        """
+
+        return [
+            "# HELP daemon_db_statement_cache_hits_total Number of queries which reused a prepared statement.",
+            "# TYPE daemon_db_statement_cache_hits_total counter",
+            f"daemon_db_statement_cache_hits_total {self.hits}",
+            "# HELP daemon_db_statement_cache_misses_total Number of queries which had to prepare a statement.",
+            "# TYPE daemon_db_statement_cache_misses_total counter",
+            f"daemon_db_statement_cache_misses_total {self.misses}",
+        ]
@@ -0,0 +1,56 @@
+from asyncio import gather
+from typing import Any, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.sql import Executable
+
+from ..logger import get_logger
+
+logger = get_logger(__name__)
+
+PING = text("SELECT 1")
+
+# statements and their parameters which are executed on each connection during the warm-up
+Statements = Sequence[tuple[Executable, dict[str, Any]]]
+
+
+async def _connect(engine: AsyncEngine, statements: Statements) -> AsyncConnection:
+    """Open a connection and execute the warm-up statements, keeping it checked out."""
+
+    conn = engine.connect()
+    await conn.start()
+    try:
+        await conn.execute(PING)
+        for statement, parameters in statements:
+            await conn.execute(statement, parameters)
+    except BaseException:
+        await conn.close()
+        raise
+
+    return conn
+
+
+async def warm_up(engine: AsyncEngine, connections: int, statements: Statements = ()) -> int:
+    """
+    Open connections of the pool of an engine in parallel and execute a trivial query on each
+
+    All connections are checked out at the same time, so the pool has to open a new connection for each of them.
+    Afterwards they are returned to the pool, where they stay open for the following requests.
+
+    :param engine: the async engine
+    :param connections: number of connections to open
+    :param statements: statements to execute on each connection (e.g. to prepare them)
+    :return: the number of connections which have been opened successfully
+    """
+
+    results = await gather(*[_connect(engine, statements) for _ in range(connections)], return_exceptions=True)
+    errors = [result for result in results if isinstance(result, BaseException)]
+    opened = [result for result in results if not isinstance(result, BaseException)]
+
+    await gather(*[conn.close() for conn in opened])
+
+    if errors:
+        logger.warning(f"could not warm up {len(errors)} of {connections} connections: {errors[0]}")
+
+    return len(opened)
@@ -0,0 +1,110 @@
+from asyncio import Event, TimeoutError, get_running_loop, wait_for
+from contextlib import contextmanager
+from socket import socket
+from typing import Iterator, Optional
+
+import uvicorn
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class InFlightRequests:
+    """Counts the requests which are currently being handled, so the shutdown can wait for them"""
+
+    def __init__(self):
+        self.count: int = 0
+        self.deadline: Optional[float] = None
+        self._idle: Optional[Event] = None
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Count a request (including the commit of its database session) while the context is active."""
+
+        self.count += 1
+        try:
+            yield
+        finally:
+            self.count -= 1
+            if not self.count and self._idle is not None:
+                self._idle.set()
+
+    def start_deadline(self, timeout: float) -> float:
+        """
+        Start the shutdown deadline, unless it has already been started
+
+        The server and the shutdown handler both wait for the requests, so they share one deadline.
+
+        :param timeout: number of seconds from now until the deadline
+        :return: the event loop time of the deadline
+        """
+
+        if self.deadline is None:
+            self.deadline = get_running_loop().time() + timeout
+
+        return self.deadline
+
+    async def wait(self, timeout: float) -> int:
+        """
+        Wait until all requests have been handled or the shutdown deadline has passed
+
+        :param timeout: number of seconds until the deadline, if it has not been started yet
+        :return: the number of requests which are still being handled after the deadline
+        """
+
+        deadline = self.start_deadline(timeout)
+        if not self.count:
+            return 0
+
+        logger.info(f"waiting for {self.count} requests to finish")
+        self._idle = Event()
+        try:
+            await wait_for(self._idle.wait(), max(deadline - get_running_loop().time(), 0))
+        except TimeoutError:
+            pass
+        finally:
+            self._idle = None
+
+        return self.count
+
+
+# requests handled by this worker
+in_flight = InFlightRequests()
+
+
+class DrainingServer(uvicorn.Server):
+    """Uvicorn server which closes the remaining connections if they are not finished within a deadline on shutdown"""
+
+    def __init__(self, config: uvicorn.Config, timeout: float):
+        """
+        :param config: the uvicorn config
+        :param timeout: number of seconds to wait for open connections and their requests before they are closed
+                        (the deadline is shared with the shutdown handler, see :meth:`InFlightRequests.wait`)
+        """
+
+        super().__init__(config)
+        self.timeout: float = timeout
+
+    def _close_connections(self):
+        """Close all connections and cancel all requests which are still running after the deadline."""
+
+        connections, tasks = list(self.server_state.connections), list(self.server_state.tasks)
+        if not connections and not tasks:
+            return
+
+        logger.warning(
+            f"shutdown timeout exceeded, closing {len(connections)} connections and cancelling {len(tasks)} requests"
+        )
+        for connection in connections:
+            connection.transport.close()
+        for task in tasks:
+            task.cancel()
+
+    async def shutdown(self, sockets: Optional[list[socket]] = None):
+        # uvicorn stops accepting connections and waits for the open ones and their requests without a deadline
+        handle = get_running_loop().call_at(in_flight.start_deadline(self.timeout), self._close_connections)
+        try:
+            await super().shutdown(sockets)
+        finally:
+            handle.cancel()
@@ -3,21 +3,28 @@ from collections import namedtuple
 from typing import Optional
 
 from fastapi import FastAPI, Depends, APIRouter, Body
+from fastapi.routing import APIRoute
 from pydantic import UUID4
 
 from .authorization import HTTPAuthorization
 from .environment import DEBUG
+from .metrics import MetricsRoute
+from .streaming import stream_endpoint
 
 Endpoint = namedtuple("Endpoint", ["name", "description"])
 
+# patterns of the sphinx fields in endpoint docstrings, compiled once for all endpoints
+PARAM_PATTERN = re.compile(r":param ([a-zA-Z\d_]+):")
+RETURNS_PATTERN = re.compile(r":returns?:")
+
 
 def format_docs(func):
     doc = "\n".join(line.strip() for line in func.__doc__.strip().splitlines()).replace(
         "\n\n:param",
         "\n\n**Parameters:**\n:param",
     )
-    doc = re.sub(r":param ([a-zA-Z\d_]+):", r"- **\1:**", doc)
-    doc = re.sub(r":returns?:", r"\n**Returns:**", doc)
+    doc = PARAM_PATTERN.sub(r"- **\1:**", doc)
+    doc = RETURNS_PATTERN.sub(r"\n**Returns:**", doc)
     func.__doc__ = doc
     return func
 
@@ -48,21 +55,36 @@ class EndpointCollection(APIRouter):
         if test:
             tag = f"[TEST] {tag}"
 
-        super().__init__(prefix=f"/{name}", tags=[tag], dependencies=[Depends(HTTPAuthorization())])
+        super().__init__(
+            prefix=f"/{name}",
+            tags=[tag],
+            dependencies=[Depends(HTTPAuthorization())],
+            route_class=MetricsRoute,
+        )
 
         self._name: str = name
         self._description: str = description
         self._test: bool = test
         self._disabled: bool = disabled or test and not DEBUG
         self._endpoints: list[Endpoint] = []
-
-    def endpoint(self, name: Optional[str] = None, *args, disabled: bool = False, test: bool = False, **kwargs):
+        self._routes: dict[str, APIRoute] = {}
+
+    def endpoint(
+        self,
+        name: Optional[str] = None,
+        *args,
+        disabled: bool = False,
+        test: bool = False,
+        stream: bool = False,
+        **kwargs,
+    ):
         """
         Register a new endpoint in this collection.
 
         :param name: name of the endpoint
         :param disabled: whether this endpoint is disabled or not
         :param test: whether this endpoint is only for testing
+        :param stream: whether the endpoint returns an async iterator whose items are streamed to the client
         """
 
         test = test or self._test
@@ -81,7 +103,11 @@ class EndpointCollection(APIRouter):
 
             func = format_docs(func)
             func = default_parameter(Body(...))(func)
-            return self.post(f"/{_name}", name="[TEST] " * test + func.__name__, *args, **kwargs)(func)
+            if stream:
+                func = stream_endpoint(func)
+            func = self.post(f"/{_name}", name="[TEST] " * test + func.__name__, *args, **kwargs)(func)
+            self._routes[_name] = self.routes[-1]
+            return func
 
         return deco
 
@@ -93,6 +119,19 @@ class EndpointCollection(APIRouter):
     def description(self) -> str:
         return self._description
 
+    def get_route(self, name: str) -> Optional[APIRoute]:
+        """
+        Get the route of an endpoint in this collection
+
+        :param name: name of the endpoint
+        :return: the route or None if the endpoint does not exist or is disabled
+        """
+
+        if self._disabled:
+            return None
+
+        return self._routes.get(name)
+
     def register(self, app: FastAPI) -> Optional[dict]:
         """
         Register this endpoint collection in the FastAPI app
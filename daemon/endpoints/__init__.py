@@ -1,4 +1,7 @@
+from typing import Optional
+
 from fastapi import FastAPI
+from fastapi.routing import APIRoute
 
 from .counter import counter_collection
 
@@ -16,3 +19,19 @@ def register_collections(app: FastAPI) -> list[dict]:
     """
 
     return [description for collection in ENDPOINT_COLLECTIONS if (description := collection.register(app))]
+
+
+def get_route(collection: str, endpoint: str) -> Optional[APIRoute]:
+    """
+    Find the route of an endpoint
+
+    :param collection: name of the endpoint collection
+    :param endpoint: name of the endpoint
+    :return: the route or None if the endpoint does not exist or is disabled
+    """
+
+    for endpoint_collection in ENDPOINT_COLLECTIONS:
+        if endpoint_collection.name == collection:
+            return endpoint_collection.get_route(endpoint)
+
+    return None
@@ -1,11 +1,14 @@
 from typing import Optional
 
 from ..database import db
+from ..database.database import select
 from ..endpoint_collection import EndpointCollection, get_user
 from ..exceptions.counter import CounterNotFoundException, WrongPasswordException
+from ..exceptions.pagination import InvalidCursorException
 from ..models.counter import Counter
-from ..schemas.counter import ValueResponse, ValueChangedResponse
+from ..schemas.counter import ValueResponse, ValueChangedResponse, CounterResponse
 from ..schemas.ok import OKResponse, ok_response
+from ..schemas.pagination import page_response, after_parameter, limit_parameter
 from ..utils import responses
 
 counter_collection = EndpointCollection("counter", "test endpoints", test=True)
@@ -38,6 +41,33 @@ async def get(user_id: str = get_user) -> dict:
     return {"value": counter.value}
 
 
+@counter_collection.endpoint("list", stream=True, responses=responses(list[CounterResponse]))
+async def list_counters():
+    """
+    Stream all counters
+
+    :return: the user ids and values of all counters, as json array or as ndjson
+    """
+
+    async for counter in await db.stream(select(Counter)):
+        yield {"user_id": counter.user_id, "value": counter.value}
+
+
+@counter_collection.endpoint("page", responses=responses(page_response(CounterResponse), InvalidCursorException))
+async def page(after: Optional[str] = after_parameter, limit: int = limit_parameter) -> dict:
+    """
+    Fetch a page of all counters, sorted by value in descending order
+
+    :param after: cursor of the previous page
+    :param limit: maximum number of counters per page
+    :return: the user ids and values of the counters and the cursor of the next page
+    """
+
+    counters, cursor = await db.paginate(select(Counter), order_by=[Counter.value.desc()], after=after, limit=limit)
+
+    return {"items": [{"user_id": counter.user_id, "value": counter.value} for counter in counters], "next": cursor}
+
+
 @counter_collection.endpoint(responses=responses(ValueChangedResponse))
 async def increment(user_id: str = get_user) -> dict:
     """
@@ -47,14 +77,9 @@ async def increment(user_id: str = get_user) -> dict:
     :return: the old and the new counter value
     """
 
-    if counter := await db.get(Counter, user_id=user_id):
-        old = counter.value
-        counter.value += 1
-    else:
-        old = None
-        counter = await db.add(Counter(user_id=user_id, value=1))
+    old, new = await db.increment(Counter, "value", coalesce=True, user_id=user_id)
 
-    return {"old": old, "new": counter.value}
+    return {"old": old, "new": new}
 
 
 @counter_collection.endpoint("reset", responses=responses(OKResponse, CounterNotFoundException))
@@ -89,11 +114,6 @@ async def set_value(password: str, value: int, user_id: str = get_user) -> dict:
     if password != "S3cr3t":  # noqa: S105
         raise WrongPasswordException
 
-    if counter := await db.get(Counter, user_id=user_id):
-        old = counter.value
-        counter.value = value
-    else:
-        old = None
-        counter = await db.add(Counter(user_id=user_id, value=value))
+    old, new = await db.upsert(Counter, "value", value, user_id=user_id)
 
-    return {"old": old, "new": counter.value}
+    return {"old": old, "new": new}
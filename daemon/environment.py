@@ -18,7 +18,10 @@ LOG_LEVEL: str = getenv("LOG_LEVEL", "INFO")
 HOST = getenv("HOST", "0.0.0.0")  # noqa: S104
 PORT = int(getenv("PORT", "8000"))
 RELOAD = get_bool("RELOAD", False)
+WORKERS = int(getenv("WORKERS", "1"))
+SHUTDOWN_TIMEOUT = int(getenv("SHUTDOWN_TIMEOUT", "30"))  # seconds
 DEBUG = get_bool("DEBUG", False)
+OPENAPI_FILE = getenv("OPENAPI_FILE")  # openapi schema generated at build time
 
 API_TOKEN = getenv("API_TOKEN")
 
@@ -29,15 +32,30 @@ DB_PORT: int = int(getenv("SQL_PORT", "5432"))
 DB_DATABASE: str = getenv("SQL_DATABASE", "cryptic")
 DB_USERNAME: str = getenv("SQL_USERNAME", "cryptic")
 DB_PASSWORD: str = getenv("SQL_PASSWORD", "cryptic")
+DB_REPLICAS: str = getenv("SQL_REPLICAS", "")  # comma separated urls
+DB_REPLICA_STRATEGY: str = getenv("SQL_REPLICA_STRATEGY", "round_robin")
 POOL_RECYCLE: int = int(getenv("POOL_RECYCLE", "300"))
 POOL_SIZE: int = int(getenv("POOL_SIZE", "20"))
 MAX_OVERFLOW: int = int(getenv("MAX_OVERFLOW", "20"))
+POOL_LOG_INTERVAL: int = int(getenv("POOL_LOG_INTERVAL", "60"))  # seconds
+POOL_WARMUP: int = int(getenv("POOL_WARMUP", "0"))  # connections opened on startup
+POOL_WARMUP_STATEMENTS: bool = get_bool("POOL_WARMUP_STATEMENTS", False)
 SQL_SHOW_STATEMENTS: bool = get_bool("SQL_SHOW_STATEMENTS", False)
 SQL_CREATE_TABLES: bool = get_bool("SQL_CREATE_TABLES", False)
+SQL_STMT_CACHE_SIZE: int = int(getenv("SQL_STMT_CACHE_SIZE", "100"))
+SQL_STMT_CACHE_LIFETIME: int = int(getenv("SQL_STMT_CACHE_LIFETIME", "300"))  # seconds
+SQL_PGBOUNCER: bool = get_bool("SQL_PGBOUNCER", False)
+SQL_SINGLE_FLIGHT: bool = get_bool("SQL_SINGLE_FLIGHT", False)
+SQL_REPEAT_THRESHOLD: int = int(getenv("SQL_REPEAT_THRESHOLD", "20"))
+SQL_REPEAT_STRICT: bool = get_bool("SQL_REPEAT_STRICT", False)
+SQL_SLOW_QUERY_MS: int = int(getenv("SQL_SLOW_QUERY_MS", "500"))
+SQL_EXPLAIN_RATE: float = float(getenv("SQL_EXPLAIN_RATE", "0.0"))
+WRITE_COALESCING_WINDOW: int = int(getenv("WRITE_COALESCING_WINDOW", "0"))  # milliseconds
 
 # redis configuration
 REDIS_HOST = getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(getenv("REDIS_PORT", "6379"))
 REDIS_DB = int(getenv("REDIS_DB", "0"))
+REDIS_CACHE: bool = get_bool("REDIS_CACHE", False)
 
 SENTRY_DSN: str = getenv("SENTRY_DSN")  # sentry data source name
@@ -1,4 +1,6 @@
-from starlette.responses import JSONResponse
+from starlette.responses import Response
+
+from ..responses import FastJSONResponse, dumps
 
 
 class APIException(Exception):
@@ -8,6 +10,15 @@ class APIException(Exception):
     error: str
     description: str
 
+    # pre-serialized error message of exceptions without additional details
+    body: bytes
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        if hasattr(cls, "error"):
+            cls.body = dumps({"error": cls.error})
+
     def __init__(self, **kwargs):
         """
         :param status_code: http status code
@@ -24,7 +35,10 @@ class APIException(Exception):
 
         return {**self._kwargs, "error": self.error}
 
-    def make_response(self) -> JSONResponse:
-        """Create a JSONResponse object from this exception containing an error message as specified in the protocol"""
+    def make_response(self) -> Response:
+        """Create a response object from this exception containing an error message as specified in the protocol"""
+
+        if not self._kwargs:
+            return Response(self.body, self.status_code, media_type="application/json")
 
-        return JSONResponse(self.make_dict(), status_code=self.status_code)
+        return FastJSONResponse(self.make_dict(), status_code=self.status_code)
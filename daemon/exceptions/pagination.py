@@ -0,0 +1,9 @@
+from starlette import status
+
+from .api_exception import APIException
+
+
+class InvalidCursorException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    error = "invalid_cursor"
+    description = "The cursor is malformed or belongs to a different listing."
@@ -1,12 +1,7 @@
 import logging
 import sys
 
-import sentry_sdk
 from fastapi import FastAPI
-from sentry_sdk.integrations.aiohttp import AioHttpIntegration
-from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
-from sentry_sdk.integrations.logging import LoggingIntegration, ignore_logger
-from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
 from uvicorn.config import LOGGING_CONFIG
 from uvicorn.logging import DefaultFormatter
 
@@ -16,6 +11,13 @@ from .environment import LOG_LEVEL
 def setup_sentry(app: FastAPI, dsn: str, name: str, version: str):
     """Initialize sentry connection."""
 
+    # sentry and its integrations (which pull in aiohttp) take long to import, so they are only loaded if configured
+    import sentry_sdk
+    from sentry_sdk.integrations.aiohttp import AioHttpIntegration
+    from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
+    from sentry_sdk.integrations.logging import LoggingIntegration, ignore_logger
+    from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
+
     sentry_sdk.init(
         dsn=dsn,
         attach_stacktrace=True,
@@ -1,10 +1,15 @@
+import argparse
 import sys
+from socket import socket
+from typing import Optional
 
 import uvicorn
 
-from .daemon import app
-from .environment import SENTRY_DSN, API_TOKEN, DEBUG, HOST, PORT, RELOAD
+from .drain import DrainingServer
+from .environment import SENTRY_DSN, API_TOKEN, DEBUG, HOST, PORT, RELOAD, WORKERS, SHUTDOWN_TIMEOUT
 from .logger import get_logger, setup_sentry
+from .startup_profile import profile_startup, format_report
+from .supervisor import Supervisor
 
 logger = get_logger(__name__)
 
@@ -22,17 +27,67 @@ def check_api_token():
         sys.exit(1)
 
 
+def init_sentry():
+    """Initialize the sentry connection if a data source name is specified"""
+
+    if SENTRY_DSN:
+        # the app is only imported here, as uvicorn imports it by name (in each worker process)
+        from .daemon import app
+
+        setup_sentry(app, SENTRY_DSN, "python-daemon", "0.1.0")
+
+
+def run_worker(config: uvicorn.Config, sock: socket):
+    """
+    Run the uvicorn http server in a worker process
+
+    :param config: the uvicorn config
+    :param sock: the listening socket shared by all workers
+    """
+
+    init_sentry()
+    DrainingServer(config, SHUTDOWN_TIMEOUT).run(sockets=[sock])
+
+
 def run_daemon():
     """Run the uvicorn http server"""
 
-    uvicorn.run("daemon.daemon:app", host=HOST, port=PORT, reload=RELOAD)
+    if RELOAD:
+        uvicorn.run("daemon.daemon:app", host=HOST, port=PORT, reload=RELOAD)
+        return
 
+    config = uvicorn.Config("daemon.daemon:app", host=HOST, port=PORT)
+    if WORKERS <= 1:
+        DrainingServer(config, SHUTDOWN_TIMEOUT).run()
+        return
+
+    Supervisor(config, run_worker, WORKERS).run()
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line arguments of the daemon
+
+    :param argv: the arguments (defaults to sys.argv)
+    :return: the parsed arguments
+    """
 
-def main():
+    parser = argparse.ArgumentParser(prog="daemon", description="The official Python Daemon of Cryptic")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print the time of each startup phase and the slowest imports instead of running the daemon",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None):
     """Main function of the Python Daemon"""
 
-    if SENTRY_DSN:
-        setup_sentry(app, SENTRY_DSN, "python-daemon", "0.1.0")
+    if parse_args(argv).profile_startup:
+        print(format_report(*profile_startup()))  # noqa: T001
+        return
 
+    init_sentry()
     check_api_token()
     run_daemon()
@@ -0,0 +1,224 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Iterator, Optional
+
+from fastapi import Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from starlette.exceptions import HTTPException
+
+from .exceptions.api_exception import APIException
+from .utils import make_error
+
+# upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# path of the endpoint which is handled by the current task, to attribute database statements to it
+current_endpoint: ContextVar[Optional[str]] = ContextVar("current_endpoint", default=None)
+
+
+def get_error(exception: BaseException) -> str:
+    """
+    Get the error code of an exception as it is sent in the response
+
+    :param exception: the exception raised by an endpoint
+    :return: the error code
+    """
+
+    if isinstance(exception, APIException):
+        return exception.error
+    if isinstance(exception, HTTPException):
+        return make_error(exception.status_code)["error"]
+    if isinstance(exception, RequestValidationError):
+        return make_error(status.HTTP_422_UNPROCESSABLE_ENTITY)["error"]
+
+    return make_error(status.HTTP_500_INTERNAL_SERVER_ERROR)["error"]
+
+
+def escape(value: str) -> str:
+    """Escape a label value for the prometheus text format"""
+
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Histogram with fixed buckets"""
+
+    __slots__ = ("_bounds", "_counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        """
+        :param bounds: the sorted upper bounds of the buckets
+        """
+
+        self._bounds: tuple[float, ...] = bounds
+        self._counts: list[int] = [0] * (len(bounds) + 1)
+        self.sum: float = 0
+
+    def observe(self, value: float):
+        """
+        Record a value
+
+        :param value: the value to record
+        """
+
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        """The number of recorded values"""
+
+        return sum(self._counts)
+
+    def buckets(self) -> Iterator[tuple[str, int]]:
+        """
+        Get the cumulative bucket counts
+
+        :return: an iterator over the upper bounds and the number of values less than or equal to them
+        """
+
+        total = 0
+        for bound, count in zip([*map(str, self._bounds), "+Inf"], self._counts):
+            total += count
+            yield bound, total
+
+
+def render_histogram(name: str, labels: str, histogram: Histogram) -> list[str]:
+    """
+    Export a histogram
+
+    :param name: name of the metric
+    :param labels: the formatted labels of the histogram (may be empty)
+    :param histogram: the histogram
+    :return: the lines of the histogram in the prometheus text format
+    """
+
+    prefix, suffix = (f"{labels},", f"{{{labels}}}") if labels else ("", "")
+    lines = [f'{name}_bucket{{{prefix}le="{bound}"}} {count}' for bound, count in histogram.buckets()]
+    lines.append(f"{name}_sum{suffix} {histogram.sum}")
+    lines.append(f"{name}_count{suffix} {histogram.count}")
+    return lines
+
+
+class EndpointMetrics:
+    """Request metrics of a single endpoint"""
+
+    __slots__ = ("requests", "errors", "in_flight", "latency")
+
+    def __init__(self):
+        self.requests: int = 0
+        self.errors: dict[str, int] = {}
+        self.in_flight: int = 0
+        self.latency: Histogram = Histogram(LATENCY_BUCKETS)
+
+    def track(self) -> "Tracker":
+        """Create a context manager which records a single request"""
+
+        return Tracker(self)
+
+
+class Tracker:
+    """Context manager which records the duration and the outcome of a request"""
+
+    __slots__ = ("_metrics", "_start")
+
+    def __init__(self, metrics: EndpointMetrics):
+        self._metrics: EndpointMetrics = metrics
+        self._start: float = 0
+
+    def __enter__(self):
+        self._metrics.in_flight += 1
+        self._start = perf_counter()
+
+    def __exit__(self, _, exception, __):
+        metrics = self._metrics
+        metrics.latency.observe(perf_counter() - self._start)
+        metrics.in_flight -= 1
+        metrics.requests += 1
+        if exception is not None:
+            error = get_error(exception)
+            metrics.errors[error] = metrics.errors.get(error, 0) + 1
+
+
+class Metrics:
+    """Registry of the request metrics of all endpoints and of additional metric sources"""
+
+    def __init__(self):
+        self._endpoints: dict[str, EndpointMetrics] = {}
+        self._collectors: list[Callable[[], list[str]]] = []
+
+    def register(self, collector: Callable[[], list[str]]):
+        """
+        Register an additional source of metrics
+
+        :param collector: function which returns metrics in the prometheus text format
+        """
+
+        self._collectors.append(collector)
+
+    def get(self, endpoint: str) -> EndpointMetrics:
+        """
+        Get the metrics of an endpoint
+
+        :param endpoint: path of the endpoint
+        :return: the endpoint metrics
+        """
+
+        if (metrics := self._endpoints.get(endpoint)) is None:
+            metrics = self._endpoints[endpoint] = EndpointMetrics()
+
+        return metrics
+
+    def render(self) -> str:
+        """
+        Export all metrics
+
+        :return: the metrics in the prometheus text format
+        """
+
+        endpoints = sorted(self._endpoints.items())
+        lines = [
+            "# HELP daemon_requests_total Number of handled endpoint requests.",
+            "# TYPE daemon_requests_total counter",
+            *(f'daemon_requests_total{{endpoint="{escape(name)}"}} {m.requests}' for name, m in endpoints),
+            "# HELP daemon_errors_total Number of endpoint requests which failed, by error code.",
+            "# TYPE daemon_errors_total counter",
+            *(
+                f'daemon_errors_total{{endpoint="{escape(name)}",error="{escape(error)}"}} {count}'
+                for name, m in endpoints
+                for error, count in sorted(m.errors.items())
+            ),
+            "# HELP daemon_requests_in_flight Number of endpoint requests currently being handled.",
+            "# TYPE daemon_requests_in_flight gauge",
+            *(f'daemon_requests_in_flight{{endpoint="{escape(name)}"}} {m.in_flight}' for name, m in endpoints),
+            "# HELP daemon_request_duration_seconds Latency of endpoint requests.",
+            "# TYPE daemon_request_duration_seconds histogram",
+        ]
+
+        for name, m in endpoints:
+            lines += render_histogram("daemon_request_duration_seconds", f'endpoint="{escape(name)}"', m.latency)
+
+        for collector in self._collectors:
+            lines += collector()
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsRoute(APIRoute):
+    """Route which records request metrics of its endpoint"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        path = self.path
+
+        async def route_handler(request: Request):
+            with metrics.get(path).track():
+                return await handler(request)
+
+        return route_handler
+
+
+# global metrics registry
+metrics = Metrics()
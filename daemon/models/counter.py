@@ -9,6 +9,7 @@ class Counter(db.Base):
     """Counter table"""
 
     __tablename__ = "counter"
+    __cache_ttl__ = 60
 
     user_id: Union[Column, str] = Column(String(36), primary_key=True, unique=True)
-    value: Union[Column, int] = Column(Integer)
+    value: Union[Column, int] = Column(Integer, nullable=False)
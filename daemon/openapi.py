@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+from hashlib import sha256
+from typing import Optional
+
+from fastapi import FastAPI, Request, status
+from fastapi.routing import APIRoute
+from starlette.responses import Response
+from starlette.routing import Route
+
+from .logger import get_logger
+from .responses import dumps
+
+logger = get_logger(__name__)
+
+
+def get_paths(app: FastAPI) -> set[str]:
+    """Get the paths of all routes which are documented in the openapi schema."""
+
+    return {route.path for route in app.routes if isinstance(route, APIRoute) and route.include_in_schema}
+
+
+def load_schema(app: FastAPI, path: Optional[str]) -> dict:
+    """
+    Load the openapi schema generated at build time or generate it now
+
+    The schema is also stored in the app, so :meth:`FastAPI.openapi` does not generate it again.
+
+    :param app: the FastAPI app
+    :param path: path of the pre-generated schema (ignored if the file does not exist)
+    :return: the openapi schema
+    """
+
+    schema = None
+    if path and os.path.isfile(path):
+        with open(path, "rb") as file:
+            schema = json.load(file)
+
+        # the schema depends on the configuration (e.g. test endpoints are only enabled in debug mode)
+        if set(schema.get("paths", {})) != get_paths(app):
+            logger.warning(f"openapi schema in {path} does not match the endpoints, generating a new one")
+            schema = None
+
+    app.openapi_schema = schema
+    return app.openapi()
+
+
+class OpenAPIDocument:
+    """Openapi schema which is encoded once and served with an ETag"""
+
+    def __init__(self, schema: dict):
+        """
+        :param schema: the openapi schema
+        """
+
+        self.body: bytes = dumps(schema)
+        self.etag: str = f'"{sha256(self.body).hexdigest()}"'
+
+    def is_fresh(self, request: Request) -> bool:
+        """
+        Check whether the client already has the current version of the schema
+
+        :param request: the request
+        :return: whether the If-None-Match header contains the ETag of the schema
+        """
+
+        header = request.headers.get("if-none-match", "")
+        return any(tag.strip().removeprefix("W/") in (self.etag, "*") for tag in header.split(","))
+
+    async def endpoint(self, request: Request) -> Response:
+        if self.is_fresh(request):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"etag": self.etag})
+
+        return Response(self.body, media_type="application/json", headers={"etag": self.etag})
+
+
+def setup_openapi(app: FastAPI, path: Optional[str] = None) -> OpenAPIDocument:
+    """
+    Serve the openapi schema as pre-encoded bytes instead of encoding it on every request
+
+    :param app: the FastAPI app
+    :param path: path of the schema generated at build time (the schema is generated now if it does not exist)
+    :return: the served document
+    """
+
+    document = OpenAPIDocument(load_schema(app, path))
+    routes = app.router.routes
+    for i, route in enumerate(routes):
+        if isinstance(route, Route) and route.path == app.openapi_url:
+            routes[i] = Route(app.openapi_url, document.endpoint, include_in_schema=False)
+
+    return document
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line arguments of the openapi script
+
+    :param argv: the arguments (defaults to sys.argv)
+    :return: the parsed arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="python -m daemon.openapi",
+        description="Generate the openapi schema, so it does not have to be generated on startup",
+    )
+    parser.add_argument("path", nargs="?", default="openapi.json", help="the file to write the schema to")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None):
+    """Write the openapi schema to a file."""
+
+    args = parse_args(argv)
+
+    # the app imports this module
+    from .daemon import app
+
+    with open(args.path, "wb") as file:
+        file.write(dumps(app.openapi()))
+
+
+if __name__ == "__main__":
+    main()
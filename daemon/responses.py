@@ -0,0 +1,77 @@
+import json
+from math import isfinite
+from typing import Any, Callable
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def dumps_stdlib(content: Any) -> bytes:
+    """
+    Serialize content using the json module exactly like starlette's JSONResponse
+
+    :param content: the json compatible content
+    :return: the utf-8 encoded json
+    """
+
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def has_non_finite_float(content: Any) -> bool:
+    """
+    Check whether json compatible content contains infinite or nan floats
+
+    :param content: the json compatible content
+    :return: True if there is an infinite or nan float
+    """
+
+    if isinstance(content, float):
+        return not isfinite(content)
+    if isinstance(content, dict):
+        content = content.values()
+    elif not isinstance(content, (list, tuple)):
+        return False
+
+    return any(has_non_finite_float(item) for item in content)
+
+
+def dumps_orjson(content: Any) -> bytes:
+    """
+    Serialize content using orjson
+
+    The output is equivalent to :func:`dumps_stdlib`, but not always byte for byte identical,
+    as floats in exponent notation are formatted differently (e.g. ``1e16`` instead of ``1e+16``).
+    Content orjson cannot serialize (e.g. integers exceeding 64 bits) is passed to :func:`dumps_stdlib`,
+    and so is content with infinite or nan floats (which orjson would serialize as null), so that it is rejected.
+
+    :param content: the json compatible content
+    :return: the utf-8 encoded json
+    """
+
+    try:
+        result = orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return dumps_stdlib(content)
+
+    # non-finite floats are serialized as null, so the content only has to be checked if there is a null
+    if b"null" in result and has_non_finite_float(content):
+        return dumps_stdlib(content)
+
+    return result
+
+
+# the fastest available serializer
+dumps: Callable[[Any], bytes] = dumps_stdlib if orjson is None else dumps_orjson
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse which uses the fastest available serializer"""
+
+    serializer: Callable[[Any], bytes] = staticmethod(dumps)
+
+    def render(self, content: Any) -> bytes:
+        return self.serializer(content)
@@ -9,6 +9,13 @@ class ValueResponse(BaseModel):
     Config = example(value=42)
 
 
+class CounterResponse(BaseModel):
+    user_id: str
+    value: int
+
+    Config = example(user_id="1e5b6a71-3c4e-4f4c-9a3e-5cb4a0a3b0a6", value=42)
+
+
 class ValueChangedResponse(BaseModel):
     old: int
     new: int
@@ -23,3 +23,15 @@ class EndpointCollectionModel(BaseModel):
         disabled=False,
         endpoints=[get_example(EndpointModel)],
     )
+
+
+class BatchItemModel(BaseModel):
+    collection: str
+    endpoint: str
+    body: dict = {}
+
+    Config = example(
+        collection="<endpoint collection id>",
+        endpoint="<endpoint id>",
+        body={"<parameter>": "<value>"},
+    )
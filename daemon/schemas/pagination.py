@@ -0,0 +1,31 @@
+from functools import lru_cache
+from typing import Optional, Type
+
+from fastapi import Body
+from pydantic import BaseModel, create_model
+
+from ..utils import example, get_example
+
+# maximum number of items per page
+MAX_PAGE_SIZE = 100
+
+# default parameters of paginated endpoints
+after_parameter = Body(None, description="cursor of the previous page")
+limit_parameter = Body(50, ge=1, le=MAX_PAGE_SIZE, description="maximum number of items per page")
+
+
+@lru_cache()
+def page_response(model: Type[BaseModel]) -> Type[BaseModel]:
+    """
+    Create the response schema for a page of items
+
+    :param model: the schema of the items
+    :return: the schema of the page containing the items and the cursor of the next page
+    """
+
+    return create_model(
+        f"{model.__name__}Page",
+        items=(list[model], ...),
+        next=(Optional[str], None),
+        __config__=example(items=[get_example(model)], next="<cursor of the next page>"),
+    )
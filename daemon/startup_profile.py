@@ -0,0 +1,114 @@
+import json
+import subprocess  # noqa: S404
+import sys
+from importlib import import_module
+from time import perf_counter
+from typing import Callable
+
+# number of imports listed in the report
+IMPORT_LIMIT = 25
+
+# measures the startup phases in a fresh interpreter and writes their durations to stdout as the last line
+PHASES_SCRIPT = "import json, daemon.startup_profile as p; print(json.dumps(p.measure_phases()))"
+
+
+def measure_phases() -> dict[str, float]:
+    """
+    Run the startup phases of a worker one after another (in a fresh interpreter)
+
+    :return: the number of seconds each phase took
+    """
+
+    phases: dict[str, float] = {}
+
+    def run(name: str, func: Callable[[], None]):
+        start = perf_counter()
+        func()
+        phases[name] = perf_counter() - start
+
+    def startup():
+        import asyncio
+        from .daemon import app
+
+        async def run_handlers():
+            await app.router.startup()
+            await app.router.shutdown()
+
+        asyncio.run(run_handlers())
+
+    def init_sentry():
+        from .main import init_sentry
+
+        init_sentry()
+
+    run("environment", lambda: import_module("daemon.environment"))
+    run("logging", lambda: import_module("daemon.logger"))
+    run("database", lambda: import_module("daemon.database"))
+    run("app", lambda: import_module("daemon.daemon"))
+    run("server", lambda: import_module("daemon.main"))
+    run("sentry", init_sentry)
+    run("startup", startup)
+    run("openapi", lambda: sys.modules["daemon.daemon"].app.openapi())
+
+    return phases
+
+
+def parse_import_times(output: str) -> list[tuple[str, float, float]]:
+    """
+    Parse the output of python -X importtime
+
+    :param output: the lines written to stderr
+    :return: the imported modules with the seconds spent in the module itself and in total
+    """
+
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+
+        own, total, name = line.removeprefix("import time:").split("|")
+        imports.append((name.strip(), int(own) / 1e6, int(total) / 1e6))
+
+    return imports
+
+
+def profile_startup() -> tuple[dict[str, float], list[tuple[str, float, float]]]:
+    """
+    Measure the startup of a worker in a fresh interpreter, so no module has been imported yet
+
+    :return: the durations of the startup phases and of the imports
+    """
+
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", PHASES_SCRIPT],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode:
+        errors = [line for line in process.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError("startup failed:\n" + "\n".join(errors))
+
+    # log messages of the startup phases are also written to stdout
+    phases = json.loads(process.stdout.splitlines()[-1])
+    return phases, parse_import_times(process.stderr)
+
+
+def format_report(phases: dict[str, float], imports: list[tuple[str, float, float]], limit: int = IMPORT_LIMIT) -> str:
+    """
+    Format the startup profile
+
+    :param phases: the durations of the startup phases
+    :param imports: the durations of the imports
+    :param limit: number of imports to list
+    :return: the phases in order and the slowest imports by cumulative time
+    """
+
+    lines = ["startup phase                  time [ms]"]
+    lines += [f"{name:<28} {seconds * 1000:>11.1f}" for name, seconds in phases.items()]
+    lines.append(f"{'total':<28} {sum(phases.values()) * 1000:>11.1f}")
+
+    lines += ["", "self [ms]  cumulative [ms]  import"]
+    for name, own, total in sorted(imports, key=lambda x: x[2], reverse=True)[:limit]:
+        lines.append(f"{own * 1000:>9.1f}  {total * 1000:>15.1f}  {name}")
+
+    return "\n".join(lines)
@@ -0,0 +1,159 @@
+from functools import wraps
+from inspect import isasyncgen
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Optional
+
+from starlette.responses import StreamingResponse
+from starlette.types import Scope, Receive, Send
+
+from .database import db
+from .exceptions.api_exception import APIException
+from .logger import get_logger
+from .metrics import get_error
+from .responses import dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# number of bytes which are collected before they are sent
+CHUNK_SIZE = 16 * 1024
+
+logger = get_logger(__name__)
+
+
+def accepts_ndjson(scope: Scope) -> bool:
+    """
+    Check whether a client accepts newline delimited json
+
+    :param scope: the asgi scope of the request
+    :return: whether the accept header contains application/x-ndjson
+    """
+
+    for name, value in scope["headers"]:
+        if name == b"accept":
+            return NDJSON_MEDIA_TYPE.encode() in value
+
+    return False
+
+
+async def encode(items: AsyncIterable, ndjson: bool) -> AsyncIterator[bytes]:
+    """
+    Encode the items of an async iterable as they arrive
+
+    An exception raised by the iterable is logged and its error message is sent as the last item,
+    as the status code has already been sent.
+
+    :param items: the json compatible items
+    :param ndjson: whether to encode the items as newline delimited json instead of a json array
+    :return: async iterator of chunks of at least CHUNK_SIZE bytes (except for the last one)
+    """
+
+    buffer = bytearray() if ndjson else bytearray(b"[")
+    empty = True
+
+    def append(item):
+        nonlocal empty
+
+        if not (ndjson or empty):
+            buffer.extend(b",")
+        buffer.extend(dumps(item))
+        if ndjson:
+            buffer.extend(b"\n")
+        empty = False
+
+    try:
+        async for item in items:
+            append(item)
+            if len(buffer) >= CHUNK_SIZE:
+                yield bytes(buffer)
+                buffer.clear()
+    except Exception as exception:  # noqa: B902
+        logger.exception("exception in streaming response", exc_info=exception)
+        append(exception.make_dict() if isinstance(exception, APIException) else {"error": get_error(exception)})
+
+    if not ndjson:
+        buffer.extend(b"]")
+
+    yield bytes(buffer)
+
+
+class StreamingJSONResponse(StreamingResponse):
+    """
+    Response which encodes the items of an async iterable while they are sent
+
+    The items are sent as newline delimited json if the client accepts application/x-ndjson
+    and as a json array otherwise.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, items: AsyncIterable, on_close: Optional[Callable[[], Awaitable]] = None):
+        """
+        :param items: the json compatible items
+        :param on_close: coroutine function to call after the response has been sent or the client has disconnected
+        """
+
+        super().__init__(items)
+
+        self.items: AsyncIterable = items
+        self._on_close: Optional[Callable[[], Awaitable]] = on_close
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        ndjson = accepts_ndjson(scope)
+        if ndjson:
+            self.headers["content-type"] = NDJSON_MEDIA_TYPE
+
+        self.body_iterator = encode(self.items, ndjson)
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self._on_close is not None:
+                await self._on_close()
+
+
+async def prefetch(items: AsyncIterable) -> AsyncIterator:
+    """
+    Fetch the first item of an async iterable immediately
+
+    :param items: the async iterable
+    :return: async iterator over all items
+    """
+
+    iterator = items.__aiter__()
+    try:
+        first = await iterator.__anext__()
+    except StopAsyncIteration:
+        return iterator
+
+    async def chain():
+        yield first
+        async for item in iterator:
+            yield item
+
+    return chain()
+
+
+async def close_session():
+    """Commit and close the database session of a streaming response."""
+
+    await db.commit()
+    await db.close()
+
+
+def stream_endpoint(func):
+    """
+    Decorator for endpoints which return (or are) an async iterator, so its items are streamed to the client
+
+    The first item is fetched before the response is started, so exceptions raised until then
+    are handled by the exception handlers. The database session stays open until the response has been sent.
+    """
+
+    @wraps(func)
+    async def inner(*args, **kwargs) -> StreamingJSONResponse:
+        items = func(*args, **kwargs)
+        if not isasyncgen(items):
+            items = await items
+
+        items = await prefetch(items)
+        db.streaming = True
+        return StreamingJSONResponse(items, on_close=close_session)
+
+    return inner
@@ -0,0 +1,126 @@
+import multiprocessing
+import signal
+from multiprocessing.context import SpawnProcess
+from socket import socket, AF_INET, AF_INET6, SOCK_STREAM, IPPROTO_TCP, SOL_SOCKET, SO_REUSEADDR
+from threading import Event
+from typing import Callable
+
+from uvicorn import Config
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def bind_socket(host: str, port: int) -> socket:
+    """
+    Create the listening socket shared by all workers
+
+    The protocol is passed explicitly, as asyncio only enables TCP_NODELAY on accepted sockets whose protocol
+    is IPPROTO_TCP and accepted sockets inherit it from the listening socket. Otherwise small responses
+    are delayed by Nagle's algorithm and delayed acks (about 40 ms per request).
+
+    :param host: the host to listen on
+    :param port: the port to listen on
+    :return: the bound socket
+    """
+
+    sock = socket(AF_INET6 if ":" in host else AF_INET, SOCK_STREAM, IPPROTO_TCP)
+    sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    logger.info(f"listening on {host}:{sock.getsockname()[1]}")
+    return sock
+
+
+class Supervisor:
+    """Runs the http server in multiple worker processes and restarts workers which have exited"""
+
+    def __init__(self, config: Config, target: Callable[[Config, socket], None], workers: int):
+        """
+        :param config: the uvicorn config
+        :param target: the function which runs the server in a worker process
+        :param workers: the number of worker processes
+        """
+
+        self._config: Config = config
+        self._target: Callable[[Config, socket], None] = target
+        self._workers: int = workers
+        self._processes: list[SpawnProcess] = []
+        self._should_exit: Event = Event()
+        self._should_restart: Event = Event()
+
+    def _start_worker(self, sock: socket) -> SpawnProcess:
+        """
+        Start a new worker process
+
+        :param sock: the listening socket shared by all workers
+        :return: the worker process
+        """
+
+        # spawn instead of fork so that workers do not inherit the state of the supervisor
+        process = multiprocessing.get_context("spawn").Process(target=self._target, args=(self._config, sock))
+        process.start()
+        logger.info(f"started worker process [{process.pid}]")
+        return process
+
+    def _stop_worker(self, process: SpawnProcess):
+        """
+        Gracefully stop a worker process and wait until it has exited
+
+        :param process: the worker process
+        """
+
+        process.terminate()
+        process.join()
+        logger.info(f"stopped worker process [{process.pid}]")
+
+    def _restart_workers(self, sock: socket):
+        """
+        Replace the worker processes one by one so that there are always workers accepting requests
+
+        :param sock: the listening socket shared by all workers
+        """
+
+        for i, process in enumerate(self._processes):
+            self._processes[i] = self._start_worker(sock)
+            self._stop_worker(process)
+
+    def handle_exit(self, *_):
+        """Signal handler which stops all workers."""
+
+        self._should_exit.set()
+
+    def handle_restart(self, *_):
+        """Signal handler which gracefully restarts all workers."""
+
+        self._should_restart.set()
+
+    def run(self):
+        """Start the worker processes and supervise them until the supervisor is stopped."""
+
+        signal.signal(signal.SIGINT, self.handle_exit)
+        signal.signal(signal.SIGTERM, self.handle_exit)
+        signal.signal(signal.SIGHUP, self.handle_restart)
+
+        sock = bind_socket(self._config.host, self._config.port)
+        logger.info(f"starting {self._workers} worker processes")
+        self._processes = [self._start_worker(sock) for _ in range(self._workers)]
+
+        while not self._should_exit.wait(1):
+            if self._should_restart.is_set():
+                self._should_restart.clear()
+                logger.info("restarting worker processes")
+                self._restart_workers(sock)
+
+            for i, process in enumerate(self._processes):
+                if not process.is_alive():
+                    logger.warning(f"worker process [{process.pid}] exited with code {process.exitcode}")
+                    self._processes[i] = self._start_worker(sock)
+
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            process.join()
+
+        sock.close()
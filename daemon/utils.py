@@ -1,12 +1,27 @@
+import json
+from functools import lru_cache
+from http import HTTPStatus
 from typing import Type, Union
 
+from fastapi.exceptions import HTTPException
 from pydantic import BaseModel
-from uvicorn.protocols.http.h11_impl import STATUS_PHRASES
 
 from .exceptions.api_exception import APIException
 
 
 def responses(default: Type[Union[BaseModel, list]], *args: Type[APIException]) -> dict:
+    return error_responses(args) | {200: {"model": default}}
+
+
+@lru_cache(maxsize=None)
+def error_responses(args: tuple[Type[APIException], ...]) -> dict:
+    """
+    Document the error responses of a set of exceptions (memoized, as many endpoints share the same exceptions)
+
+    :param args: the exceptions raised by an endpoint
+    :return: the responses by status code (must not be modified)
+    """
+
     exceptions: dict[int, list[Type[APIException]]] = {}
     for exc in args:
         exceptions.setdefault(exc.status_code, []).append(exc)
@@ -16,14 +31,27 @@ def responses(default: Type[Union[BaseModel, list]], *args: Type[APIException])
         examples = {}
         for i, exc in enumerate(excs):
             name = exc.__name__ if len(excs) == 1 else f"{exc.__name__} ({i + 1}/{len(excs)})"
-            examples[name] = {"description": exc.description, "value": exc().make_dict()}
+            examples[name] = {"description": exc.description, "value": json.loads(exc.body)}
 
         out[code] = {
-            "description": STATUS_PHRASES[code],
+            "description": HTTPStatus(code).phrase,
             "content": {"application/json": {"examples": examples}},
         }
 
-    return out | {200: {"model": default}}
+    return out
+
+
+def make_error(status_code: int, **kwargs) -> dict:
+    """
+    Create an error message for a http status code as specified in the protocol
+
+    :param status_code: the http status code
+    :param kwargs: any additional parameters
+    :return: the error message
+    """
+
+    detail = HTTPException(status_code).detail
+    return {**kwargs, "error": f"{status_code} {detail}"}
 
 
 def get_example(arg: type) -> dict:
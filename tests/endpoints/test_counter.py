@@ -1,18 +1,27 @@
 from unittest import IsolatedAsyncioTestCase
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, ANY
 
 from daemon.endpoint_collection import get_user
 from daemon.endpoints import counter
 from daemon.exceptions.counter import CounterNotFoundException, WrongPasswordException
+from daemon.exceptions.pagination import InvalidCursorException
 from daemon.models.counter import Counter
-from daemon.schemas.counter import ValueResponse, ValueChangedResponse
+from daemon.schemas.counter import ValueResponse, ValueChangedResponse, CounterResponse
 from daemon.schemas.ok import OKResponse
+from daemon.schemas.pagination import page_response, after_parameter, limit_parameter
 from daemon.utils import responses
 from tests._utils import Endpoint, test_endpoint_collection, AsyncMock
 
 ENDPOINTS: list[Endpoint] = [
     Endpoint("exception", "exception", [], {}),
     Endpoint("get", "get", [get_user], {"responses": responses(ValueResponse, CounterNotFoundException)}),
+    Endpoint("list", "list_counters", [], {"stream": True, "responses": responses(list[CounterResponse])}),
+    Endpoint(
+        "page",
+        "page",
+        [after_parameter, limit_parameter],
+        {"responses": responses(page_response(CounterResponse), InvalidCursorException)},
+    ),
     Endpoint("increment", "increment", [get_user], {"responses": responses(ValueChangedResponse)}),
     Endpoint("reset", "magic", [get_user], {"responses": responses(OKResponse, CounterNotFoundException)}),
     Endpoint("set", "set_value", [get_user], {"responses": responses(ValueChangedResponse, WrongPasswordException)}),
@@ -48,32 +57,51 @@ class TestCounterEndpoints(IsolatedAsyncioTestCase):
         db_patch.get.assert_called_once_with(Counter, user_id=user_id)
         self.assertEqual({"value": mock.value}, result)
 
-    @patch("daemon.endpoints.counter.Counter")
+    @patch("daemon.endpoints.counter.select")
     @patch("daemon.endpoints.counter.db")
-    async def test__increment__not_found(self, db_patch: MagicMock, counter_patch: MagicMock):
-        user_id = MagicMock()
-        mock = MagicMock()
-        db_patch.get = AsyncMock(return_value=None)
-        db_patch.add = AsyncMock(return_value=mock)
+    async def test__list_counters(self, db_patch: MagicMock, select_patch: MagicMock):
+        counters = [MagicMock(), MagicMock()]
 
-        result = await counter.increment(user_id)
+        async def stream():
+            for c in counters:
+                yield c
+
+        db_patch.stream = AsyncMock(return_value=stream())
+
+        result = [item async for item in counter.list_counters()]
 
-        db_patch.get.assert_called_once_with(counter_patch, user_id=user_id)
-        counter_patch.assert_called_once_with(user_id=user_id, value=1)
-        db_patch.add.assert_called_once_with(counter_patch())
-        self.assertEqual({"old": None, "new": mock.value}, result)
+        select_patch.assert_called_once_with(Counter)
+        db_patch.stream.assert_called_once_with(select_patch())
+        self.assertEqual([{"user_id": c.user_id, "value": c.value} for c in counters], result)
 
+    @patch("daemon.endpoints.counter.select")
     @patch("daemon.endpoints.counter.db")
-    async def test__increment__found(self, db_patch: MagicMock):
+    async def test__page(self, db_patch: MagicMock, select_patch: MagicMock):
+        counters = [MagicMock(), MagicMock()]
+        after, limit = MagicMock(), MagicMock()
+        db_patch.paginate = AsyncMock(return_value=(counters, cursor := MagicMock()))
+
+        result = await counter.page(after, limit)
+
+        select_patch.assert_called_once_with(Counter)
+        db_patch.paginate.assert_called_once_with(select_patch(), order_by=ANY, after=after, limit=limit)
+        (order_by,) = db_patch.paginate.call_args.kwargs["order_by"]
+        self.assertTrue(order_by.compare(Counter.value.desc()))
+        self.assertEqual(
+            {"items": [{"user_id": c.user_id, "value": c.value} for c in counters], "next": cursor},
+            result,
+        )
+
+    @patch("daemon.endpoints.counter.db")
+    async def test__increment(self, db_patch: MagicMock):
         user_id = MagicMock()
-        mock = MagicMock(value=42)
-        db_patch.get = AsyncMock(return_value=mock)
+        old, new = MagicMock(), MagicMock()
+        db_patch.increment = AsyncMock(return_value=(old, new))
 
         result = await counter.increment(user_id)
 
-        db_patch.get.assert_called_once_with(Counter, user_id=user_id)
-        self.assertEqual(43, mock.value)
-        self.assertEqual({"old": 42, "new": 43}, result)
+        db_patch.increment.assert_called_once_with(Counter, "value", coalesce=True, user_id=user_id)
+        self.assertEqual({"old": old, "new": new}, result)
 
     @patch("daemon.endpoints.counter.db")
     async def test__reset__not_found(self, db_patch: MagicMock):
@@ -102,32 +130,14 @@ class TestCounterEndpoints(IsolatedAsyncioTestCase):
         with self.assertRaises(WrongPasswordException):
             await counter.set_value("incorrect", ..., ...)
 
-    @patch("daemon.endpoints.counter.Counter")
     @patch("daemon.endpoints.counter.db")
-    async def test__set__not_found(self, db_patch: MagicMock, counter_patch: MagicMock):
+    async def test__set__successful(self, db_patch: MagicMock):
         user_id = MagicMock()
-        mock = MagicMock()
         value = MagicMock()
-        db_patch.get = AsyncMock(return_value=None)
-        db_patch.add = AsyncMock(return_value=mock)
-
-        result = await counter.set_value("S3cr3t", value, user_id)
-
-        db_patch.get.assert_called_once_with(counter_patch, user_id=user_id)
-        counter_patch.assert_called_once_with(user_id=user_id, value=value)
-        db_patch.add.assert_called_once_with(counter_patch())
-        self.assertEqual({"old": None, "new": mock.value}, result)
-
-    @patch("daemon.endpoints.counter.db")
-    async def test__set__found(self, db_patch: MagicMock):
-        user_id = MagicMock()
-        mock = MagicMock(value=42)
-        value = MagicMock()
-        old_value = mock.value
-        db_patch.get = AsyncMock(return_value=mock)
+        old, new = MagicMock(), MagicMock()
+        db_patch.upsert = AsyncMock(return_value=(old, new))
 
         result = await counter.set_value("S3cr3t", value, user_id)
 
-        db_patch.get.assert_called_once_with(Counter, user_id=user_id)
-        self.assertEqual(value, mock.value)
-        self.assertEqual({"old": old_value, "new": value}, result)
+        db_patch.upsert.assert_called_once_with(Counter, "value", value, user_id=user_id)
+        self.assertEqual({"old": old, "new": new}, result)
@@ -1,3 +1,4 @@
+import json
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
 
@@ -25,7 +26,7 @@ class TestApiException(TestCase):
 
         self.assertEqual({**exception._kwargs, "error": exception.error}, result)
 
-    @patch("daemon.exceptions.api_exception.JSONResponse")
+    @patch("daemon.exceptions.api_exception.FastJSONResponse")
     def test__make_response(self, json_response_patch: MagicMock):
         exception = MagicMock()
         exception._kwargs = mock_dict(3)
@@ -35,3 +36,27 @@ class TestApiException(TestCase):
         exception.make_dict.assert_called_once_with()
         json_response_patch.assert_called_once_with(exception.make_dict(), status_code=exception.status_code)
         self.assertEqual(json_response_patch(), result)
+
+    @patch("daemon.exceptions.api_exception.Response")
+    def test__make_response__cached(self, response_patch: MagicMock):
+        exception = MagicMock()
+        exception._kwargs = {}
+
+        result = APIException.make_response(exception)
+
+        exception.make_dict.assert_not_called()
+        response_patch.assert_called_once_with(exception.body, exception.status_code, media_type="application/json")
+        self.assertEqual(response_patch(), result)
+
+    def test__init_subclass(self):
+        class TestException(APIException):
+            status_code = 404
+            error = "not_found"
+
+        class Base(APIException):
+            pass
+
+        self.assertEqual(b'{"error":"not_found"}', TestException.body)
+        self.assertEqual(b'{"error":"not_found"}', TestException().make_response().body)
+        self.assertEqual(TestException().make_dict(), json.loads(TestException.body))
+        self.assertFalse(hasattr(Base, "body"))
@@ -1,79 +1,157 @@
 from unittest import IsolatedAsyncioTestCase
-from unittest.mock import MagicMock, patch, AsyncMock
+from unittest.mock import MagicMock, patch
 
-from fastapi import HTTPException
+from fastapi import Depends
+from fastapi.routing import APIRoute
+from starlette.routing import compile_path
 
-from daemon.authorization import HTTPAuthorization
+from daemon.authorization import HTTPAuthorization, AuthorizationMiddleware
+from tests._utils import AsyncMock
+
+
+def make_route(path: str, *dependencies) -> MagicMock:
+    path_regex, _, param_convertors = compile_path(path)
+    return MagicMock(
+        spec=APIRoute,
+        path=path,
+        path_regex=path_regex,
+        param_convertors=param_convertors,
+        dependencies=[Depends(dependency) for dependency in dependencies],
+    )
 
 
 class TestAuthorization(IsolatedAsyncioTestCase):
-    @patch("daemon.authorization.API_TOKEN")
     @patch("daemon.authorization.HTTPBearer")
-    async def test__constructor(self, httpbearer_patch: MagicMock, api_token_patch: MagicMock):
+    async def test__constructor(self, httpbearer_patch: MagicMock):
         authorization = HTTPAuthorization()
 
         httpbearer_patch.assert_called_once_with()
         self.assertEqual(httpbearer_patch(), authorization.model)
         self.assertEqual(authorization.__class__.__name__, authorization.scheme_name)
-        self.assertEqual(api_token_patch, authorization._token)
-
-    async def test__check_authorization__no_token(self):
-        authorization = MagicMock(_token=None)
-
-        result = await HTTPAuthorization._check_authorization(authorization, ...)
-
-        self.assertTrue(result)
-
-    async def test__check_authorization__no_authorization_header(self):
-        authorization = MagicMock()
-        request = MagicMock()
-        request.headers.get.return_value = None
-
-        result = await HTTPAuthorization._check_authorization(authorization, request)
-
-        self.assertFalse(result)
-        request.headers.get.assert_called_once_with("Authorization")
-
-    async def test__check_authorization__wrong_token(self):
-        authorization = MagicMock()
-        request = MagicMock()
-        request.headers.get().removeprefix.return_value = MagicMock()
-        request.reset_mock()
-
-        result = await HTTPAuthorization._check_authorization(authorization, request)
-
-        self.assertFalse(result)
-        request.headers.get.assert_called_once_with("Authorization")
-        request.headers.get().removeprefix.assert_called_once_with("Bearer ")
-
-    async def test__check_authorization__correct_token(self):
-        authorization = MagicMock()
-        request = MagicMock()
-        request.headers.get().removeprefix.return_value = authorization._token
-        request.reset_mock()
-
-        result = await HTTPAuthorization._check_authorization(authorization, request)
-
-        self.assertTrue(result)
-        request.headers.get.assert_called_once_with("Authorization")
-        request.headers.get().removeprefix.assert_called_once_with("Bearer ")
-
-    async def test__call__successful(self):
-        authorization = MagicMock(_check_authorization=AsyncMock())
-        request = MagicMock()
-        authorization._check_authorization.return_value = True
-
-        await HTTPAuthorization.__call__(authorization, request)
-
-        authorization._check_authorization.assert_called_once_with(request)
-
-    async def test__call__with_failed_check(self):
-        authorization = MagicMock(_check_authorization=AsyncMock())
-        request = MagicMock()
-        authorization._check_authorization.return_value = False
-
-        with self.assertRaises(HTTPException) as context:
-            await HTTPAuthorization.__call__(authorization, request)
 
-        authorization._check_authorization.assert_called_once_with(request)
-        self.assertEqual(401, context.exception.status_code)
+    async def test__call(self):
+        self.assertIsNone(await HTTPAuthorization()())
+
+    @patch("daemon.authorization.dumps")
+    @patch("daemon.authorization.make_error")
+    async def test__middleware__constructor(self, make_error_patch: MagicMock, dumps_patch: MagicMock):
+        app, routes = MagicMock(), MagicMock()
+        dumps_patch.return_value = b'{"error":"401 Unauthorized"}'
+
+        middleware = AuthorizationMiddleware(app, routes, "S3cr3t")
+
+        make_error_patch.assert_called_once_with(401)
+        dumps_patch.assert_called_once_with(make_error_patch())
+        self.assertEqual(app, middleware.app)
+        self.assertEqual(routes, middleware._routes)
+        self.assertIsNone(middleware._protected)
+        self.assertEqual(b"S3cr3t", middleware._token)
+        self.assertEqual(b"Bearer S3cr3t", middleware._bearer)
+        self.assertEqual(
+            {
+                "type": "http.response.start",
+                "status": 401,
+                "headers": [(b"content-length", b"28"), (b"content-type", b"application/json")],
+            },
+            middleware._unauthorized_start,
+        )
+        self.assertEqual({"type": "http.response.body", "body": dumps_patch()}, middleware._unauthorized_body)
+
+    async def test__middleware__constructor__no_token(self):
+        for token in [None, ""]:
+            with self.subTest(token=token):
+                middleware = AuthorizationMiddleware(MagicMock(), [], token)
+
+                self.assertIsNone(middleware._token)
+                self.assertIsNone(middleware._bearer)
+
+    async def test__collect_protected(self):
+        middleware = MagicMock()
+        middleware._routes = [
+            make_route("/foo", HTTPAuthorization()),
+            make_route("/bar", MagicMock(), HTTPAuthorization()),
+            make_route("/baz", MagicMock()),
+            make_route("/qux"),
+            make_route("/foo/{id}", HTTPAuthorization()),
+            make_route("/qux/{id}"),
+            MagicMock(path="/docs"),
+        ]
+
+        paths, patterns = AuthorizationMiddleware._collect_protected(middleware)
+
+        self.assertEqual(frozenset({"/foo", "/bar"}), paths)
+        self.assertEqual((middleware._routes[4].path_regex,), patterns)
+
+    async def test__is_protected(self):
+        routes = [make_route("/foo", HTTPAuthorization()), make_route("/bar/{id}/baz", HTTPAuthorization())]
+        middleware = AuthorizationMiddleware(MagicMock(), routes + [make_route("/qux/{id}")], "S3cr3t")
+
+        for path, expected in [
+            ("/foo", True),
+            ("/foo/", False),
+            ("/bar/42/baz", True),
+            ("/bar/x/baz", True),
+            ("/bar/42", False),
+            ("/bar/{id}/baz", True),
+            ("/qux/42", False),
+        ]:
+            with self.subTest(path=path):
+                self.assertEqual(expected, middleware._is_protected(path))
+
+    async def test__check_authorization(self):
+        middleware = AuthorizationMiddleware(MagicMock(), [], "S3cr3t")
+
+        for headers, expected in [
+            ([], False),
+            ([(b"host", b"localhost")], False),
+            ([(b"authorization", b"Bearer S3cr3t")], True),
+            ([(b"host", b"localhost"), (b"authorization", b"S3cr3t")], True),
+            ([(b"authorization", b"Bearer s3cr3t")], False),
+            ([(b"authorization", b"Basic S3cr3t")], False),
+            ([(b"authorization", b"")], False),
+        ]:
+            with self.subTest(headers=headers):
+                self.assertEqual(expected, middleware._check_authorization({"headers": headers}))
+
+    async def test__middleware__call__authorized(self):
+        middleware = AuthorizationMiddleware(AsyncMock(), [make_route("/foo", HTTPAuthorization())], "S3cr3t")
+        scope = {"type": "http", "path": "/foo", "headers": [(b"authorization", b"Bearer S3cr3t")]}
+        receive, send = MagicMock(), AsyncMock()
+
+        await middleware(scope, receive, send)
+
+        self.assertEqual(frozenset({"/foo"}), middleware._protected)
+        middleware.app.assert_called_once_with(scope, receive, send)
+        send.assert_not_called()
+
+    async def test__middleware__call__unauthorized(self):
+        routes = [make_route("/foo", HTTPAuthorization()), make_route("/foo/{id}", HTTPAuthorization())]
+
+        for path in ["/foo", "/foo/42"]:
+            with self.subTest(path=path):
+                middleware = AuthorizationMiddleware(AsyncMock(), routes, "S3cr3t")
+                scope = {"type": "http", "path": path, "headers": [(b"authorization", b"Bearer foo")]}
+                send = AsyncMock()
+
+                await middleware(scope, MagicMock(), send)
+
+                middleware.app.assert_not_called()
+                self.assertEqual(
+                    [((middleware._unauthorized_start,),), ((middleware._unauthorized_body,),)],
+                    send.call_args_list,
+                )
+
+    async def test__middleware__call__unprotected(self):
+        for token, scope in [
+            (None, {"type": "http", "path": "/foo", "headers": []}),
+            ("S3cr3t", {"type": "http", "path": "/bar", "headers": []}),
+            ("S3cr3t", {"type": "lifespan"}),
+        ]:
+            with self.subTest(token=token, scope=scope):
+                middleware = AuthorizationMiddleware(AsyncMock(), [make_route("/foo", HTTPAuthorization())], token)
+                receive, send = MagicMock(), AsyncMock()
+
+                await middleware(scope, receive, send)
+
+                middleware.app.assert_called_once_with(scope, receive, send)
+                send.assert_not_called()
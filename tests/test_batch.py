@@ -0,0 +1,179 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, MagicMock
+
+from fastapi.exceptions import RequestValidationError
+from starlette.exceptions import HTTPException
+
+from daemon import batch
+from daemon.exceptions.api_exception import APIException
+from daemon.streaming import StreamingJSONResponse
+from tests._utils import AsyncMock
+
+
+class TestBatch(IsolatedAsyncioTestCase):
+    @patch("daemon.batch.current_endpoint")
+    @patch("daemon.batch.metrics")
+    @patch("daemon.batch.jsonable_encoder")
+    @patch("daemon.batch.run_endpoint_function", new_callable=AsyncMock)
+    @patch("daemon.batch.solve_dependencies", new_callable=AsyncMock)
+    async def test__call_endpoint(
+        self,
+        solve_dependencies_patch: MagicMock,
+        run_endpoint_function_patch: MagicMock,
+        jsonable_encoder_patch: MagicMock,
+        metrics_patch: MagicMock,
+        current_endpoint_patch: MagicMock,
+    ):
+        request, route, body = MagicMock(), MagicMock(), MagicMock()
+        track = metrics_patch.get.return_value.track.return_value
+        solve_dependencies_patch.return_value = (values := MagicMock()), [], None, None, None
+
+        async def call():
+            pass
+
+        route.dependant.call = call
+
+        result = await batch.call_endpoint(request, route, body)
+
+        current_endpoint_patch.set.assert_called_once_with(route.path)
+        current_endpoint_patch.reset.assert_called_once_with(current_endpoint_patch.set())
+        metrics_patch.get.assert_called_once_with(route.path)
+        track.__enter__.assert_called_once_with()
+        track.__exit__.assert_called_once_with(None, None, None)
+        solve_dependencies_patch.assert_called_once_with(request=request, dependant=route.dependant, body=body)
+        run_endpoint_function_patch.assert_called_once_with(dependant=route.dependant, values=values, is_coroutine=True)
+        jsonable_encoder_patch.assert_called_once_with(run_endpoint_function_patch())
+        self.assertEqual(jsonable_encoder_patch(), result)
+
+    @patch("daemon.batch.db")
+    @patch("daemon.batch.metrics")
+    @patch("daemon.batch.jsonable_encoder")
+    @patch("daemon.batch.run_endpoint_function", new_callable=AsyncMock)
+    @patch("daemon.batch.solve_dependencies", new_callable=AsyncMock)
+    async def test__call_endpoint__streaming(
+        self,
+        solve_dependencies_patch: MagicMock,
+        run_endpoint_function_patch: MagicMock,
+        jsonable_encoder_patch: MagicMock,
+        _,
+        db_patch: MagicMock,
+    ):
+        items = [MagicMock(), MagicMock()]
+
+        async def gen():
+            for item in items:
+                yield item
+
+        solve_dependencies_patch.return_value = MagicMock(), [], None, None, None
+        run_endpoint_function_patch.return_value = StreamingJSONResponse(gen())
+        db_patch.streaming = True
+
+        result = await batch.call_endpoint(MagicMock(), MagicMock(), MagicMock())
+
+        self.assertFalse(db_patch.streaming)
+        jsonable_encoder_patch.assert_called_once_with(items)
+        self.assertEqual(jsonable_encoder_patch(), result)
+
+    @patch("daemon.batch.metrics")
+    @patch("daemon.batch.run_endpoint_function", new_callable=AsyncMock)
+    @patch("daemon.batch.solve_dependencies", new_callable=AsyncMock)
+    async def test__call_endpoint__invalid(
+        self,
+        solve_dependencies_patch: MagicMock,
+        run_endpoint_function_patch: MagicMock,
+        metrics_patch: MagicMock,
+    ):
+        track = metrics_patch.get.return_value.track.return_value
+        track.__exit__.return_value = False
+        solve_dependencies_patch.return_value = {}, (errors := [MagicMock()]), None, None, None
+
+        with self.assertRaises(RequestValidationError) as context:
+            await batch.call_endpoint(MagicMock(), MagicMock(), MagicMock())
+
+        self.assertEqual(errors, context.exception.raw_errors)
+        run_endpoint_function_patch.assert_not_called()
+        self.assertIs(context.exception, track.__exit__.call_args.args[1])
+
+    @patch("daemon.batch.call_endpoint", new_callable=AsyncMock)
+    @patch("daemon.database.db")
+    async def test__call_endpoint_in_session(self, db_patch: MagicMock, call_endpoint_patch: MagicMock):
+        db_patch.commit = AsyncMock()
+        db_patch.close = AsyncMock()
+        request, route, body = MagicMock(), MagicMock(), MagicMock()
+
+        result = await batch.call_endpoint_in_session(request, route, body)
+
+        db_patch.create_session.assert_called_once_with()
+        call_endpoint_patch.assert_called_once_with(request, route, body)
+        db_patch.commit.assert_called_once_with()
+        db_patch.close.assert_called_once_with()
+        self.assertEqual(call_endpoint_patch(), result)
+
+    async def test__make_error_dict__api_exception(self):
+        exception = type("TestException", (APIException,), {"error": "test", "status_code": 400})(foo="bar")
+
+        self.assertEqual({"foo": "bar", "error": "test"}, batch.make_error_dict(exception))
+
+    async def test__make_error_dict__http_exception(self):
+        self.assertEqual({"error": "404 Not Found"}, batch.make_error_dict(HTTPException(404)))
+
+    async def test__make_error_dict__validation_error(self):
+        exception = MagicMock(spec=RequestValidationError)
+
+        result = batch.make_error_dict(exception)
+
+        self.assertEqual({"detail": exception.errors(), "error": "422 Unprocessable Entity"}, result)
+
+    @patch("daemon.batch.logger.exception")
+    async def test__make_error_dict__internal_server_error(self, logger_exception_patch: MagicMock):
+        exception = ZeroDivisionError()
+
+        result = batch.make_error_dict(exception)
+
+        logger_exception_patch.assert_called_once_with("exception in batch request", exc_info=exception)
+        self.assertEqual({"error": "500 Internal Server Error"}, result)
+
+    @patch("daemon.batch.db")
+    @patch("daemon.batch.make_error_dict")
+    @patch("daemon.batch.call_endpoint_in_session", new_callable=AsyncMock)
+    @patch("daemon.batch.call_endpoint", new_callable=AsyncMock)
+    @patch("daemon.batch.get_route")
+    async def test__run_batch(
+        self,
+        get_route_patch: MagicMock,
+        call_endpoint_patch: MagicMock,
+        call_endpoint_in_session_patch: MagicMock,
+        make_error_dict_patch: MagicMock,
+        db_patch: MagicMock,
+    ):
+        for transaction in [False, True]:
+            with self.subTest(transaction=transaction):
+                for mock in [get_route_patch, call_endpoint_patch, call_endpoint_in_session_patch]:
+                    mock.reset_mock()
+                db_patch.rollback = AsyncMock()
+                db_patch.transaction = False
+                request = MagicMock()
+                items = [MagicMock(collection=str(i)) for i in range(4)]
+                routes = {"0": MagicMock(), "1": None, "2": MagicMock(), "3": MagicMock()}
+                get_route_patch.side_effect = lambda collection, _: routes[collection]
+                call = call_endpoint_patch if transaction else call_endpoint_in_session_patch
+                call.side_effect = lambda _, route, __: route
+                make_error_dict_patch.side_effect = lambda e: e
+
+                result = await batch.run_batch(request, items, transaction)
+
+                get_route_patch.assert_any_call("0", items[0].endpoint)
+                call.assert_any_call(request, routes["0"], items[0].body)
+                self.assertEqual(routes["0"], result[0])
+                self.assertIsInstance(result[1], HTTPException)
+                self.assertEqual(404, result[1].status_code)
+
+                self.assertEqual(transaction, db_patch.transaction)
+                if transaction:
+                    call_endpoint_in_session_patch.assert_not_called()
+                    db_patch.rollback.assert_called_once_with()
+                    self.assertEqual(2, len(result))
+                else:
+                    call_endpoint_patch.assert_not_called()
+                    db_patch.rollback.assert_not_called()
+                    self.assertEqual([routes["2"], routes["3"]], result[2:])
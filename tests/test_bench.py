@@ -0,0 +1,232 @@
+import os
+import random
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, MagicMock
+
+from daemon import bench
+from tests._utils import AsyncMock
+
+
+class TestBench(IsolatedAsyncioTestCase):
+    async def test__parse_args(self):
+        result = bench.parse_args([])
+
+        self.assertIsNone(result.sqlite)
+        self.assertEqual(32, result.concurrency)
+        self.assertEqual("uniform", result.distribution)
+        self.assertEqual(["set", "increment", "get"], result.endpoints)
+        self.assertIsNone(result.output)
+
+    async def test__parse_args__custom(self):
+        result = bench.parse_args(["--sqlite", "--distribution", "hot", "--endpoints", "get", "--concurrency", "4"])
+
+        self.assertEqual("", result.sqlite)
+        self.assertEqual("hot", result.distribution)
+        self.assertEqual(["get"], result.endpoints)
+        self.assertEqual(4, result.concurrency)
+
+    @patch.dict(os.environ, {"API_TOKEN": "token", "SQL_DRIVER": "postgresql+asyncpg"})
+    async def test__configure_environment(self):
+        result = bench.configure_environment(MagicMock(sqlite=None), "/tmp")  # noqa: S108
+
+        self.assertEqual("token", result)
+        self.assertEqual("true", os.environ["DEBUG"])
+        self.assertEqual("true", os.environ["SQL_CREATE_TABLES"])
+        self.assertEqual("postgresql+asyncpg", os.environ["SQL_DRIVER"])
+
+    @patch.dict(os.environ, {})
+    async def test__configure_environment__sqlite(self):
+        os.environ.pop("API_TOKEN", None)
+
+        for path, expected in [("", os.path.join("tmp", "bench.db")), ("test.db", "test.db")]:
+            with self.subTest(path=path):
+                result = bench.configure_environment(MagicMock(sqlite=path), "tmp")
+
+                self.assertEqual(os.environ["API_TOKEN"], result)
+                self.assertEqual("sqlite+aiosqlite", os.environ["SQL_DRIVER"])
+                self.assertEqual(expected, os.environ["SQL_DATABASE"])
+                self.assertEqual("0", os.environ["SQL_PORT"])
+
+    @patch("daemon.bench.multiprocessing.get_context")
+    @patch("daemon.bench.uvicorn.Config")
+    async def test__start_server(self, config_patch: MagicMock, get_context_patch: MagicMock):
+        sock = MagicMock()
+
+        result = bench.start_server(sock)
+
+        config_patch.assert_called_once_with("daemon.daemon:app", access_log=False, log_level="warning")
+        get_context_patch.assert_called_once_with("spawn")
+        get_context_patch().Process.assert_called_once_with(
+            target=bench.run_worker,
+            args=(config_patch(), sock),
+            daemon=True,
+        )
+        get_context_patch().Process().start.assert_called_once_with()
+        self.assertEqual(get_context_patch().Process(), result)
+
+    async def test__make_user_chooser(self):
+        users = [str(i) for i in range(100)]
+
+        uniform = bench.make_user_chooser(users, "uniform", 0.9, random.Random(0))  # noqa: S311
+        hot = bench.make_user_chooser(users, "hot", 0.9, random.Random(0))  # noqa: S311
+
+        self.assertLess([uniform() for _ in range(1000)].count("0"), 100)
+        self.assertGreater([hot() for _ in range(1000)].count("0"), 800)
+
+    async def test__make_body(self):
+        rng = MagicMock()
+
+        self.assertEqual({"user_id": "foo"}, bench.make_body("get", "foo", rng))
+        self.assertEqual(
+            {"user_id": "foo", "password": "S3cr3t", "value": rng.randrange()},
+            bench.make_body("set", "foo", rng),
+        )
+        rng.randrange.assert_called_with(1000)
+
+    @patch("daemon.bench.perf_counter")
+    async def test__run_endpoint(self, perf_counter_patch: MagicMock):
+        perf_counter_patch.side_effect = [0, 0, 1, 2, 3, 4, 5, 6, 12, 20]
+        session = MagicMock()
+        responses = [MagicMock(status=200, read=AsyncMock()), MagicMock(status=404, read=AsyncMock())]
+        session.post.return_value.__aenter__ = AsyncMock(side_effect=responses)
+        session.post.return_value.__aexit__ = AsyncMock(return_value=False)
+        choose_user = MagicMock(side_effect=["a", "b"])
+
+        result = await bench.run_endpoint(session, "http://daemon", "get", choose_user, 1, 10, MagicMock())
+
+        session.post.assert_any_call("http://daemon/counter/get", json={"user_id": "a"})
+        session.post.assert_called_with("http://daemon/counter/get", json={"user_id": "b"})
+        self.assertEqual(([1, 1], 1, 20), result)
+
+    async def test__percentile(self):
+        values = list(range(1, 101))
+
+        for q, expected in [(0, 1), (0.5, 50), (0.95, 95), (0.99, 99), (1, 100)]:
+            with self.subTest(q=q):
+                self.assertEqual(expected, bench.percentile(values, q))
+
+    async def test__summarize(self):
+        result = bench.summarize([i / 1000 for i in range(100, 0, -1)], 3, 2)
+
+        self.assertEqual(
+            {
+                "requests": 100,
+                "errors": 3,
+                "throughput": 50,
+                "latency_ms": {"p50": 50, "p95": 95, "p99": 99, "max": 100},
+            },
+            result,
+        )
+
+    async def test__summarize__empty(self):
+        self.assertEqual(
+            {"requests": 0, "errors": 2, "throughput": 0, "latency_ms": None},
+            bench.summarize([], 2, 1),
+        )
+
+    @patch("daemon.bench.asyncio.sleep", new_callable=AsyncMock)
+    async def test__wait_until_ready(self, sleep_patch: MagicMock):
+        session = MagicMock()
+        responses = [bench.aiohttp.ClientConnectionError(), MagicMock(status=401), MagicMock(status=200)]
+        session.get.return_value.__aenter__ = AsyncMock(side_effect=responses)
+        session.get.return_value.__aexit__ = AsyncMock(return_value=False)
+
+        await bench.wait_until_ready(session, "http://daemon")
+
+        session.get.assert_called_with("http://daemon/daemon/endpoints")
+        self.assertEqual(3, session.get.call_count)
+        self.assertEqual(2, sleep_patch.call_count)
+
+    @patch("daemon.bench.perf_counter")
+    @patch("daemon.bench.asyncio.sleep", new_callable=AsyncMock)
+    async def test__wait_until_ready__timeout(self, sleep_patch: MagicMock, perf_counter_patch: MagicMock):
+        session = MagicMock()
+        session.get.return_value.__aenter__ = AsyncMock(side_effect=bench.aiohttp.ClientConnectionError())
+        perf_counter_patch.side_effect = [0, 31]
+
+        with self.assertRaises(TimeoutError):
+            await bench.wait_until_ready(session, "http://daemon", 30)
+
+        sleep_patch.assert_not_called()
+
+    @patch("daemon.bench.summarize")
+    @patch("daemon.bench.run_endpoint", new_callable=AsyncMock)
+    @patch("daemon.bench.wait_until_ready", new_callable=AsyncMock)
+    @patch("daemon.bench.aiohttp")
+    async def test__run(
+        self,
+        aiohttp_patch: MagicMock,
+        wait_until_ready_patch: MagicMock,
+        run_endpoint_patch: MagicMock,
+        summarize_patch: MagicMock,
+    ):
+        args = bench.parse_args(["--users", "3", "--endpoints", "increment", "get", "--concurrency", "2"])
+        session = aiohttp_patch.ClientSession.return_value.__aenter__.return_value = MagicMock()
+        aiohttp_patch.ClientSession.return_value.__aenter__ = AsyncMock(return_value=session)
+        aiohttp_patch.ClientSession.return_value.__aexit__ = AsyncMock(return_value=False)
+        session.post.return_value.__aenter__ = AsyncMock(return_value=MagicMock(read=AsyncMock()))
+        session.post.return_value.__aexit__ = AsyncMock(return_value=False)
+        run_endpoint_patch.return_value = [1], 0, 1
+        summarize_patch.side_effect = lambda *_: MagicMock()
+
+        result = await bench.run(args, "http://daemon", "token")
+
+        aiohttp_patch.TCPConnector.assert_called_once_with(limit=2)
+        aiohttp_patch.ClientSession.assert_called_once_with(
+            headers={"Authorization": "Bearer token"},
+            connector=aiohttp_patch.TCPConnector(),
+        )
+        wait_until_ready_patch.assert_called_once_with(session, "http://daemon")
+        self.assertEqual(3, session.post.call_count)
+        session.post.assert_called_with("http://daemon/counter/set", json=session.post.call_args.kwargs["json"])
+        self.assertEqual(4, run_endpoint_patch.call_count)
+        self.assertEqual(["counter/increment", "counter/get"], list(result))
+
+    @patch("daemon.bench.subprocess.check_output")
+    async def test__get_commit(self, check_output_patch: MagicMock):
+        check_output_patch.return_value = "abc\n"
+
+        self.assertEqual("abc", bench.get_commit())
+
+        check_output_patch.side_effect = OSError
+        self.assertIsNone(bench.get_commit())
+
+    @patch("daemon.bench.get_commit")
+    @patch("daemon.bench.json.dump")
+    @patch("daemon.bench.asyncio.run")
+    @patch("daemon.bench.run", new_callable=MagicMock)
+    @patch("daemon.bench.start_server")
+    @patch("daemon.bench.bind_socket")
+    @patch("daemon.bench.configure_environment")
+    async def test__main(
+        self,
+        configure_environment_patch: MagicMock,
+        bind_socket_patch: MagicMock,
+        start_server_patch: MagicMock,
+        run_patch: MagicMock,
+        asyncio_run_patch: MagicMock,
+        json_dump_patch: MagicMock,
+        get_commit_patch: MagicMock,
+    ):
+        sock = bind_socket_patch.return_value
+        sock.getsockname.return_value = ("127.0.0.1", 1234)
+
+        bench.main(["--duration", "1"])
+
+        bind_socket_patch.assert_called_once_with("127.0.0.1", 0)
+        start_server_patch.assert_called_once_with(sock)
+        run_patch.assert_called_once_with(
+            bench.parse_args(["--duration", "1"]),
+            "http://127.0.0.1:1234",
+            configure_environment_patch(),
+        )
+        asyncio_run_patch.assert_called_once_with(run_patch())
+        start_server_patch().terminate.assert_called_once_with()
+        start_server_patch().join.assert_called_once_with()
+        sock.close.assert_called_once_with()
+
+        report = json_dump_patch.call_args.args[0]
+        self.assertEqual(get_commit_patch(), report["commit"])
+        self.assertEqual(1, report["config"]["duration"])
+        self.assertNotIn("output", report["config"])
+        self.assertEqual(asyncio_run_patch(), report["results"])
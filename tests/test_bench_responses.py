@@ -0,0 +1,47 @@
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from daemon import bench_responses
+
+
+class TestBenchResponses(TestCase):
+    def test__parse_args(self):
+        self.assertEqual(5, bench_responses.parse_args([]).repeat)
+        self.assertEqual(2, bench_responses.parse_args(["--repeat", "2"]).repeat)
+
+    @patch("daemon.bench_responses.timeit.Timer")
+    def test__measure(self, timer_patch: MagicMock):
+        response_class, content = MagicMock(), MagicMock()
+        timer_patch().autorange.return_value = 1000, 0.2
+        timer_patch().repeat.return_value = [0.003, 0.002, 0.004]
+        timer_patch.reset_mock()
+
+        result = bench_responses.measure(response_class, content, 3)
+
+        (statement,), _ = timer_patch.call_args
+        timer_patch().repeat.assert_called_once_with(3, 1000)
+        self.assertAlmostEqual(2, result)
+        statement()
+        response_class.assert_called_once_with(content)
+
+    @patch("daemon.bench_responses.print")
+    @patch("daemon.bench_responses.measure")
+    def test__main(self, measure_patch: MagicMock, print_patch: MagicMock):
+        measure_patch.side_effect = [4, 1] * len(bench_responses.PAYLOADS)
+
+        bench_responses.main(["--repeat", "1"])
+
+        for content in bench_responses.PAYLOADS.values():
+            measure_patch.assert_any_call(bench_responses.JSONResponse, content, 1)
+            measure_patch.assert_any_call(bench_responses.FastJSONResponse, content, 1)
+        self.assertIn("4.00x", print_patch.call_args.args[0])
+
+    @patch("daemon.bench_responses.print")
+    @patch("daemon.bench_responses.FastJSONResponse")
+    def test__main__different_output(self, fast_json_response_patch: MagicMock, print_patch: MagicMock):
+        fast_json_response_patch().body = b"null"
+
+        with self.assertRaises(AssertionError):
+            bench_responses.main([])
+
+        print_patch.assert_called()
@@ -0,0 +1,37 @@
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from daemon import bench_statements
+
+
+class TestBenchStatements(TestCase):
+    def test__parse_args(self):
+        self.assertEqual(5, bench_statements.parse_args([]).repeat)
+        self.assertEqual(2, bench_statements.parse_args(["--repeat", "2"]).repeat)
+
+    @patch("daemon.bench_statements.timeit.Timer")
+    def test__measure(self, timer_patch: MagicMock):
+        func = MagicMock()
+        timer_patch().autorange.return_value = 1000, 0.2
+        timer_patch().repeat.return_value = [0.003, 0.002, 0.004]
+        timer_patch.reset_mock()
+
+        result = bench_statements.measure(func, 3)
+
+        timer_patch.assert_called_once_with(func)
+        timer_patch().repeat.assert_called_once_with(3, 1000)
+        self.assertAlmostEqual(2, result)
+
+    @patch("daemon.bench_statements.print")
+    @patch("daemon.bench_statements.measure")
+    def test__main(self, measure_patch: MagicMock, print_patch: MagicMock):
+        measure_patch.side_effect = [4, 1, 6, 3]
+
+        bench_statements.main(["--repeat", "1"])
+
+        self.assertEqual(4, measure_patch.call_count)
+        for func, repeat in map(lambda c: c.args, measure_patch.call_args_list):
+            self.assertEqual(1, repeat)
+            self.assertIsNotNone(func())
+        self.assertIn("4.00x", print_patch.call_args_list[1].args[0])
+        self.assertIn("2.00x", print_patch.call_args_list[2].args[0])
@@ -0,0 +1,76 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+from sqlalchemy import Table, MetaData, Column, String, Integer
+
+from daemon.database import bulk
+from tests._utils import AsyncMock
+
+
+def make_table() -> Table:
+    return Table(
+        "foo",
+        MetaData(),
+        Column("id", String(36), primary_key=True, default=lambda: "generated"),
+        Column("value", Integer, default=42),
+        Column("name", String(255)),
+        schema="bar",
+    )
+
+
+class TestBulk(IsolatedAsyncioTestCase):
+    async def test__batches(self):
+        rows = [{"value": i} for i in range(7)]
+
+        async def gen():
+            for row in rows:
+                yield row
+
+        for source in [rows, iter(rows), gen()]:
+            with self.subTest(source=source):
+                result = [batch async for batch in bulk.batches(source, 3)]
+
+                self.assertEqual([rows[0:3], rows[3:6], rows[6:7]], result)
+
+    async def test__batches__exact(self):
+        rows = [{"value": i} for i in range(4)]
+
+        self.assertEqual([rows[:2], rows[2:]], [batch async for batch in bulk.batches(rows, 2)])
+        self.assertEqual([], [batch async for batch in bulk.batches([], 2)])
+
+    async def test__batches__invalid_size(self):
+        with self.assertRaises(ValueError):
+            [batch async for batch in bulk.batches([], 0)]
+
+    async def test__apply_defaults(self):
+        rows = [{"name": "a"}, {"name": "b"}]
+
+        names, records = bulk.apply_defaults(make_table(), rows)
+
+        self.assertEqual(["name", "id", "value"], names)
+        self.assertEqual([("a", "generated", 42), ("b", "generated", 42)], records)
+
+    async def test__apply_defaults__all_columns(self):
+        rows = [{"value": 1, "id": "x", "name": None}]
+
+        names, records = bulk.apply_defaults(make_table(), rows)
+
+        self.assertEqual(["value", "id", "name"], names)
+        self.assertEqual([(1, "x", None)], records)
+
+    async def test__copy_rows(self):
+        for started in [False, True]:
+            with self.subTest(started=started):
+                connection = AsyncMock()
+                adapted = connection.get_raw_connection.return_value.connection = AsyncMock(_started=started)
+                table = make_table()
+
+                await bulk.copy_rows(connection, table, [{"name": "a"}])
+
+                self.assertEqual(not started, adapted._start_transaction.called)
+                adapted._connection.copy_records_to_table.assert_called_once_with(
+                    "foo",
+                    records=[("a", "generated", 42)],
+                    columns=["name", "id", "value"],
+                    schema_name="bar",
+                )
@@ -0,0 +1,343 @@
+from datetime import datetime, date, time
+from decimal import Decimal
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, MagicMock, call
+from uuid import UUID
+
+from aioredis import RedisError, Redis
+from sqlalchemy import Column, String, Integer, DateTime, Date, Time, Numeric, JSON, LargeBinary
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.declarative import declarative_base
+
+from daemon.database import cache
+from tests._utils import AsyncMock, mock_list
+
+Base = declarative_base()
+
+
+class Event(Base):
+    __tablename__ = "event"
+    __cache_ttl__ = 60
+
+    id = Column(postgresql.UUID(as_uuid=True), primary_key=True)
+    name = Column(String(32))
+    number = Column(Integer)
+    created = Column(DateTime(timezone=True))
+    day = Column(Date)
+    start = Column(Time)
+    amount = Column(Numeric)
+    data = Column(JSON)
+
+
+class File(Base):
+    __tablename__ = "file"
+    __cache_ttl__ = 60
+
+    id = Column(Integer, primary_key=True)
+    content = Column(LargeBinary)
+
+
+def make_model(ttl=None):
+    return type("Model", (), {"__tablename__": "model", "__cache_ttl__": ttl})
+
+
+class TestCache(IsolatedAsyncioTestCase):
+    async def test__get_ttl(self):
+        self.assertEqual(42, cache.get_ttl(make_model(42)))
+        self.assertIsNone(cache.get_ttl(object))
+
+    async def test__make_key(self):
+        result = cache.make_key(make_model(), ("foo", 42))
+
+        self.assertEqual("model:foo:42", result)
+
+    async def test__get_identity_key__not_cached(self):
+        self.assertIsNone(cache.get_identity_key(make_model()()))
+
+    @patch("daemon.database.cache.make_key")
+    @patch("daemon.database.cache.inspect")
+    async def test__get_identity_key__cached(self, inspect_patch: MagicMock, make_key_patch: MagicMock):
+        obj = (cls := make_model(42))()
+        inspect_patch().primary_key_from_instance.return_value = ["foo", "bar"]
+        inspect_patch.reset_mock()
+
+        result = cache.get_identity_key(obj)
+
+        inspect_patch.assert_called_once_with(cls)
+        inspect_patch().primary_key_from_instance.assert_called_once_with(obj)
+        make_key_patch.assert_called_once_with(cls, ("foo", "bar"))
+        self.assertEqual(make_key_patch(), result)
+
+    async def test__get_lookup_key__not_cached(self):
+        self.assertIsNone(cache.get_lookup_key(make_model(), {"id": 1}))
+
+    @patch("daemon.database.cache.inspect")
+    async def test__get_lookup_key__cached(self, inspect_patch: MagicMock):
+        inspect_patch().primary_key = [MagicMock(key="a"), MagicMock(key="b")]
+        cls = make_model(42)
+
+        for kwargs, expected in [
+            ({"a": 1}, None),
+            ({"a": 1, "c": 2}, None),
+            ({"a": 1, "b": 2, "c": 3}, None),
+            ({"b": 2, "a": 1}, "model:1:2"),
+        ]:
+            with self.subTest(kwargs=kwargs):
+                self.assertEqual(expected, cache.get_lookup_key(cls, kwargs))
+
+    async def test__constructor(self):
+        host, port, db = mock_list(3)
+
+        result = cache.Cache(host, port, db)
+
+        self.assertEqual((host, port), result._address)
+        self.assertEqual(db, result._db)
+        self.assertIsNone(result._redis)
+
+    @patch("daemon.database.cache.aioredis.create_redis_pool", new_callable=AsyncMock)
+    async def test__connect(self, create_redis_pool_patch: MagicMock):
+        obj = MagicMock()
+
+        await cache.Cache.connect(obj)
+
+        create_redis_pool_patch.assert_called_once_with(obj._address, db=obj._db)
+        self.assertEqual(create_redis_pool_patch(), obj._redis)
+
+    @patch("daemon.database.cache.logger.warning")
+    @patch("daemon.database.cache.aioredis.create_redis_pool", new_callable=AsyncMock)
+    async def test__connect__error(self, create_redis_pool_patch: MagicMock, warning_patch: MagicMock):
+        obj = MagicMock(_redis=None)
+        create_redis_pool_patch.side_effect = OSError
+
+        await cache.Cache.connect(obj)
+
+        warning_patch.assert_called_once()
+        self.assertIsNone(obj._redis)
+
+    async def test__close(self):
+        obj = MagicMock(_redis=(redis := AsyncMock()))
+        redis.close = MagicMock()
+
+        await cache.Cache.close(obj)
+
+        redis.close.assert_called_once_with()
+        redis.wait_closed.assert_called_once_with()
+        self.assertIsNone(obj._redis)
+
+    async def test__close__not_connected(self):
+        obj = MagicMock(_redis=None)
+
+        await cache.Cache.close(obj)
+
+        self.assertIsNone(obj._redis)
+
+    async def test__get_decoders(self):
+        result = cache.get_decoders(Event)
+
+        self.assertEqual(
+            [UUID, None, None, datetime.fromisoformat, date.fromisoformat, time.fromisoformat, Decimal, None],
+            result,
+        )
+
+    @patch("daemon.database.cache.logger.warning")
+    async def test__get_decoders__not_serializable(self, warning_patch: MagicMock):
+        cache.get_decoders.cache_clear()
+
+        self.assertIsNone(cache.get_decoders(File))
+        self.assertIsNone(cache.get_decoders(File))
+
+        warning_patch.assert_called_once_with("rows of File are not cached, as column content is not json serializable")
+
+    @patch("daemon.database.cache.get_decoders")
+    @patch("daemon.database.cache.get_lookup_key")
+    async def test__get_key(self, get_lookup_key_patch: MagicMock, get_decoders_patch: MagicMock):
+        obj = MagicMock()
+        cls, kwargs = MagicMock(), MagicMock()
+
+        result = cache.Cache.get_key(obj, cls, kwargs)
+
+        get_lookup_key_patch.assert_called_once_with(cls, kwargs)
+        get_decoders_patch.assert_called_once_with(cls)
+        self.assertEqual(get_lookup_key_patch(), result)
+
+    @patch("daemon.database.cache.get_decoders")
+    @patch("daemon.database.cache.get_lookup_key")
+    async def test__get_key__not_cached(self, get_lookup_key_patch: MagicMock, get_decoders_patch: MagicMock):
+        for key, decoders in [(None, []), ("key", None)]:
+            with self.subTest(key=key, decoders=decoders):
+                get_lookup_key_patch.return_value = key
+                get_decoders_patch.return_value = decoders
+
+                self.assertIsNone(cache.Cache.get_key(MagicMock(), MagicMock(), {}))
+
+    async def test__get_key__not_connected(self):
+        self.assertIsNone(cache.Cache.get_key(MagicMock(_redis=None), MagicMock(), {}))
+
+    @patch("daemon.database.cache.get_decoders")
+    @patch("daemon.database.cache.inspect")
+    async def test__load(self, inspect_patch: MagicMock, get_decoders_patch: MagicMock):
+        inspect_patch().column_attrs = [MagicMock(key="a"), MagicMock(key="b"), MagicMock(key="c")]
+        get_decoders_patch.return_value = [None, int, int]
+        obj = MagicMock(_redis=AsyncMock())
+        obj._redis.get.return_value = '["foo","42",null]'
+        cls, key = MagicMock(), MagicMock()
+
+        result = await cache.Cache.load(obj, cls, key)
+
+        obj._redis.get.assert_called_once_with(key)
+        inspect_patch.assert_called_with(cls)
+        get_decoders_patch.assert_called_once_with(cls)
+        self.assertEqual({"a": "foo", "b": 42, "c": None}, result)
+
+    async def test__load__miss(self):
+        for data in [None, b""]:
+            with self.subTest(data=data):
+                obj = MagicMock(_redis=AsyncMock())
+                obj._redis.get.return_value = data
+
+                self.assertIsNone(await cache.Cache.load(obj, MagicMock(), MagicMock()))
+
+    @patch("daemon.database.cache.logger.warning")
+    async def test__load__error(self, warning_patch: MagicMock):
+        obj = MagicMock(_redis=AsyncMock())
+        obj._redis.get.side_effect = RedisError
+
+        self.assertIsNone(await cache.Cache.load(obj, MagicMock(), MagicMock()))
+        warning_patch.assert_called_once()
+
+    @patch("daemon.database.cache.inspect")
+    async def test__store(self, inspect_patch: MagicMock):
+        inspect_patch().column_attrs = [MagicMock(key="a"), MagicMock(key="b")]
+        obj = MagicMock(_redis=AsyncMock())
+        row = make_model(42)()
+        row.a, row.b = "foo", 1337
+
+        await cache.Cache.store(obj, "key", row)
+
+        obj._redis.set.assert_called_once_with("key", '["foo",1337]', expire=42, exist=Redis.SET_IF_NOT_EXIST)
+
+    async def test__store__load(self):
+        obj = MagicMock(_redis=AsyncMock())
+        row = Event(
+            id=UUID("1e5b6a71-3c4e-4f4c-9a3e-5cb4a0a3b0a6"),
+            name="foo",
+            number=42,
+            created=datetime.fromisoformat("2021-06-01T12:30:00.123456+02:00"),
+            day=date(2021, 6, 2),
+            start=time(8, 15),
+            amount=Decimal("1.50"),
+            data={"a": [1, None]},
+        )
+
+        await cache.Cache.store(obj, "key", row)
+        (_, data), _ = obj._redis.set.call_args
+        obj._redis.get.return_value = data
+        result = await cache.Cache.load(obj, Event, "key")
+
+        self.assertEqual({attr: getattr(row, attr) for attr in result}, result)
+        self.assertEqual(8, len(result))
+
+    async def test__store__load__null(self):
+        obj = MagicMock(_redis=AsyncMock())
+        row = Event(id=UUID("1e5b6a71-3c4e-4f4c-9a3e-5cb4a0a3b0a6"))
+
+        await cache.Cache.store(obj, "key", row)
+        (_, data), _ = obj._redis.set.call_args
+        obj._redis.get.return_value = data
+        result = await cache.Cache.load(obj, Event, "key")
+
+        self.assertEqual(row.id, result.pop("id"))
+        self.assertEqual([None] * 7, list(result.values()))
+
+    @patch("daemon.database.cache.logger.warning")
+    @patch("daemon.database.cache.inspect")
+    async def test__store__error(self, inspect_patch: MagicMock, warning_patch: MagicMock):
+        inspect_patch().column_attrs = []
+        obj = MagicMock(_redis=AsyncMock())
+        obj._redis.set.side_effect = OSError
+
+        await cache.Cache.store(obj, "key", make_model(42)())
+
+        warning_patch.assert_called_once()
+
+    async def test__invalidate(self):
+        obj = MagicMock(_redis=MagicMock())
+        pipeline = obj._redis.pipeline.return_value
+        pipeline.execute = AsyncMock()
+
+        await cache.Cache.invalidate(obj, {"a", "b"})
+
+        pipeline.set.assert_has_calls(
+            [call("a", b"", expire=cache.TOMBSTONE_TTL), call("b", b"", expire=cache.TOMBSTONE_TTL)],
+            any_order=True,
+        )
+        self.assertEqual(2, pipeline.set.call_count)
+        pipeline.execute.assert_called_once_with()
+
+    async def test__invalidate__nothing(self):
+        for redis, keys in [(None, {"a"}), (MagicMock(), set())]:
+            with self.subTest(redis=redis, keys=keys):
+                obj = MagicMock(_redis=redis)
+
+                await cache.Cache.invalidate(obj, keys)
+
+                if redis is not None:
+                    redis.pipeline.assert_not_called()
+
+    @patch("daemon.database.cache.logger.warning")
+    async def test__invalidate__error(self, warning_patch: MagicMock):
+        obj = MagicMock(_redis=MagicMock())
+        obj._redis.pipeline.return_value.execute = AsyncMock(side_effect=RedisError)
+
+        await cache.Cache.invalidate(obj, {"a", "b"})
+
+        warning_patch.assert_called_once()
+
+    async def test__invalidate__stale_store(self):
+        redis = FakeRedis()
+        obj = cache.Cache("localhost", 6379, 0)
+        obj._redis = redis
+        row = Event(id=UUID("1e5b6a71-3c4e-4f4c-9a3e-5cb4a0a3b0a6"), number=5)
+
+        # the row has been read before it was changed and invalidated, but is stored afterwards
+        await obj.invalidate({"key"})
+        await obj.store("key", row)
+
+        self.assertIsNone(await obj.load(Event, "key"))
+
+        redis.expire("key")
+        await obj.store("key", row)
+
+        self.assertEqual(5, (await obj.load(Event, "key"))["number"])
+
+
+class FakeRedis:
+    """In-memory redis supporting the commands used by the cache"""
+
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+
+    async def get(self, key: str):
+        return self.data.get(key)
+
+    async def set(self, key: str, value, *, expire=0, exist=None):
+        if exist == Redis.SET_IF_NOT_EXIST and key in self.data:
+            return False
+
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    def expire(self, key: str):
+        self.data.pop(key, None)
+
+    def pipeline(self):
+        redis, commands = self, []
+
+        class Pipeline:
+            def set(self, *args, **kwargs):
+                commands.append(redis.set(*args, **kwargs))
+
+            async def execute(self):
+                return [await command for command in commands]
+
+        return Pipeline()
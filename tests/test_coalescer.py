@@ -0,0 +1,165 @@
+from asyncio import Future, get_running_loop, create_task, sleep
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, MagicMock, call
+
+from daemon.database import coalescer
+from tests._utils import AsyncMock, mock_dict
+
+
+class TestCoalescer(IsolatedAsyncioTestCase):
+    async def test__constructor(self):
+        db, window = MagicMock(), MagicMock()
+
+        result = coalescer.WriteCoalescer(db, window)
+
+        self.assertEqual(db, result._db)
+        self.assertEqual(window, result._window)
+        self.assertEqual({}, result._pending)
+        self.assertIsNone(result._flush_task)
+        self.assertEqual(set(), result._flushing)
+
+    @patch("daemon.database.coalescer.create_task")
+    async def test__increment(self, create_task_patch: MagicMock):
+        obj = MagicMock(_pending={}, _flush_task=None)
+        obj._flush_later = MagicMock()
+        cls, column, delta = MagicMock(), MagicMock(), MagicMock()
+        key = mock_dict(2, True)
+        expected, task = MagicMock(), MagicMock()
+
+        def side_effect(_):
+            [(_, future)] = obj._pending[(cls, column, tuple(key.items()))]
+            future.set_result(expected)
+            return task
+
+        create_task_patch.side_effect = side_effect
+
+        result = await coalescer.WriteCoalescer.increment(obj, cls, column, delta, key)
+
+        create_task_patch.assert_called_once_with(obj._flush_later())
+        self.assertEqual(task, obj._flush_task)
+        self.assertEqual(expected, result)
+
+    @patch("daemon.database.coalescer.create_task")
+    async def test__increment__flush_scheduled(self, create_task_patch: MagicMock):
+        future = get_running_loop().create_future()
+        obj = MagicMock(_pending={("a", "b", (("c", "d"),)): [(1, future)]}, _flush_task=MagicMock())
+        get_running_loop().call_soon(lambda: obj._pending[("a", "b", (("c", "d"),))][1][1].set_result(42))
+
+        result = await coalescer.WriteCoalescer.increment(obj, "a", "b", 2, {"c": "d"})
+
+        create_task_patch.assert_not_called()
+        self.assertEqual([1, 2], [delta for delta, _ in obj._pending[("a", "b", (("c", "d"),))]])
+        self.assertEqual(42, result)
+
+    @patch("daemon.database.coalescer.sleep", new_callable=AsyncMock)
+    async def test__flush_later(self, sleep_patch: MagicMock):
+        task = MagicMock()
+        obj = MagicMock(_flush=AsyncMock(), _pending=(pending := MagicMock()), _flush_task=task, _flushing=set())
+
+        def flush(_):
+            self.assertEqual({}, obj._pending)
+            self.assertIsNone(obj._flush_task)
+            self.assertEqual({task}, obj._flushing)
+
+        obj._flush.side_effect = flush
+
+        await coalescer.WriteCoalescer._flush_later(obj)
+
+        sleep_patch.assert_called_once_with(obj._window)
+        obj._flush.assert_called_once_with(pending)
+        self.assertIsNone(obj._flush_task)
+        self.assertEqual(set(), obj._flushing)
+
+    async def test__drain(self):
+        for task in [None, MagicMock()]:
+            with self.subTest(task=task):
+                pending = {("a", "b", (("c", "d"),)): [(1, MagicMock()), (2, MagicMock())], ("e",): [(3, MagicMock())]}
+                obj = MagicMock(_flush=AsyncMock(), _pending=pending, _flush_task=task, _flushing=set())
+
+                result = await coalescer.WriteCoalescer.drain(obj)
+
+                if task is not None:
+                    task.cancel.assert_called_once_with()
+                self.assertIsNone(obj._flush_task)
+                self.assertEqual({}, obj._pending)
+                obj._flush.assert_called_once_with(pending)
+                self.assertEqual(3, result)
+
+    async def test__drain__flushing(self):
+        flushed = []
+
+        async def flush():
+            await sleep(0.01)
+            flushed.append(True)
+
+        obj = MagicMock(_flush=AsyncMock(), _pending={}, _flush_task=None, _flushing={create_task(flush())})
+
+        result = await coalescer.WriteCoalescer.drain(obj)
+
+        self.assertEqual([True], flushed)
+        self.assertEqual(0, result)
+
+    async def test__drain__nothing_pending(self):
+        obj = MagicMock(_flush=AsyncMock(), _pending={}, _flush_task=None, _flushing=set())
+
+        result = await coalescer.WriteCoalescer.drain(obj)
+
+        obj._flush.assert_not_called()
+        self.assertEqual(0, result)
+
+    def test__lock_order(self):
+        a, b = MagicMock(__tablename__="a"), MagicMock(__tablename__="b")
+        rows = [
+            (b, "value", (("user_id", "x"),)),
+            (a, "value", (("user_id", 10),)),
+            (a, "other", (("user_id", "y"),)),
+            (a, "value", (("user_id", 2),)),
+        ]
+
+        result = sorted(rows, key=coalescer.lock_order)
+
+        self.assertEqual([rows[2], rows[1], rows[3], rows[0]], result)
+
+    async def test__flush(self):
+        db = AsyncMock()
+        db.create_session = MagicMock()
+        db.increment.side_effect = [(None, 3), (5, 7)]
+        obj = MagicMock(_db=db)
+        futures: list[Future] = [get_running_loop().create_future() for _ in range(5)]
+        futures[1].cancel()
+        cls = MagicMock(__tablename__="a")
+        pending = {
+            (cls, "value", (("user_id", "y"),)): [(2, futures[3]), (0, futures[4])],
+            (cls, "value", (("user_id", "x"),)): [(1, futures[0]), (1, futures[1]), (1, futures[2])],
+        }
+
+        await coalescer.WriteCoalescer._flush(obj, pending)
+
+        db.create_session.assert_called_once_with()
+        self.assertEqual(
+            [call(cls, "value", 3, user_id="x"), call(cls, "value", 2, user_id="y")], db.increment.call_args_list
+        )
+        db.commit.assert_called_once_with()
+        db.close.assert_called_once_with()
+        self.assertEqual((None, 1), futures[0].result())
+        self.assertTrue(futures[1].cancelled())
+        self.assertEqual((2, 3), futures[2].result())
+        self.assertEqual((5, 7), futures[3].result())
+        self.assertEqual((7, 7), futures[4].result())
+
+    @patch("daemon.database.coalescer.logger.exception")
+    async def test__flush__error(self, logger_exception_patch: MagicMock):
+        db = AsyncMock()
+        db.create_session = MagicMock()
+        db.increment.side_effect = error = Exception()
+        obj = MagicMock(_db=db)
+        futures: list[Future] = [get_running_loop().create_future() for _ in range(2)]
+        pending = {(MagicMock(__tablename__="a"), "value", (("user_id", "x"),)): [(1, futures[0]), (1, futures[1])]}
+
+        await coalescer.WriteCoalescer._flush(obj, pending)
+
+        logger_exception_patch.assert_called_once()
+        db.commit.assert_not_called()
+        db.close.assert_called_once_with()
+        for future in futures:
+            self.assertIs(error, future.exception())
@@ -1,5 +1,5 @@
 from unittest import IsolatedAsyncioTestCase
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, call
 
 from fastapi import HTTPException
 
@@ -22,41 +22,123 @@ class TestDaemon(IsolatedAsyncioTestCase):
         self.assertEqual(1, len(functions))
         return module, functions[0]
 
+    @patch("daemon.metrics.metrics")
+    @patch("daemon.database.db")
     @patch("daemon.endpoints.register_collections")
     @patch("fastapi.FastAPI")
-    async def test__global_vars(self, fastapi_patch: MagicMock, register_collections_patch: MagicMock):
+    async def test__global_vars(
+        self,
+        fastapi_patch: MagicMock,
+        register_collections_patch: MagicMock,
+        db_patch: MagicMock,
+        metrics_patch: MagicMock,
+    ):
         module = import_module("daemon.daemon")
 
-        fastapi_patch.assert_called_once_with(title="Python Daemon")
+        fastapi_patch.assert_called_once_with(title="Python Daemon", default_response_class=module.FastJSONResponse)
         self.assertEqual(fastapi_patch(), module.app)
         register_collections_patch.assert_called_once_with(fastapi_patch())
+        fastapi_patch().add_middleware.assert_called_once_with(
+            module.AuthorizationMiddleware, routes=fastapi_patch().routes
+        )
         self.assertEqual(register_collections_patch(), module.endpoints)
+        self.assertEqual(
+            [
+                call(db_patch.pool_metrics.render),
+                call(db_patch.statement_cache.render),
+                call(db_patch.query_monitor.render),
+                call(db_patch.slow_query_log.render),
+                call(db_patch.single_flight.render),
+            ],
+            metrics_patch.register.call_args_list,
+        )
+
+    @patch("daemon.metrics.metrics")
+    @patch("daemon.database.db")
+    @patch("daemon.endpoints.register_collections")
+    @patch("fastapi.FastAPI")
+    async def test__global_vars__no_single_flight(self, _, __, db_patch: MagicMock, metrics_patch: MagicMock):
+        db_patch.single_flight = None
+
+        import_module("daemon.daemon")
+
+        self.assertEqual(
+            [
+                call(db_patch.pool_metrics.render),
+                call(db_patch.statement_cache.render),
+                call(db_patch.query_monitor.render),
+                call(db_patch.slow_query_log.render),
+            ],
+            metrics_patch.register.call_args_list,
+        )
 
+    @patch("daemon.metrics.current_endpoint")
     @patch("daemon.database.db")
     @patch("fastapi.FastAPI")
-    async def test__db_session(self, fastapi_patch: MagicMock, db_patch: MagicMock):
+    async def test__db_session(self, fastapi_patch: MagicMock, db_patch: MagicMock, current_endpoint_patch: MagicMock):
         _, db_session = self.get_decorated_function(fastapi_patch, "middleware", "http")
 
         events = []
+        current_endpoint_patch.set.side_effect = lambda _: events.append(-1)
         db_patch.create_session.side_effect = lambda: events.append(0)
         expected = MagicMock()
         call_next = AsyncMock(side_effect=lambda _: events.append(1) or expected)
         request = MagicMock()
         db_patch.commit = AsyncMock(side_effect=lambda: events.append(2))
         db_patch.close = AsyncMock(side_effect=lambda: events.append(3))
+        db_patch.streaming = False
 
         result = await db_session(request, call_next)
 
-        self.assertEqual([0, 1, 2, 3], events)
+        self.assertEqual([-1, 0, 1, 2, 3], events)
+        current_endpoint_patch.set.assert_called_once_with(request.url.path)
         call_next.assert_called_once_with(request)
         self.assertEqual(expected, result)
 
+    @patch("daemon.database.db")
+    @patch("fastapi.FastAPI")
+    async def test__db_session__in_flight(self, fastapi_patch: MagicMock, db_patch: MagicMock):
+        module, db_session = self.get_decorated_function(fastapi_patch, "middleware", "http")
+
+        counts = []
+        call_next = AsyncMock(side_effect=lambda _: counts.append(module.in_flight.count))
+        db_patch.commit = AsyncMock(side_effect=lambda: counts.append(module.in_flight.count))
+        db_patch.close = AsyncMock()
+        db_patch.streaming = False
+
+        await db_session(MagicMock(), call_next)
+
+        self.assertEqual([1, 1], counts)
+        self.assertEqual(0, module.in_flight.count)
+
+    @patch("daemon.database.db")
+    @patch("fastapi.FastAPI")
+    async def test__db_session__streaming(self, fastapi_patch: MagicMock, db_patch: MagicMock):
+        _, db_session = self.get_decorated_function(fastapi_patch, "middleware", "http")
+
+        call_next = AsyncMock()
+        request = MagicMock()
+        db_patch.commit = AsyncMock()
+        db_patch.close = AsyncMock()
+        db_patch.streaming = True
+
+        result = await db_session(request, call_next)
+
+        db_patch.create_session.assert_called_once_with()
+        call_next.assert_called_once_with(request)
+        db_patch.commit.assert_not_called()
+        db_patch.close.assert_not_called()
+        self.assertEqual(call_next(), result)
+
     @patch("fastapi.FastAPI")
     async def test__on_startup__no_tables(self, fastapi_patch: MagicMock):
         module, on_startup = self.get_decorated_function(fastapi_patch, "on_event", "startup")
 
         module.SQL_CREATE_TABLES = False
         db = module.db = AsyncMock()
+        db.cache = None
+        db.pool_metrics = MagicMock()
+        module.setup_openapi = MagicMock()
 
         await on_startup()
 
@@ -68,11 +150,124 @@ class TestDaemon(IsolatedAsyncioTestCase):
 
         module.SQL_CREATE_TABLES = True
         db = module.db = AsyncMock()
+        db.cache = None
+        db.pool_metrics = MagicMock()
+        module.setup_openapi = MagicMock()
 
         await on_startup()
 
         db.create_tables.assert_called_once_with()
 
+    @patch("fastapi.FastAPI")
+    async def test__on_startup__connect_cache(self, fastapi_patch: MagicMock):
+        module, on_startup = self.get_decorated_function(fastapi_patch, "on_event", "startup")
+
+        module.SQL_CREATE_TABLES = False
+        db = module.db = AsyncMock()
+        db.pool_metrics = MagicMock()
+        module.setup_openapi = MagicMock()
+
+        await on_startup()
+
+        db.create_tables.assert_not_called()
+        db.cache.connect.assert_called_once_with()
+
+    @patch("fastapi.FastAPI")
+    async def test__on_startup__pool_logging(self, fastapi_patch: MagicMock):
+        module, on_startup = self.get_decorated_function(fastapi_patch, "on_event", "startup")
+
+        for interval in [0, 60]:
+            with self.subTest(interval=interval):
+                module.SQL_CREATE_TABLES = False
+                module.POOL_LOG_INTERVAL = interval
+                db = module.db = AsyncMock()
+                db.cache = None
+                db.pool_metrics = MagicMock()
+                module.setup_openapi = MagicMock()
+
+                await on_startup()
+
+                if interval:
+                    db.pool_metrics.start_logging.assert_called_once_with(interval)
+                else:
+                    db.pool_metrics.start_logging.assert_not_called()
+
+    @patch("fastapi.FastAPI")
+    async def test__on_startup__openapi(self, fastapi_patch: MagicMock):
+        module, on_startup = self.get_decorated_function(fastapi_patch, "on_event", "startup")
+
+        module.SQL_CREATE_TABLES = False
+        module.db = AsyncMock()
+        module.db.cache = None
+        module.db.pool_metrics = MagicMock()
+        module.setup_openapi = MagicMock()
+
+        await on_startup()
+
+        module.setup_openapi.assert_called_once_with(module.app, module.OPENAPI_FILE)
+
+    @patch("fastapi.FastAPI")
+    async def test__on_startup__warm_up(self, fastapi_patch: MagicMock):
+        module, on_startup = self.get_decorated_function(fastapi_patch, "on_event", "startup")
+
+        self.assertEqual(False, module.app.state.ready)
+        for connections, opened, ready in [(0, 0, True), (5, 5, True), (5, 1, True), (5, 0, False)]:
+            with self.subTest(connections=connections, opened=opened):
+                module.SQL_CREATE_TABLES = False
+                module.POOL_WARMUP = connections
+                module.POOL_WARMUP_STATEMENTS = True
+                module.logger = MagicMock()
+                db = module.db = AsyncMock()
+                db.cache = None
+                db.pool_metrics = MagicMock()
+                module.setup_openapi = MagicMock()
+                module.app.state.ready = False
+
+                def warm_up(*_):
+                    self.assertEqual(False, module.app.state.ready)
+                    return opened
+
+                db.warm_up.side_effect = warm_up
+
+                await on_startup()
+
+                if connections:
+                    db.warm_up.assert_called_once_with(connections, True)
+                else:
+                    db.warm_up.assert_not_called()
+                if ready:
+                    module.logger.warning.assert_not_called()
+                else:
+                    module.logger.warning.assert_called_once_with(
+                        "could not open any database connection, the worker is not ready until it can connect"
+                    )
+                self.assertEqual(ready, module.app.state.ready)
+
+    @patch("fastapi.FastAPI")
+    async def test__on_shutdown(self, fastapi_patch: MagicMock):
+        module, on_shutdown = self.get_decorated_function(fastapi_patch, "on_event", "shutdown")
+
+        for unfinished in [0, 2]:
+            with self.subTest(unfinished=unfinished):
+                module.SHUTDOWN_TIMEOUT = 30
+                module.app.state.ready = True
+                module.app.state.stopping = False
+                module.in_flight = AsyncMock()
+                module.in_flight.wait.return_value = unfinished
+                module.db = AsyncMock()
+                module.logger = MagicMock()
+
+                await on_shutdown()
+
+                module.in_flight.wait.assert_called_once_with(30)
+                if unfinished:
+                    module.logger.warning.assert_called_once_with("shutting down with 2 unfinished requests")
+                else:
+                    module.logger.warning.assert_not_called()
+                module.db.dispose.assert_called_once_with()
+                self.assertEqual(False, module.app.state.ready)
+                self.assertEqual(True, module.app.state.stopping)
+
     @patch("daemon.endpoint_collection.format_docs")
     @patch("daemon.schemas.daemon.EndpointCollectionModel")
     @patch("daemon.utils.responses")
@@ -99,27 +294,167 @@ class TestDaemon(IsolatedAsyncioTestCase):
             responses=[responses_patch(), responses_patch.reset_mock()][0],
         )
 
-        httpauthorization_patch.assert_called_once_with()
-        depends_patch.assert_called_once_with(httpauthorization_patch())
-        responses_patch.assert_called_once_with(list[endpoint_collection_model_patch])
+        httpauthorization_patch.assert_called_with()
+        depends_patch.assert_called_with(httpauthorization_patch())
+        responses_patch.assert_any_call(list[endpoint_collection_model_patch])
         self.assertEqual(True, daemon_endpoints.docs_formatted)
 
         module.endpoints = MagicMock()
         self.assertEqual(module.endpoints, await daemon_endpoints())
 
-    @patch("daemon.daemon.JSONResponse")
-    @patch("daemon.daemon.HTTPException")
-    async def test__make_exception(self, httpexception_patch: MagicMock, jsonresponse_patch: MagicMock):
+    @patch("daemon.endpoint_collection.format_docs")
+    @patch("daemon.batch.run_batch")
+    @patch("daemon.utils.responses")
+    @patch("daemon.authorization.HTTPAuthorization")
+    @patch("fastapi.params.Depends")
+    @patch("fastapi.FastAPI")
+    async def test__daemon_batch(
+        self,
+        fastapi_patch: MagicMock,
+        depends_patch: MagicMock,
+        httpauthorization_patch: MagicMock,
+        responses_patch: MagicMock,
+        run_batch_patch: MagicMock,
+        format_docs_patch: MagicMock,
+    ):
+        format_docs_patch.side_effect = lambda f: setattr(f, "docs_formatted", True) or f  # noqa: B010
+        module, daemon_batch = self.get_decorated_function(
+            fastapi_patch,
+            "post",
+            "/daemon/batch",
+            name="Batch Requests",
+            tags=["daemon"],
+            dependencies=[[depends_patch(), depends_patch.reset_mock()][0]],
+            responses=[responses_patch(), responses_patch.reset_mock()][0],
+        )
+
+        depends_patch.assert_called_with(httpauthorization_patch())
+        responses_patch.assert_any_call(list[dict])
+        self.assertEqual(True, daemon_batch.docs_formatted)
+
+        module.run_batch = AsyncMock()
+        request, requests, transaction = MagicMock(), MagicMock(), MagicMock()
+        result = await daemon_batch(request, requests, transaction)
+
+        module.run_batch.assert_called_once_with(request, requests, transaction)
+        self.assertEqual(module.run_batch(), result)
+
+    @patch("daemon.endpoint_collection.format_docs")
+    @patch("daemon.metrics.metrics")
+    @patch("fastapi.responses.PlainTextResponse")
+    @patch("daemon.authorization.HTTPAuthorization")
+    @patch("fastapi.params.Depends")
+    @patch("fastapi.FastAPI")
+    async def test__daemon_metrics(
+        self,
+        fastapi_patch: MagicMock,
+        depends_patch: MagicMock,
+        httpauthorization_patch: MagicMock,
+        plain_text_response_patch: MagicMock,
+        metrics_patch: MagicMock,
+        format_docs_patch: MagicMock,
+    ):
+        format_docs_patch.side_effect = lambda f: setattr(f, "docs_formatted", True) or f  # noqa: B010
+        module, daemon_metrics = self.get_decorated_function(
+            fastapi_patch,
+            "get",
+            "/daemon/metrics",
+            name="Daemon Metrics",
+            tags=["daemon"],
+            dependencies=[[depends_patch(), depends_patch.reset_mock()][0]],
+            response_class=plain_text_response_patch,
+        )
+
+        depends_patch.assert_called_with(httpauthorization_patch())
+        self.assertEqual(True, daemon_metrics.docs_formatted)
+
+        result = await daemon_metrics()
+
+        metrics_patch.render.assert_called_once_with()
+        plain_text_response_patch.assert_called_once_with(
+            metrics_patch.render(),
+            media_type="text/plain; version=0.0.4",
+        )
+        self.assertEqual(plain_text_response_patch(), result)
+
+    @patch("daemon.endpoint_collection.format_docs")
+    @patch("daemon.responses.FastJSONResponse")
+    @patch("fastapi.FastAPI")
+    async def test__daemon_ready(
+        self,
+        fastapi_patch: MagicMock,
+        jsonresponse_patch: MagicMock,
+        format_docs_patch: MagicMock,
+    ):
+        format_docs_patch.side_effect = lambda f: setattr(f, "docs_formatted", True) or f  # noqa: B010
+        module, daemon_ready = self.get_decorated_function(
+            fastapi_patch,
+            "get",
+            "/daemon/ready",
+            name="Daemon Readiness",
+            tags=["daemon"],
+            responses={503: {"description": "Service Unavailable"}},
+        )
+
+        self.assertEqual(True, daemon_ready.docs_formatted)
+
+        module.db = AsyncMock()
+        module.POOL_WARMUP = 0
+        module.app.state.stopping = False
+        module.app.state.ready = False
+        self.assertEqual(jsonresponse_patch(), await daemon_ready())
+        jsonresponse_patch.assert_called_with({"ready": False}, 503)
+
+        module.app.state.ready = True
+        self.assertEqual({"ready": True}, await daemon_ready())
+        module.db.warm_up.assert_not_called()
+
+    @patch("daemon.endpoint_collection.format_docs")
+    @patch("daemon.responses.FastJSONResponse")
+    @patch("fastapi.FastAPI")
+    async def test__daemon_ready__warm_up_failed(
+        self,
+        fastapi_patch: MagicMock,
+        jsonresponse_patch: MagicMock,
+        format_docs_patch: MagicMock,
+    ):
+        format_docs_patch.side_effect = lambda f: f
+        module, daemon_ready = self.get_decorated_function(
+            fastapi_patch,
+            "get",
+            "/daemon/ready",
+            name="Daemon Readiness",
+            tags=["daemon"],
+            responses={503: {"description": "Service Unavailable"}},
+        )
+
+        for stopping, opened, ready in [(False, 0, False), (False, 1, True), (True, 1, False)]:
+            with self.subTest(stopping=stopping, opened=opened):
+                module.db = AsyncMock()
+                module.db.warm_up.return_value = opened
+                module.POOL_WARMUP = 5
+                module.app.state.stopping = stopping
+                module.app.state.ready = False
+
+                result = await daemon_ready()
+
+                if stopping:
+                    module.db.warm_up.assert_not_called()
+                else:
+                    module.db.warm_up.assert_called_once_with(1)
+                self.assertEqual(ready, module.app.state.ready)
+                self.assertEqual({"ready": True} if ready else jsonresponse_patch(), result)
+
+    @patch("daemon.daemon.FastJSONResponse")
+    @patch("daemon.daemon.make_error")
+    async def test__make_exception(self, make_error_patch: MagicMock, jsonresponse_patch: MagicMock):
         status_code = MagicMock()
         kwargs = mock_dict(5, True)
 
         result = daemon._make_exception(status_code, **kwargs)
 
-        httpexception_patch.assert_called_once_with(status_code)
-        jsonresponse_patch.assert_called_once_with(
-            {**kwargs, "error": f"{status_code} {httpexception_patch().detail}"},
-            status_code,
-        )
+        make_error_patch.assert_called_once_with(status_code, **kwargs)
+        jsonresponse_patch.assert_called_once_with(make_error_patch(), status_code)
         self.assertEqual(jsonresponse_patch(), result)
 
     @patch("daemon.exceptions.api_exception.APIException")
@@ -0,0 +1,164 @@
+from asyncio import create_task, sleep, get_running_loop
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, MagicMock
+
+from daemon import drain
+
+
+class TestDrain(IsolatedAsyncioTestCase):
+    async def test__track(self):
+        requests = drain.InFlightRequests()
+
+        with requests.track():
+            with requests.track():
+                self.assertEqual(2, requests.count)
+            self.assertEqual(1, requests.count)
+
+        self.assertEqual(0, requests.count)
+
+    async def test__track__error(self):
+        requests = drain.InFlightRequests()
+
+        with self.assertRaises(ValueError), requests.track():
+            raise ValueError
+
+        self.assertEqual(0, requests.count)
+
+    async def test__start_deadline(self):
+        requests = drain.InFlightRequests()
+        now = get_running_loop().time()
+
+        result = requests.start_deadline(10)
+        second = requests.start_deadline(20)
+
+        self.assertAlmostEqual(now + 10, result, delta=1)
+        self.assertEqual(result, second)
+        self.assertEqual(result, requests.deadline)
+
+    async def test__wait__idle(self):
+        requests = drain.InFlightRequests()
+
+        self.assertEqual(0, await requests.wait(10))
+        self.assertIsNotNone(requests.deadline)
+
+    @patch("daemon.drain.logger.info")
+    async def test__wait(self, info_patch: MagicMock):
+        requests = drain.InFlightRequests()
+
+        async def handle(seconds: float):
+            with requests.track():
+                await sleep(seconds)
+
+        tasks = [create_task(handle(0.01)), create_task(handle(0.02))]
+        await sleep(0)
+
+        result = await requests.wait(10)
+
+        info_patch.assert_called_once_with("waiting for 2 requests to finish")
+        self.assertTrue(all(task.done() for task in tasks))
+        self.assertEqual(0, result)
+        self.assertIsNone(requests._idle)
+
+    @patch("daemon.drain.logger.info")
+    async def test__wait__timeout(self, _):
+        requests = drain.InFlightRequests()
+
+        async def handle():
+            with requests.track():
+                await sleep(10)
+
+        task = create_task(handle())
+        await sleep(0)
+
+        result = await requests.wait(0.01)
+
+        self.assertEqual(1, result)
+        self.assertIsNone(requests._idle)
+        task.cancel()
+
+    @patch("daemon.drain.logger.info")
+    async def test__wait__shared_deadline(self, _):
+        requests = drain.InFlightRequests()
+        requests.start_deadline(0.01)
+
+        async def handle():
+            with requests.track():
+                await sleep(10)
+
+        task = create_task(handle())
+        await sleep(0.01)
+        start = get_running_loop().time()
+
+        result = await requests.wait(10)
+
+        self.assertLess(get_running_loop().time() - start, 1)
+        self.assertEqual(1, result)
+        task.cancel()
+
+    async def test__server__constructor(self):
+        config = MagicMock()
+
+        result = drain.DrainingServer(config, 30)
+
+        self.assertEqual(config, result.config)
+        self.assertEqual(30, result.timeout)
+
+    @patch("daemon.drain.logger.warning")
+    async def test__close_connections(self, warning_patch: MagicMock):
+        server = drain.DrainingServer(MagicMock(), 30)
+        server.server_state.connections = connections = {MagicMock(), MagicMock()}
+        server.server_state.tasks = tasks = {MagicMock()}
+
+        server._close_connections()
+
+        warning_patch.assert_called_once_with(
+            "shutdown timeout exceeded, closing 2 connections and cancelling 1 requests"
+        )
+        for connection in connections:
+            connection.transport.close.assert_called_once_with()
+        for task in tasks:
+            task.cancel.assert_called_once_with()
+
+    @patch("daemon.drain.logger.warning")
+    async def test__close_connections__finished(self, warning_patch: MagicMock):
+        server = drain.DrainingServer(MagicMock(), 30)
+        server.server_state.connections = set()
+        server.server_state.tasks = set()
+
+        server._close_connections()
+
+        warning_patch.assert_not_called()
+
+    async def test__shutdown(self):
+        for timeout, closed in [(0, True), (30, False)]:
+            with self.subTest(timeout=timeout), patch("daemon.drain.in_flight", drain.InFlightRequests()) as requests:
+                server = drain.DrainingServer(MagicMock(), timeout)
+                server._close_connections = MagicMock()
+                sockets = MagicMock()
+                calls = []
+
+                async def shutdown(_, sockets_):
+                    await sleep(0.01)
+                    calls.append(sockets_)
+
+                with patch("daemon.drain.uvicorn.Server.shutdown", shutdown):
+                    await server.shutdown(sockets)
+
+                self.assertEqual([sockets], calls)
+                self.assertEqual(closed, server._close_connections.called)
+                self.assertIsNotNone(requests.deadline)
+
+    async def test__shutdown__shared_deadline(self):
+        server = drain.DrainingServer(MagicMock(), 30)
+        server._close_connections = MagicMock()
+
+        async def shutdown(*_):
+            await sleep(0.02)
+
+        with patch("daemon.drain.in_flight", drain.InFlightRequests()) as requests:
+            requests.start_deadline(0.01)
+
+            with patch("daemon.drain.uvicorn.Server.shutdown", shutdown):
+                await server.shutdown()
+
+        server._close_connections.assert_called_once_with()
@@ -107,12 +107,14 @@ class TestEndpointCollection(IsolatedAsyncioTestCase):
                     prefix=f"/{name}",
                     tags=[f"[TEST] {name}" if test else name],
                     dependencies=[depends_patch()],
+                    route_class=endpoint_collection.MetricsRoute,
                 )
                 self.assertEqual(name, result._name)
                 self.assertEqual(description, result._description)
                 self.assertEqual(test, result._test)
                 self.assertEqual(disabled or test and not debug, result._disabled)
                 self.assertEqual([], result._endpoints)
+                self.assertEqual({}, result._routes)
 
     @patch("daemon.endpoint_collection.Body")
     @patch("daemon.endpoint_collection.default_parameter")
@@ -136,7 +138,7 @@ class TestEndpointCollection(IsolatedAsyncioTestCase):
                 name_from_func=name_from_func,
             ):
 
-                collection = MagicMock(_test=collection_test)
+                collection = MagicMock(_test=collection_test, _routes={}, routes=mock_list(3))
                 name = MagicMock()
                 args = mock_list(5)
                 kwargs = mock_dict(5, True)
@@ -169,6 +171,7 @@ class TestEndpointCollection(IsolatedAsyncioTestCase):
                     self.assertIs(result, func)
                     collection._endpoints.append.assert_not_called()
                     collection.post.assert_not_called()
+                    self.assertEqual({}, collection._routes)
                     continue
 
                 if name_from_func:
@@ -189,8 +192,29 @@ class TestEndpointCollection(IsolatedAsyncioTestCase):
                     **kwargs,
                 )
                 collection.post().assert_called_once_with(default_parameter_patch()())
+                self.assertEqual({name: collection.routes[-1]}, collection._routes)
                 self.assertEqual(collection.post()(), result)
 
+    @patch("daemon.endpoint_collection.stream_endpoint")
+    @patch("daemon.endpoint_collection.default_parameter")
+    @patch("daemon.endpoint_collection.format_docs")
+    async def test__endpoint__stream(
+        self,
+        format_docs_patch: MagicMock,
+        default_parameter_patch: MagicMock,
+        stream_endpoint_patch: MagicMock,
+    ):
+        collection = MagicMock(_test=False, _routes={}, routes=mock_list(3))
+        func = MagicMock(__doc__="foo")
+        stream_endpoint_patch.return_value.__name__ = "bar"
+
+        result = endpoint_collection.EndpointCollection.endpoint(collection, "foo", stream=True)(func)
+
+        stream_endpoint_patch.assert_called_once_with(default_parameter_patch()())
+        collection.post.assert_called_once_with("/foo", name="bar")
+        collection.post().assert_called_once_with(stream_endpoint_patch())
+        self.assertEqual(collection.post()(), result)
+
     async def test__name(self):
         collection = MagicMock()
         # noinspection PyArgumentList
@@ -201,6 +225,17 @@ class TestEndpointCollection(IsolatedAsyncioTestCase):
         # noinspection PyArgumentList
         self.assertEqual(collection._description, endpoint_collection.EndpointCollection.description.fget(collection))
 
+    async def test__get_route(self):
+        route = MagicMock()
+        for disabled in [False, True]:
+            with self.subTest(disabled=disabled):
+                collection = MagicMock(_disabled=disabled, _routes={"foo": route})
+
+                self.assertEqual(
+                    None if disabled else route, endpoint_collection.EndpointCollection.get_route(collection, "foo")
+                )
+                self.assertIsNone(endpoint_collection.EndpointCollection.get_route(collection, "bar"))
+
     async def test__register__disabled(self):
         app = MagicMock()
         collection = MagicMock(_disabled=True)
@@ -24,3 +24,22 @@ class TestEndpoints(TestCase):
             collection.register.assert_called_once_with(app)
 
         self.assertEqual([collection.register(app) for collection in collections[1::2]], result)
+
+    @patch("daemon.endpoints.ENDPOINT_COLLECTIONS")
+    def test__get_route(self, endpoint_collections_patch):
+        collections = [MagicMock(), MagicMock()]
+        collections[0].name, collections[1].name = "foo", "bar"
+        endpoint_collections_patch.__iter__.return_value = collections
+        name = MagicMock()
+
+        result = endpoints.get_route("bar", name)
+
+        collections[0].get_route.assert_not_called()
+        collections[1].get_route.assert_called_once_with(name)
+        self.assertEqual(collections[1].get_route(), result)
+
+    @patch("daemon.endpoints.ENDPOINT_COLLECTIONS")
+    def test__get_route__unknown_collection(self, endpoint_collections_patch):
+        endpoint_collections_patch.__iter__.return_value = [MagicMock()]
+
+        self.assertIsNone(endpoints.get_route("foo", "bar"))
@@ -12,7 +12,10 @@ VARIABLES: dict[str, EnvironmentVariable] = {
     "HOST": EnvironmentVariable(str, "HOST", "0.0.0.0"),  # noqa: S104
     "PORT": EnvironmentVariable(int, "PORT", 8000),
     "RELOAD": EnvironmentVariable(bool, "RELOAD", False),
+    "WORKERS": EnvironmentVariable(int, "WORKERS", 1),
+    "SHUTDOWN_TIMEOUT": EnvironmentVariable(int, "SHUTDOWN_TIMEOUT", 30),
     "DEBUG": EnvironmentVariable(bool, "DEBUG", False),
+    "OPENAPI_FILE": EnvironmentVariable(str, "OPENAPI_FILE", None),
     "API_TOKEN": EnvironmentVariable(str, "API_TOKEN", None),
     "DB_DRIVER": EnvironmentVariable(str, "SQL_DRIVER", "postgresql+asyncpg"),
     "DB_HOST": EnvironmentVariable(str, "SQL_HOST", "localhost"),
@@ -20,14 +23,29 @@ VARIABLES: dict[str, EnvironmentVariable] = {
     "DB_DATABASE": EnvironmentVariable(str, "SQL_DATABASE", "cryptic"),
     "DB_USERNAME": EnvironmentVariable(str, "SQL_USERNAME", "cryptic"),
     "DB_PASSWORD": EnvironmentVariable(str, "SQL_PASSWORD", "cryptic"),
+    "DB_REPLICAS": EnvironmentVariable(str, "SQL_REPLICAS", ""),
+    "DB_REPLICA_STRATEGY": EnvironmentVariable(str, "SQL_REPLICA_STRATEGY", "round_robin"),
     "POOL_RECYCLE": EnvironmentVariable(int, "POOL_RECYCLE", 300),
     "POOL_SIZE": EnvironmentVariable(int, "POOL_SIZE", 20),
     "MAX_OVERFLOW": EnvironmentVariable(int, "MAX_OVERFLOW", 20),
+    "POOL_LOG_INTERVAL": EnvironmentVariable(int, "POOL_LOG_INTERVAL", 60),
+    "POOL_WARMUP": EnvironmentVariable(int, "POOL_WARMUP", 0),
+    "POOL_WARMUP_STATEMENTS": EnvironmentVariable(bool, "POOL_WARMUP_STATEMENTS", False),
     "SQL_SHOW_STATEMENTS": EnvironmentVariable(bool, "SQL_SHOW_STATEMENTS", False),
     "SQL_CREATE_TABLES": EnvironmentVariable(bool, "SQL_CREATE_TABLES", False),
+    "SQL_STMT_CACHE_SIZE": EnvironmentVariable(int, "SQL_STMT_CACHE_SIZE", 100),
+    "SQL_STMT_CACHE_LIFETIME": EnvironmentVariable(int, "SQL_STMT_CACHE_LIFETIME", 300),
+    "SQL_PGBOUNCER": EnvironmentVariable(bool, "SQL_PGBOUNCER", False),
+    "SQL_SINGLE_FLIGHT": EnvironmentVariable(bool, "SQL_SINGLE_FLIGHT", False),
+    "SQL_REPEAT_THRESHOLD": EnvironmentVariable(int, "SQL_REPEAT_THRESHOLD", 20),
+    "SQL_REPEAT_STRICT": EnvironmentVariable(bool, "SQL_REPEAT_STRICT", False),
+    "SQL_SLOW_QUERY_MS": EnvironmentVariable(int, "SQL_SLOW_QUERY_MS", 500),
+    "SQL_EXPLAIN_RATE": EnvironmentVariable(float, "SQL_EXPLAIN_RATE", 0.0),
+    "WRITE_COALESCING_WINDOW": EnvironmentVariable(int, "WRITE_COALESCING_WINDOW", 0),
     "REDIS_HOST": EnvironmentVariable(str, "REDIS_HOST", "redis"),
     "REDIS_PORT": EnvironmentVariable(int, "REDIS_PORT", 6379),
     "REDIS_DB": EnvironmentVariable(int, "REDIS_DB", 0),
+    "REDIS_CACHE": EnvironmentVariable(bool, "REDIS_CACHE", False),
     "SENTRY_DSN": EnvironmentVariable(str, "SENTRY_DSN", None),
 }
 
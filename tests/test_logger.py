@@ -11,13 +11,13 @@ from tests._utils import mock_list
 
 
 class TestLogger(IsolatedAsyncioTestCase):
-    @patch("daemon.logger.SentryAsgiMiddleware")
-    @patch("daemon.logger.ignore_logger")
-    @patch("daemon.logger.LoggingIntegration")
-    @patch("daemon.logger.SqlalchemyIntegration")
-    @patch("daemon.logger.AioHttpIntegration")
+    @patch("sentry_sdk.integrations.asgi.SentryAsgiMiddleware")
+    @patch("sentry_sdk.integrations.logging.ignore_logger")
+    @patch("sentry_sdk.integrations.logging.LoggingIntegration")
+    @patch("sentry_sdk.integrations.sqlalchemy.SqlalchemyIntegration")
+    @patch("sentry_sdk.integrations.aiohttp.AioHttpIntegration")
     @patch("daemon.logger.logging")
-    @patch("daemon.logger.sentry_sdk.init")
+    @patch("sentry_sdk.init")
     async def test__setup_sentry(
         self,
         sentry_sdk_init_patch: MagicMock,
@@ -48,6 +48,34 @@ class TestMain(IsolatedAsyncioTestCase):
         logger_patch.warning.assert_not_called()
         exit_patch.assert_called_once_with(1)
 
+    @patch("daemon.main.setup_sentry")
+    @patch("daemon.daemon.app")
+    @patch("daemon.main.SENTRY_DSN")
+    async def test__init_sentry(self, sentry_dsn_patch: MagicMock, app_patch: MagicMock, setup_sentry_patch: MagicMock):
+        main.init_sentry()
+
+        setup_sentry_patch.assert_called_once_with(app_patch, sentry_dsn_patch, "python-daemon", "0.1.0")
+
+    @patch("daemon.main.setup_sentry")
+    @patch("daemon.main.SENTRY_DSN", "")
+    async def test__init_sentry__no_dsn(self, setup_sentry_patch: MagicMock):
+        main.init_sentry()
+
+        setup_sentry_patch.assert_not_called()
+
+    @patch("daemon.main.SHUTDOWN_TIMEOUT")
+    @patch("daemon.main.DrainingServer")
+    @patch("daemon.main.init_sentry")
+    async def test__run_worker(self, init_sentry_patch: MagicMock, server_patch: MagicMock, timeout_patch: MagicMock):
+        config, sock = MagicMock(), MagicMock()
+
+        main.run_worker(config, sock)
+
+        init_sentry_patch.assert_called_once_with()
+        server_patch.assert_called_once_with(config, timeout_patch)
+        server_patch.return_value.run.assert_called_once_with(sockets=[sock])
+
+    @patch("daemon.main.Supervisor")
     @patch("daemon.main.RELOAD")
     @patch("daemon.main.PORT")
     @patch("daemon.main.HOST")
@@ -58,19 +86,77 @@ class TestMain(IsolatedAsyncioTestCase):
         host_patch: MagicMock,
         port_patch: MagicMock,
         reload_patch: MagicMock,
+        supervisor_patch: MagicMock,
+    ):
+        for workers in [1, 4]:
+            with self.subTest(workers=workers), patch("daemon.main.WORKERS", workers):
+                uvicorn_run_patch.reset_mock()
+
+                main.run_daemon()
+
+                uvicorn_run_patch.assert_called_once_with(
+                    "daemon.daemon:app",
+                    host=host_patch,
+                    port=port_patch,
+                    reload=reload_patch,
+                )
+                supervisor_patch.assert_not_called()
+
+    @patch("daemon.main.SHUTDOWN_TIMEOUT")
+    @patch("daemon.main.DrainingServer")
+    @patch("daemon.main.Supervisor")
+    @patch("daemon.main.uvicorn.Config")
+    @patch("daemon.main.WORKERS", 1)
+    @patch("daemon.main.RELOAD", False)
+    @patch("daemon.main.PORT")
+    @patch("daemon.main.HOST")
+    @patch("daemon.main.uvicorn.run")
+    async def test__run_daemon__single_worker(
+        self,
+        uvicorn_run_patch: MagicMock,
+        host_patch: MagicMock,
+        port_patch: MagicMock,
+        config_patch: MagicMock,
+        supervisor_patch: MagicMock,
+        server_patch: MagicMock,
+        timeout_patch: MagicMock,
     ):
         main.run_daemon()
 
-        uvicorn_run_patch.assert_called_once_with(
-            "daemon.daemon:app",
-            host=host_patch,
-            port=port_patch,
-            reload=reload_patch,
-        )
+        uvicorn_run_patch.assert_not_called()
+        supervisor_patch.assert_not_called()
+        config_patch.assert_called_once_with("daemon.daemon:app", host=host_patch, port=port_patch)
+        server_patch.assert_called_once_with(config_patch(), timeout_patch)
+        server_patch().run.assert_called_once_with()
+
+    @patch("daemon.main.DrainingServer")
+    @patch("daemon.main.Supervisor")
+    @patch("daemon.main.uvicorn.Config")
+    @patch("daemon.main.WORKERS", 4)
+    @patch("daemon.main.RELOAD", False)
+    @patch("daemon.main.PORT")
+    @patch("daemon.main.HOST")
+    @patch("daemon.main.uvicorn.run")
+    async def test__run_daemon__workers(
+        self,
+        uvicorn_run_patch: MagicMock,
+        host_patch: MagicMock,
+        port_patch: MagicMock,
+        config_patch: MagicMock,
+        supervisor_patch: MagicMock,
+        server_patch: MagicMock,
+    ):
+        main.run_daemon()
+
+        uvicorn_run_patch.assert_not_called()
+        server_patch.assert_not_called()
+        config_patch.assert_called_once_with("daemon.daemon:app", host=host_patch, port=port_patch)
+        supervisor_patch.assert_called_once_with(config_patch(), main.run_worker, 4)
+        supervisor_patch().run.assert_called_once_with()
 
     @patch("daemon.main.run_daemon")
     @patch("daemon.main.check_api_token")
-    @patch("daemon.main.app")
+    @patch("daemon.daemon.app")
     @patch("daemon.main.setup_sentry")
     @patch("daemon.main.SENTRY_DSN")
     async def test__main__sentry(
@@ -89,7 +175,7 @@ class TestMain(IsolatedAsyncioTestCase):
         )
         run_daemon_patch.side_effect = lambda: check_api_token_patch.assert_called_once_with()
 
-        main.main()
+        main.main([])
 
         run_daemon_patch.assert_called_once_with()
 
@@ -105,11 +191,38 @@ class TestMain(IsolatedAsyncioTestCase):
     ):
         run_daemon_patch.side_effect = lambda: check_api_token_patch.assert_called_once_with()
 
-        main.main()
+        main.main([])
 
         run_daemon_patch.assert_called_once_with()
         setup_sentry_patch.assert_not_called()
 
+    @patch("daemon.main.init_sentry")
+    @patch("daemon.main.run_daemon")
+    @patch("daemon.main.format_report")
+    @patch("daemon.main.profile_startup")
+    @patch("builtins.print")
+    async def test__main__profile_startup(
+        self,
+        print_patch: MagicMock,
+        profile_startup_patch: MagicMock,
+        format_report_patch: MagicMock,
+        run_daemon_patch: MagicMock,
+        init_sentry_patch: MagicMock,
+    ):
+        profile_startup_patch.return_value = phases, imports = MagicMock(), MagicMock()
+
+        main.main(["--profile-startup"])
+
+        profile_startup_patch.assert_called_once_with()
+        format_report_patch.assert_called_once_with(phases, imports)
+        print_patch.assert_called_once_with(format_report_patch())
+        init_sentry_patch.assert_not_called()
+        run_daemon_patch.assert_not_called()
+
+    async def test__parse_args(self):
+        self.assertFalse(main.parse_args([]).profile_startup)
+        self.assertTrue(main.parse_args(["--profile-startup"]).profile_startup)
+
     @patch("daemon.main.main")
     async def test__main(self, main_patch: MagicMock):
         run_module("daemon")
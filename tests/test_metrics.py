@@ -0,0 +1,149 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, MagicMock
+
+from fastapi.exceptions import RequestValidationError
+from starlette.exceptions import HTTPException
+
+from daemon import metrics
+from daemon.exceptions.api_exception import APIException
+from tests._utils import AsyncMock
+
+
+class TestMetrics(IsolatedAsyncioTestCase):
+    async def test__get_error(self):
+        api_exception = type("TestException", (APIException,), {"error": "test"})()
+
+        for exception, expected in [
+            (api_exception, "test"),
+            (HTTPException(401), "401 Unauthorized"),
+            (RequestValidationError([]), "422 Unprocessable Entity"),
+            (ZeroDivisionError(), "500 Internal Server Error"),
+        ]:
+            with self.subTest(exception=exception):
+                self.assertEqual(expected, metrics.get_error(exception))
+
+    async def test__escape(self):
+        self.assertEqual('a\\\\b\\"c\\nd', metrics.escape('a\\b"c\nd'))
+
+    async def test__histogram(self):
+        histogram = metrics.Histogram((1, 2, 5))
+
+        for value in [0.5, 1, 1.5, 3, 7, 8]:
+            histogram.observe(value)
+
+        self.assertEqual([("1", 2), ("2", 3), ("5", 4), ("+Inf", 6)], list(histogram.buckets()))
+        self.assertEqual(21, histogram.sum)
+
+    async def test__histogram__count(self):
+        histogram = metrics.Histogram((1,))
+
+        for value in [0.5, 2, 3]:
+            histogram.observe(value)
+
+        self.assertEqual(3, histogram.count)
+
+    async def test__render_histogram(self):
+        histogram = metrics.Histogram((1,))
+        histogram.observe(0.5)
+
+        for labels, expected in [
+            (
+                'a="b"',
+                [
+                    'foo_bucket{a="b",le="1"} 1',
+                    'foo_bucket{a="b",le="+Inf"} 1',
+                    'foo_sum{a="b"} 0.5',
+                    'foo_count{a="b"} 1',
+                ],
+            ),
+            ("", ['foo_bucket{le="1"} 1', 'foo_bucket{le="+Inf"} 1', "foo_sum 0.5", "foo_count 1"]),
+        ]:
+            with self.subTest(labels=labels):
+                self.assertEqual(expected, metrics.render_histogram("foo", labels, histogram))
+
+    async def test__endpoint_metrics(self):
+        result = metrics.EndpointMetrics()
+
+        self.assertEqual(0, result.requests)
+        self.assertEqual({}, result.errors)
+        self.assertEqual(0, result.in_flight)
+        self.assertEqual(list(map(str, metrics.LATENCY_BUCKETS)) + ["+Inf"], [b for b, _ in result.latency.buckets()])
+        self.assertIsInstance(result.track(), metrics.Tracker)
+
+    @patch("daemon.metrics.perf_counter")
+    async def test__tracker(self, perf_counter_patch: MagicMock):
+        endpoint_metrics = metrics.EndpointMetrics()
+        perf_counter_patch.side_effect = [1, 1.5, 2, 4]
+
+        with endpoint_metrics.track():
+            self.assertEqual(1, endpoint_metrics.in_flight)
+            self.assertEqual(0, endpoint_metrics.requests)
+
+        with self.assertRaises(ZeroDivisionError):
+            with endpoint_metrics.track():
+                raise ZeroDivisionError
+
+        self.assertEqual(0, endpoint_metrics.in_flight)
+        self.assertEqual(2, endpoint_metrics.requests)
+        self.assertEqual({"500 Internal Server Error": 1}, endpoint_metrics.errors)
+        self.assertEqual(2.5, endpoint_metrics.latency.sum)
+
+    async def test__get(self):
+        registry = metrics.Metrics()
+
+        result = registry.get("/foo")
+
+        self.assertIsInstance(result, metrics.EndpointMetrics)
+        self.assertIs(result, registry.get("/foo"))
+        self.assertIsNot(result, registry.get("/bar"))
+
+    async def test__register(self):
+        registry = metrics.Metrics()
+        registry.register(lambda: ["foo 1", "bar 2"])
+
+        result = registry.render().splitlines()
+
+        self.assertEqual(["foo 1", "bar 2"], result[-2:])
+
+    async def test__render(self):
+        registry = metrics.Metrics()
+        foo = registry.get("/foo")
+        foo.requests, foo.in_flight, foo.errors = 3, 1, {'b"': 2, "a": 1}
+        foo.latency.observe(0.003)
+        registry.get("/bar")
+
+        result = registry.render().splitlines()
+
+        self.assertIn('daemon_requests_total{endpoint="/foo"} 3', result)
+        self.assertIn('daemon_requests_total{endpoint="/bar"} 0', result)
+        self.assertIn('daemon_errors_total{endpoint="/foo",error="a"} 1', result)
+        self.assertIn('daemon_errors_total{endpoint="/foo",error="b\\""} 2', result)
+        self.assertIn('daemon_requests_in_flight{endpoint="/foo"} 1', result)
+        self.assertIn('daemon_request_duration_seconds_bucket{endpoint="/foo",le="0.0025"} 0', result)
+        self.assertIn('daemon_request_duration_seconds_bucket{endpoint="/foo",le="0.005"} 1', result)
+        self.assertIn('daemon_request_duration_seconds_bucket{endpoint="/foo",le="+Inf"} 1', result)
+        self.assertIn('daemon_request_duration_seconds_sum{endpoint="/foo"} 0.003', result)
+        self.assertIn('daemon_request_duration_seconds_count{endpoint="/foo"} 1', result)
+        self.assertIn('daemon_request_duration_seconds_count{endpoint="/bar"} 0', result)
+        self.assertIn("# TYPE daemon_request_duration_seconds histogram", result)
+        self.assertLess(
+            result.index('daemon_requests_total{endpoint="/bar"} 0'),
+            result.index('daemon_requests_total{endpoint="/foo"} 3'),
+        )
+
+    @patch("daemon.metrics.metrics")
+    @patch("daemon.metrics.APIRoute.get_route_handler")
+    async def test__metrics_route(self, get_route_handler_patch: MagicMock, metrics_patch: MagicMock):
+        get_route_handler_patch.return_value = handler = AsyncMock()
+        track = metrics_patch.get.return_value.track.return_value
+        track.__enter__.side_effect = lambda: handler.assert_not_called()
+        route = metrics.MetricsRoute.__new__(metrics.MetricsRoute)
+        route.path = "/foo/bar"
+        request = MagicMock()
+
+        result = await metrics.MetricsRoute.get_route_handler(route)(request)
+
+        metrics_patch.get.assert_called_once_with("/foo/bar")
+        handler.assert_called_once_with(request)
+        track.__exit__.assert_called_once_with(None, None, None)
+        self.assertEqual(handler(), result)
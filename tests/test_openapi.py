@@ -0,0 +1,152 @@
+import json
+import os
+import sys
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, MagicMock
+
+from fastapi import FastAPI
+from starlette.routing import Route
+
+from daemon import openapi
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/foo")
+    async def foo():
+        return {}
+
+    @app.get("/hidden", include_in_schema=False)
+    async def hidden():
+        return {}
+
+    return app
+
+
+class TestOpenAPI(IsolatedAsyncioTestCase):
+    async def test__get_paths(self):
+        self.assertEqual({"/foo"}, openapi.get_paths(make_app()))
+
+    async def test__load_schema__no_file(self):
+        app = make_app()
+
+        for path in [None, "/does/not/exist.json"]:
+            with self.subTest(path=path):
+                app.openapi_schema = {"stale": True}
+
+                result = openapi.load_schema(app, path)
+
+                self.assertEqual(["/foo"], list(result["paths"]))
+                self.assertIs(app.openapi_schema, result)
+
+    async def test__load_schema__file(self):
+        app = make_app()
+        schema = {"openapi": "3.0.2", "paths": {"/foo": {}}}
+
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "openapi.json")
+            with open(path, "w") as file:
+                json.dump(schema, file)
+
+            result = openapi.load_schema(app, path)
+
+        self.assertEqual(schema, result)
+        self.assertIs(app.openapi_schema, result)
+
+    @patch("daemon.openapi.logger.warning")
+    async def test__load_schema__outdated(self, warning_patch: MagicMock):
+        app = make_app()
+
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "openapi.json")
+            with open(path, "w") as file:
+                json.dump({"paths": {"/foo": {}, "/bar": {}}}, file)
+
+            result = openapi.load_schema(app, path)
+
+        warning_patch.assert_called_once_with(
+            f"openapi schema in {path} does not match the endpoints, generating a new one"
+        )
+        self.assertEqual(["/foo"], list(result["paths"]))
+
+    async def test__document(self):
+        document = openapi.OpenAPIDocument({"paths": {}})
+
+        self.assertEqual(b'{"paths":{}}', document.body)
+        self.assertRegex(document.etag, r'^"[0-9a-f]{64}"$')
+
+    async def test__is_fresh(self):
+        document = openapi.OpenAPIDocument({"paths": {}})
+
+        for header, expected in [
+            (None, False),
+            ('"foo"', False),
+            (document.etag, True),
+            (f"W/{document.etag}", True),
+            (f'"foo", {document.etag}', True),
+            ("*", True),
+        ]:
+            with self.subTest(header=header):
+                request = MagicMock(headers={} if header is None else {"if-none-match": header})
+
+                self.assertEqual(expected, document.is_fresh(request))
+
+    async def test__endpoint(self):
+        document = openapi.OpenAPIDocument({"paths": {}})
+        document.is_fresh = MagicMock(return_value=False)
+        request = MagicMock()
+
+        result = await document.endpoint(request)
+
+        document.is_fresh.assert_called_once_with(request)
+        self.assertEqual(200, result.status_code)
+        self.assertEqual(document.body, result.body)
+        self.assertEqual("application/json", result.media_type)
+        self.assertEqual(document.etag, result.headers["etag"])
+
+    async def test__endpoint__not_modified(self):
+        document = openapi.OpenAPIDocument({"paths": {}})
+        document.is_fresh = MagicMock(return_value=True)
+
+        result = await document.endpoint(MagicMock())
+
+        self.assertEqual(304, result.status_code)
+        self.assertEqual(b"", result.body)
+        self.assertEqual(document.etag, result.headers["etag"])
+
+    @patch("daemon.openapi.OpenAPIDocument")
+    @patch("daemon.openapi.load_schema")
+    async def test__setup_openapi(self, load_schema_patch: MagicMock, document_patch: MagicMock):
+        app = make_app()
+        path = MagicMock()
+        count = len(app.router.routes)
+
+        result = openapi.setup_openapi(app, path)
+
+        load_schema_patch.assert_called_once_with(app, path)
+        document_patch.assert_called_once_with(load_schema_patch())
+        self.assertEqual(document_patch(), result)
+        self.assertEqual(count, len(app.router.routes))
+        routes = [route for route in app.router.routes if isinstance(route, Route) and route.path == "/openapi.json"]
+        self.assertEqual(1, len(routes))
+        self.assertEqual(document_patch().endpoint, routes[0].endpoint)
+        self.assertFalse(routes[0].include_in_schema)
+
+    async def test__parse_args(self):
+        self.assertEqual("openapi.json", openapi.parse_args([]).path)
+        self.assertEqual("/app/openapi.json", openapi.parse_args(["/app/openapi.json"]).path)
+
+    @patch.dict(sys.modules, {"daemon.daemon": MagicMock()})
+    async def test__main(self):
+        app = sys.modules["daemon.daemon"].app
+        app.openapi.return_value = {"paths": {}}
+
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "openapi.json")
+
+            openapi.main([path])
+
+            with open(path, "rb") as file:
+                self.assertEqual(b'{"paths":{}}', file.read())
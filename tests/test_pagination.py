@@ -0,0 +1,134 @@
+from datetime import datetime, date
+from decimal import Decimal
+from unittest import TestCase
+from uuid import UUID
+
+from sqlalchemy import Column, String, Integer, DateTime, Date, Numeric, Float, Boolean
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.future import select
+
+from daemon.database import pagination
+from daemon.exceptions.pagination import InvalidCursorException
+from daemon.models.counter import Counter
+
+Base = declarative_base()
+
+
+class Event(Base):
+    __tablename__ = "event"
+
+    id = Column(String(36), primary_key=True)
+    number = Column(Integer, primary_key=True)
+    created = Column(DateTime, nullable=False)
+    day = Column(Date, nullable=False)
+    amount = Column(Numeric, nullable=False)
+    ratio = Column(Float, nullable=False)
+    active = Column(Boolean, nullable=False)
+    note = Column(String)
+
+
+def compile_(clause) -> str:
+    return str(clause.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+class TestPagination(TestCase):
+    def test__get_sort_keys(self):
+        statement = select(Counter)
+
+        for order_by, expected in [
+            ([], [(Counter.user_id.expression, False)]),
+            ([Counter.value], [(Counter.value, False), (Counter.user_id.expression, False)]),
+            ([Counter.value.desc()], [(Counter.value.expression, True), (Counter.user_id.expression, True)]),
+            ([Counter.value.asc()], [(Counter.value.expression, False), (Counter.user_id.expression, False)]),
+            ([Counter.user_id.desc()], [(Counter.user_id.expression, True)]),
+        ]:
+            with self.subTest(order_by=order_by):
+                result = pagination.get_sort_keys(statement, order_by)
+
+                self.assertEqual([(column.key, desc) for column, desc in expected], [(c.key, d) for c, d in result])
+
+    def test__get_sort_keys__composite_primary_key(self):
+        result = pagination.get_sort_keys(select(Event), [Event.number.desc()])
+
+        self.assertEqual([("number", True), ("id", True)], [(column.key, desc) for column, desc in result])
+
+    def test__get_sort_keys__nullable(self):
+        with self.assertRaises(ValueError):
+            pagination.get_sort_keys(select(Event), [Event.note])
+
+    def test__cursor(self):
+        keys = pagination.get_sort_keys(select(Event), [Event.created, Event.day, Event.amount])
+        values = [datetime(2021, 6, 1, 12, 30), date(2021, 6, 2), Decimal("1.50"), "foo", 42]
+
+        cursor = pagination.encode_cursor(values)
+
+        self.assertRegex(cursor, r"^[A-Za-z0-9_-]+$")
+        self.assertEqual(values, pagination.decode_cursor(cursor, keys))
+
+    def test__cursor__uuid(self):
+        column = Column("id", postgresql.UUID(as_uuid=True))
+        value = UUID("1e5b6a71-3c4e-4f4c-9a3e-5cb4a0a3b0a6")
+
+        result = pagination.decode_cursor(pagination.encode_cursor([value, None]), [(column, False)] * 2)
+
+        self.assertEqual([value, None], result)
+
+    def test__decode_cursor__invalid(self):
+        keys = pagination.get_sort_keys(select(Counter), [Counter.value])
+
+        for cursor in ["!", "a", "e30", pagination.encode_cursor([1]), pagination.encode_cursor([1, 2, 3]), "_-8"]:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursorException):
+                    pagination.decode_cursor(cursor, keys)
+
+    def test__decode_cursor__invalid_value(self):
+        for column, value in [
+            (Event.number, "abc"),
+            (Event.number, True),
+            (Event.number, 1.5),
+            (Event.id, 42),
+            (Event.ratio, "1.5"),
+            (Event.active, 1),
+            (Event.amount, "abc"),
+            (Event.amount, 1),
+            (Event.created, "yesterday"),
+            (Event.day, 20210601),
+            (Column("id", postgresql.UUID(as_uuid=True)), "foo"),
+        ]:
+            with self.subTest(column=column.key, value=value):
+                with self.assertRaises(InvalidCursorException):
+                    pagination.decode_cursor(pagination.encode_cursor([value]), [(column, False)])
+
+    def test__decode_cursor__float(self):
+        result = pagination.decode_cursor(
+            pagination.encode_cursor([2, 1.5, True]), [(Event.ratio, False)] * 2 + [(Event.active, False)]
+        )
+
+        self.assertEqual([2.0, 1.5, True], result)
+        self.assertIsInstance(result[0], float)
+
+    def test__seek__single_column(self):
+        for descending, operator in [(False, ">"), (True, "<")]:
+            with self.subTest(descending=descending):
+                result = pagination.seek([(Counter.user_id, descending)], ["foo"])
+
+                self.assertEqual(f"counter.user_id {operator} 'foo'", compile_(result))
+
+    def test__seek__row_value(self):
+        for descending, operator in [(False, ">"), (True, "<")]:
+            with self.subTest(descending=descending):
+                result = pagination.seek([(Counter.value, descending), (Counter.user_id, descending)], [42, "foo"])
+
+                self.assertEqual(f"(counter.value, counter.user_id) {operator} (42, 'foo')", compile_(result))
+
+    def test__seek__mixed_directions(self):
+        keys = [(Event.number, True), (Event.amount, False), (Event.id, True)]
+
+        result = pagination.seek(keys, [1, 2, "foo"])
+
+        self.assertEqual(
+            "event.number < 1 OR event.number = 1 AND event.amount > 2 "
+            "OR event.number = 1 AND event.amount = 2 AND event.id < 'foo'",
+            compile_(result),
+        )
@@ -0,0 +1,247 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, MagicMock
+
+from sqlalchemy.exc import DisconnectionError
+
+from daemon.database import pool
+from tests._utils import AsyncMock
+
+
+def make_pool(metrics):
+    obj = pool.InstrumentedPool.__new__(pool.InstrumentedPool)
+    obj.metrics = metrics
+    return obj
+
+
+class TestPool(IsolatedAsyncioTestCase):
+    @patch("daemon.database.pool.perf_counter")
+    @patch("daemon.database.pool.AsyncAdaptedQueuePool.connect")
+    async def test__instrumented_pool__connect(self, connect_patch: MagicMock, perf_counter_patch: MagicMock):
+        obj = make_pool(MagicMock())
+        perf_counter_patch.side_effect = [2, 5]
+
+        result = obj.connect()
+
+        connect_patch.assert_called_once_with()
+        obj.metrics.checkout_wait.observe.assert_called_once_with(3)
+        self.assertEqual(connect_patch(), result)
+
+    @patch("daemon.database.pool.perf_counter")
+    @patch("daemon.database.pool.AsyncAdaptedQueuePool.connect")
+    async def test__instrumented_pool__connect__error(self, connect_patch: MagicMock, perf_counter_patch: MagicMock):
+        obj = make_pool(MagicMock())
+        perf_counter_patch.side_effect = [2, 7]
+        connect_patch.side_effect = TimeoutError
+
+        with self.assertRaises(TimeoutError):
+            obj.connect()
+
+        obj.metrics.checkout_wait.observe.assert_called_once_with(5)
+
+    @patch("daemon.database.pool.AsyncAdaptedQueuePool.connect")
+    async def test__instrumented_pool__connect__no_metrics(self, connect_patch: MagicMock):
+        obj = make_pool(None)
+
+        self.assertEqual(connect_patch(), obj.connect())
+
+    @patch("daemon.database.pool.AsyncAdaptedQueuePool.recreate")
+    async def test__instrumented_pool__recreate(self, recreate_patch: MagicMock):
+        obj = make_pool(MagicMock())
+
+        result = obj.recreate()
+
+        recreate_patch.assert_called_once_with()
+        self.assertEqual(recreate_patch(), result)
+        self.assertEqual(obj.metrics, result.metrics)
+
+    async def test__constructor(self):
+        result = pool.PoolMetrics(300)
+
+        self.assertEqual(300, result._recycle)
+        self.assertIsNone(result._engine)
+        self.assertIsNone(result._log_task)
+        for name in ["opened", "recycled", "invalidated", "pre_ping_failures", "overflow_checkouts", "peak_overflow"]:
+            self.assertEqual(0, getattr(result, name))
+        self.assertEqual(0, result.checkout_wait.count)
+        self.assertEqual(0, result.held.count)
+
+    @patch("daemon.database.pool.event.listen")
+    async def test__attach(self, listen_patch: MagicMock):
+        obj, engine = MagicMock(), MagicMock()
+
+        pool.PoolMetrics.attach(obj, engine)
+
+        self.assertEqual(engine, obj._engine)
+        self.assertEqual(obj, engine.pool.metrics)
+        for name, handler in [
+            ("connect", obj._on_connect),
+            ("checkout", obj._on_checkout),
+            ("checkin", obj._on_checkin),
+            ("invalidate", obj._on_invalidate),
+            ("close", obj._on_close),
+        ]:
+            listen_patch.assert_any_call(engine.pool, name, handler)
+
+    async def test__on_connect(self):
+        obj = MagicMock(opened=3)
+
+        pool.PoolMetrics._on_connect(obj, MagicMock(), MagicMock())
+
+        self.assertEqual(4, obj.opened)
+
+    @patch("daemon.database.pool.perf_counter")
+    async def test__on_checkout(self, perf_counter_patch: MagicMock):
+        for overflow, expected in [(-2, 0), (0, 0), (3, 1)]:
+            with self.subTest(overflow=overflow):
+                obj = MagicMock(overflow_checkouts=0, peak_overflow=1)
+                obj._engine.pool.overflow.return_value = overflow
+                record = MagicMock(info={})
+
+                pool.PoolMetrics._on_checkout(obj, MagicMock(), record, MagicMock())
+
+                self.assertEqual(perf_counter_patch(), record.info["checkout_time"])
+                self.assertEqual(expected, obj.overflow_checkouts)
+                self.assertEqual(3 if expected else 1, obj.peak_overflow)
+
+    @patch("daemon.database.pool.perf_counter")
+    async def test__on_checkin(self, perf_counter_patch: MagicMock):
+        obj = MagicMock()
+        record = MagicMock(info={"checkout_time": 3})
+        perf_counter_patch.return_value = 10
+
+        pool.PoolMetrics._on_checkin(obj, MagicMock(), record)
+
+        obj.held.observe.assert_called_once_with(7)
+        self.assertEqual({}, record.info)
+
+    async def test__on_checkin__not_checked_out(self):
+        for record in [None, MagicMock(info={})]:
+            with self.subTest(record=record):
+                obj = MagicMock()
+
+                pool.PoolMetrics._on_checkin(obj, MagicMock(), record)
+
+                obj.held.observe.assert_not_called()
+
+    async def test__on_invalidate(self):
+        for exception, pre_ping_failures, invalidated in [
+            (DisconnectionError(), 1, 0),
+            (Exception(), 0, 1),
+            (None, 0, 1),
+        ]:
+            with self.subTest(exception=exception):
+                obj = MagicMock(pre_ping_failures=0, invalidated=0)
+                record = MagicMock(info={})
+
+                pool.PoolMetrics._on_invalidate(obj, MagicMock(), record, exception)
+
+                self.assertTrue(record.info["invalidated"])
+                self.assertEqual(pre_ping_failures, obj.pre_ping_failures)
+                self.assertEqual(invalidated, obj.invalidated)
+
+    @patch("daemon.database.pool.time")
+    async def test__on_close(self, time_patch: MagicMock):
+        time_patch.return_value = 1000
+
+        for recycle, starttime, invalidated, expected in [
+            (300, 500, False, 1),
+            (300, 800, False, 0),
+            (300, 500, True, 0),
+            (-1, 500, False, 0),
+        ]:
+            with self.subTest(recycle=recycle, starttime=starttime, invalidated=invalidated):
+                obj = MagicMock(_recycle=recycle, recycled=0)
+                record = MagicMock(starttime=starttime, info={"invalidated": invalidated})
+
+                pool.PoolMetrics._on_close(obj, MagicMock(), record)
+
+                self.assertEqual(expected, obj.recycled)
+
+    async def test__render(self):
+        obj = pool.PoolMetrics(300)
+        obj.opened, obj.recycled, obj.pre_ping_failures = 5, 2, 1
+        obj.checkout_wait.observe(0.002)
+        engine = obj._engine = MagicMock()
+        engine.pool.size.return_value = 20
+        engine.pool.checkedout.return_value = 3
+        engine.pool.overflow.return_value = -17
+
+        result = obj.render()
+
+        for line in [
+            "daemon_db_pool_size 20",
+            "daemon_db_pool_checked_out 3",
+            "daemon_db_pool_overflow 0",
+            "daemon_db_pool_connections_opened_total 5",
+            "daemon_db_pool_connections_recycled_total 2",
+            "daemon_db_pool_connections_invalidated_total 0",
+            "daemon_db_pool_pre_ping_failures_total 1",
+            "daemon_db_pool_overflow_checkouts_total 0",
+            'daemon_db_pool_checkout_wait_seconds_bucket{le="0.005"} 1',
+            "daemon_db_pool_checkout_wait_seconds_count 1",
+            "daemon_db_pool_connection_held_seconds_count 0",
+        ]:
+            self.assertIn(line, result)
+
+    async def test__render__no_engine(self):
+        result = pool.PoolMetrics(300).render()
+
+        self.assertNotIn("# TYPE daemon_db_pool_size gauge", result)
+        self.assertIn("daemon_db_pool_connections_opened_total 0", result)
+
+    async def test__summary(self):
+        obj = pool.PoolMetrics(300)
+        for value in [0.001, 0.003]:
+            obj.checkout_wait.observe(value)
+        obj.held.observe(0.01)
+        obj.opened, obj.recycled, obj.pre_ping_failures, obj.peak_overflow = 4, 2, 1, 5
+
+        result = obj.summary(30)
+
+        self.assertEqual(
+            "connection pool: 2 checkouts (avg wait 2.00ms, avg held 10.00ms), peak overflow 5, "
+            "8.0 opened/min, 4.0 recycled/min, 1 pre-ping failures",
+            result,
+        )
+        self.assertEqual(0, obj.peak_overflow)
+        self.assertEqual(
+            "connection pool: 0 checkouts (avg wait 0.00ms, avg held 0.00ms), peak overflow 0, "
+            "0.0 opened/min, 0.0 recycled/min, 0 pre-ping failures",
+            obj.summary(30),
+        )
+
+    @patch("daemon.database.pool.logger.info")
+    @patch("daemon.database.pool.sleep", new_callable=AsyncMock)
+    async def test__log_summaries(self, sleep_patch: MagicMock, logger_info_patch: MagicMock):
+        obj = MagicMock()
+        logger_info_patch.side_effect = [None, StopAsyncIteration]
+
+        with self.assertRaises(StopAsyncIteration):
+            await pool.PoolMetrics._log_summaries(obj, 42)
+
+        sleep_patch.assert_called_with(42)
+        self.assertEqual(2, sleep_patch.call_count)
+        obj.summary.assert_called_with(42)
+        logger_info_patch.assert_called_with(obj.summary())
+
+    @patch("daemon.database.pool.create_task")
+    async def test__start_logging(self, create_task_patch: MagicMock):
+        obj = MagicMock(_log_task=None)
+        obj._log_summaries = MagicMock()
+
+        pool.PoolMetrics.start_logging(obj, 42)
+        pool.PoolMetrics.start_logging(obj, 42)
+
+        obj._log_summaries.assert_called_once_with(42)
+        create_task_patch.assert_called_once_with(obj._log_summaries.return_value)
+        self.assertEqual(create_task_patch.return_value, obj._log_task)
+
+    async def test__stop_logging(self):
+        task = MagicMock()
+        obj = MagicMock(_log_task=task)
+
+        pool.PoolMetrics.stop_logging(obj)
+        pool.PoolMetrics.stop_logging(obj)
+
+        task.cancel.assert_called_once_with()
+        self.assertIsNone(obj._log_task)
@@ -0,0 +1,209 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, MagicMock, call
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+from daemon.database import query_stats
+
+
+class TestQueryStats(IsolatedAsyncioTestCase):
+    async def test__query_stats__constructor(self):
+        result = query_stats.QueryStats()
+
+        self.assertEqual(0, result.statements)
+        self.assertEqual(0, result.rows)
+        self.assertEqual(0, result.duration)
+        self.assertEqual({}, result.shapes)
+
+    async def test__query_budget(self):
+        monitor = query_stats.QueryMonitor(MagicMock(return_value=None))
+
+        with query_stats.QueryBudget(monitor, 2) as budget:
+            self.assertEqual([budget], monitor.budgets)
+            monitor._before_cursor_execute(MagicMock(info={}), None, "SELECT 1", None, None, False)
+            monitor._before_cursor_execute(MagicMock(info={}), None, "SELECT 2", None, None, False)
+
+        self.assertEqual([], monitor.budgets)
+        self.assertEqual(["SELECT 1", "SELECT 2"], budget.statements)
+
+    async def test__query_budget__exceeded(self):
+        monitor = query_stats.QueryMonitor(MagicMock(return_value=None))
+
+        with self.assertRaises(AssertionError) as context:
+            with query_stats.QueryBudget(monitor, 1):
+                monitor._before_cursor_execute(MagicMock(info={}), None, "SELECT 1", None, None, False)
+                monitor._before_cursor_execute(MagicMock(info={}), None, "SELECT 2", None, None, False)
+
+        self.assertIn("2 statements executed, but only 1 are allowed", str(context.exception))
+        self.assertIn("SELECT 2", str(context.exception))
+        self.assertEqual([], monitor.budgets)
+
+    async def test__query_budget__exception(self):
+        monitor = query_stats.QueryMonitor(MagicMock(return_value=None))
+
+        with self.assertRaises(KeyError):
+            with query_stats.QueryBudget(monitor, 0):
+                monitor._before_cursor_execute(MagicMock(info={}), None, "SELECT 1", None, None, False)
+                raise KeyError
+
+        self.assertEqual([], monitor.budgets)
+
+    async def test__query_monitor__constructor(self):
+        get_stats = MagicMock()
+
+        result = query_stats.QueryMonitor(get_stats, 5, True)
+
+        self.assertEqual(get_stats, result._get_stats)
+        self.assertEqual(5, result.repeat_threshold)
+        self.assertTrue(result.strict)
+        self.assertEqual([], result.budgets)
+        self.assertEqual(0, result.sessions.count)
+        self.assertEqual(0, result.duration.count)
+        self.assertEqual(0, result.rows)
+        self.assertEqual(0, result.repeated)
+
+    @patch("daemon.database.query_stats.event.listen")
+    async def test__attach(self, listen_patch: MagicMock):
+        monitor = query_stats.QueryMonitor(MagicMock())
+        engine = MagicMock()
+
+        monitor.attach(engine)
+
+        listen_patch.assert_has_calls(
+            [
+                call(engine, "before_cursor_execute", monitor._before_cursor_execute),
+                call(engine, "after_cursor_execute", monitor._after_cursor_execute),
+            ]
+        )
+
+    @patch("daemon.database.query_stats.perf_counter")
+    async def test__cursor_execute(self, perf_counter_patch: MagicMock):
+        stats = query_stats.QueryStats()
+        monitor = query_stats.QueryMonitor(MagicMock(return_value=stats))
+        conn, context = MagicMock(info={}), MagicMock()
+
+        perf_counter_patch.return_value = 1
+        monitor._before_cursor_execute(conn, None, "SELECT 1", None, context, False)
+        perf_counter_patch.return_value = 1.5
+        monitor._after_cursor_execute(conn, None, "SELECT 1", None, context, False)
+
+        self.assertEqual(1, stats.statements)
+        self.assertEqual({"SELECT 1": 1}, stats.shapes)
+        self.assertEqual(0.5, stats.duration)
+        self.assertEqual(1, context.query_start)
+        self.assertEqual({}, conn.info)
+
+    async def test__cursor_execute__no_context(self):
+        stats = query_stats.QueryStats()
+        monitor = query_stats.QueryMonitor(MagicMock(return_value=stats))
+
+        monitor._before_cursor_execute(MagicMock(info={}), None, "SELECT 1", None, None, False)
+        monitor._after_cursor_execute(MagicMock(info={}), None, "SELECT 1", None, None, False)
+
+        self.assertEqual(1, stats.statements)
+        self.assertEqual(0, stats.duration)
+
+    @patch("daemon.database.query_stats.perf_counter")
+    async def test__cursor_execute__error(self, perf_counter_patch: MagicMock):
+        stats = query_stats.QueryStats()
+        monitor = query_stats.QueryMonitor(MagicMock(return_value=stats))
+        engine = create_engine("sqlite://")
+        monitor.attach(engine)
+
+        with engine.connect() as conn:
+            perf_counter_patch.return_value = 1
+            with self.assertRaises(OperationalError):
+                conn.exec_driver_sql("SELECT * FROM missing")
+
+            perf_counter_patch.side_effect = [5, 5.5]
+            conn.exec_driver_sql("SELECT 1")
+
+            self.assertEqual({}, conn.info)
+        self.assertEqual(2, stats.statements)
+        self.assertEqual(0.5, stats.duration)
+
+    async def test__cursor_execute__no_session(self):
+        monitor = query_stats.QueryMonitor(MagicMock(return_value=None), 1, True)
+        conn = MagicMock(info={})
+
+        for _ in range(3):
+            monitor._before_cursor_execute(conn, None, "SELECT 1", None, None, False)
+            monitor._after_cursor_execute(conn, None, "SELECT 1", None, None, False)
+
+        self.assertEqual(0, monitor.repeated)
+
+    @patch("daemon.database.query_stats.logger.warning")
+    async def test__cursor_execute__repeated(self, warning_patch: MagicMock):
+        stats = query_stats.QueryStats()
+        monitor = query_stats.QueryMonitor(MagicMock(return_value=stats), 2)
+
+        for _ in range(4):
+            monitor._before_cursor_execute(MagicMock(info={}), None, "SELECT 1", None, None, False)
+        monitor._before_cursor_execute(MagicMock(info={}), None, "SELECT 2", None, None, False)
+
+        warning_patch.assert_called_once_with("statement executed 3 times in one session: SELECT 1")
+        self.assertEqual(1, monitor.repeated)
+        self.assertEqual(5, stats.statements)
+
+    async def test__cursor_execute__repeated_strict(self):
+        stats = query_stats.QueryStats()
+        monitor = query_stats.QueryMonitor(MagicMock(return_value=stats), 2, True)
+        conn = MagicMock(info={})
+
+        for _ in range(2):
+            monitor._before_cursor_execute(conn, None, "SELECT 1", None, None, False)
+            monitor._after_cursor_execute(conn, None, "SELECT 1", None, None, False)
+
+        with self.assertRaises(query_stats.RepeatedStatementError):
+            monitor._before_cursor_execute(conn, None, "SELECT 1", None, None, False)
+
+        self.assertEqual({}, conn.info)
+
+    @patch("daemon.database.query_stats.logger.warning")
+    async def test__cursor_execute__threshold_disabled(self, warning_patch: MagicMock):
+        monitor = query_stats.QueryMonitor(MagicMock(return_value=query_stats.QueryStats()), 0, True)
+
+        for _ in range(100):
+            monitor._before_cursor_execute(MagicMock(info={}), None, "SELECT 1", None, None, False)
+
+        warning_patch.assert_not_called()
+
+    @patch("daemon.database.query_stats.logger.debug")
+    async def test__finish(self, debug_patch: MagicMock):
+        monitor = query_stats.QueryMonitor(MagicMock())
+        stats = query_stats.QueryStats()
+        stats.statements, stats.rows, stats.duration = 3, 7, 0.0125
+
+        monitor.finish(stats)
+
+        self.assertEqual(1, monitor.sessions.count)
+        self.assertEqual(3, monitor.sessions.sum)
+        self.assertEqual(0.0125, monitor.duration.sum)
+        self.assertEqual(7, monitor.rows)
+        debug_patch.assert_called_once_with(
+            "session executed 3 statements, fetched 7 rows and spent 12.50 ms in the database"
+        )
+
+    @patch("daemon.database.query_stats.logger.debug")
+    async def test__finish__no_statements(self, debug_patch: MagicMock):
+        monitor = query_stats.QueryMonitor(MagicMock())
+
+        monitor.finish(query_stats.QueryStats())
+
+        self.assertEqual(1, monitor.sessions.count)
+        debug_patch.assert_not_called()
+
+    async def test__render(self):
+        monitor = query_stats.QueryMonitor(MagicMock())
+        monitor.rows, monitor.repeated = 12, 2
+        monitor.sessions.observe(3)
+
+        result = monitor.render()
+
+        self.assertIn("# TYPE daemon_db_session_statements histogram", result)
+        self.assertIn('daemon_db_session_statements_bucket{le="5"} 1', result)
+        self.assertIn('daemon_db_session_statements_bucket{le="2"} 0', result)
+        self.assertIn("daemon_db_session_duration_seconds_count 0", result)
+        self.assertIn("daemon_db_rows_fetched_total 12", result)
+        self.assertIn("daemon_db_repeated_statements_total 2", result)
@@ -0,0 +1,91 @@
+import json
+import sys
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from starlette.responses import JSONResponse
+
+from daemon import responses
+from tests._utils import import_module
+
+CONTENT = [
+    {"user_id": "b2b5c5a3-5d3e-4a4e-8c39-0d8f0c1b1f8a", "value": 42},
+    [{"id": 'ünïcödé   "quoted" \\ \n', "disabled": False, "value": None}],
+    {"error": "422 Unprocessable Entity", "detail": [{"loc": ["body", 0], "msg": "x", "ctx": {"limit_value": 1.5}}]},
+    {1: "non string key", None: {}},
+    [],
+    "",
+    -(2**63),
+    0.1,
+]
+
+
+class TestResponses(TestCase):
+    def test__dumps_stdlib(self):
+        for content in CONTENT:
+            with self.subTest(content=content):
+                self.assertEqual(JSONResponse(content).body, responses.dumps_stdlib(content))
+
+    def test__dumps_orjson(self):
+        for content in CONTENT + [2**64, {"value": [2**100]}]:
+            with self.subTest(content=content):
+                self.assertEqual(JSONResponse(content).body, responses.dumps_orjson(content))
+
+    def test__dumps_orjson__float_format(self):
+        for content in [1e16, 1e-7, [1.5e300]]:
+            with self.subTest(content=content):
+                result = responses.dumps_orjson(content)
+
+                self.assertEqual(content, json.loads(result))
+                self.assertEqual(json.loads(JSONResponse(content).body), json.loads(result))
+
+    def test__dumps_orjson__non_finite(self):
+        for content in [float("nan"), float("inf"), {"value": [None, -float("inf")]}]:
+            with self.subTest(content=content):
+                with self.assertRaises(ValueError):
+                    JSONResponse(content)
+                with self.assertRaises(ValueError):
+                    responses.dumps_orjson(content)
+
+    def test__has_non_finite_float(self):
+        for content, expected in [
+            (None, False),
+            ("nan", False),
+            (1.5, False),
+            (float("nan"), True),
+            ([1, (2, float("-inf"))], True),
+            ({"a": {"b": [0.0, None]}}, False),
+            ({"a": {"b": [float("inf")]}}, True),
+        ]:
+            with self.subTest(content=content):
+                self.assertEqual(expected, responses.has_non_finite_float(content))
+
+    def test__dumps(self):
+        self.assertEqual(responses.dumps_orjson, responses.dumps)
+
+    def test__dumps__no_orjson(self):
+        try:
+            with patch.dict(sys.modules, {"orjson": None}):
+                module = import_module("daemon.responses")
+
+            self.assertIsNone(module.orjson)
+            self.assertEqual(module.dumps_stdlib, module.dumps)
+        finally:
+            import_module("daemon.responses")
+
+    def test__fast_json_response(self):
+        response = responses.FastJSONResponse({"value": 42}, status_code=201)
+
+        self.assertEqual(b'{"value":42}', response.body)
+        self.assertEqual(201, response.status_code)
+        self.assertEqual("application/json", response.media_type)
+
+    @patch("daemon.responses.FastJSONResponse.serializer")
+    def test__fast_json_response__serializer(self, serializer_patch: MagicMock):
+        serializer_patch.return_value = b"[]"
+        content = MagicMock()
+
+        result = responses.FastJSONResponse.render(MagicMock(serializer=serializer_patch), content)
+
+        serializer_patch.assert_called_once_with(content)
+        self.assertEqual(b"[]", result)
@@ -0,0 +1,172 @@
+from asyncio import Event, create_task, sleep, CancelledError
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+from sqlalchemy import bindparam
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.sql.functions import count
+
+from daemon.database import single_flight
+from daemon.database.database import prepared_filter_by
+from daemon.models.counter import Counter
+
+
+class TestSingleFlight(IsolatedAsyncioTestCase):
+    async def test__get_key(self):
+        statement, params = prepared_filter_by(Counter, user_id="foo")
+
+        result = single_flight.get_key(statement, (params,), {})
+
+        self.assertEqual(result, single_flight.get_key(statement, ({"user_id": "foo"},), {}))
+        self.assertNotEqual(result, single_flight.get_key(statement, ({"user_id": "bar"},), {}))
+        other, other_params = prepared_filter_by(Counter, value="foo")
+        self.assertNotEqual(result, single_flight.get_key(other, (other_params,), {}))
+        hash(result)
+
+    async def test__get_key__literal_values(self):
+        result = single_flight.get_key(select(Counter).filter_by(user_id="foo"), (), {})
+
+        self.assertEqual(result, single_flight.get_key(select(Counter).filter_by(user_id="foo"), (), {}))
+        self.assertNotEqual(result, single_flight.get_key(select(Counter).filter_by(user_id="bar"), (), {}))
+        self.assertNotEqual(result, single_flight.get_key(select(count()).select_from(Counter), (), {}))
+
+    async def test__get_key__not_shareable(self):
+        select_by_id = select(Counter).where(Counter.user_id == bindparam("user_id"))
+
+        for statement, args, kwargs in [
+            (Counter.__table__.delete(), (), {}),
+            (MagicMock(is_select=False), (), {}),
+            (select(Counter), (), {"execution_options": {}}),
+            (select(Counter), ({}, {}), {}),
+            (select(Counter), ([{"user_id": "foo"}],), {}),
+            (select_by_id, ({"user_id": ["foo"]},), {}),
+            (select(Counter).options(selectinload("*")), (), {}),
+            (MagicMock(is_select=True, _with_options=(), _generate_cache_key=MagicMock(return_value=None)), (), {}),
+        ]:
+            with self.subTest(statement=statement, args=args, kwargs=kwargs):
+                self.assertIsNone(single_flight.get_key(statement, args, kwargs))
+
+    async def test__make_snapshot(self):
+        counter = Counter(user_id="foo", value=42)
+
+        result = single_flight.make_snapshot(counter)
+
+        self.assertEqual(single_flight.Snapshot(Counter, {"user_id": "foo", "value": 42}), result)
+
+    async def test__make_snapshot__no_orm_object(self):
+        for value in [None, 42, "foo", MagicMock()]:
+            with self.subTest(value=value):
+                self.assertIs(value, single_flight.make_snapshot(value))
+
+    async def test__constructor(self):
+        result = single_flight.SingleFlight()
+
+        self.assertEqual({}, result._calls)
+        self.assertEqual(0, result.shared)
+
+    async def test__run__shared(self):
+        flight = single_flight.SingleFlight()
+        event = Event()
+        calls = []
+
+        async def func(value):
+            calls.append(value)
+            await event.wait()
+            return value
+
+        tasks = [create_task(flight.run("key", lambda i=i: func(i))) for i in range(5)]
+        other = create_task(flight.run("other", lambda: func("other")))
+        await sleep(0)
+        event.set()
+
+        self.assertEqual([0] * 5, [await task for task in tasks])
+        self.assertEqual("other", await other)
+        self.assertEqual([0, "other"], calls)
+        self.assertEqual(4, flight.shared)
+        self.assertEqual({}, flight._calls)
+
+    async def test__run__sequential(self):
+        flight = single_flight.SingleFlight()
+
+        async def func(value):
+            return value
+
+        self.assertEqual(1, await flight.run("key", lambda: func(1)))
+        self.assertEqual(2, await flight.run("key", lambda: func(2)))
+        self.assertEqual(0, flight.shared)
+
+    async def test__run__exception(self):
+        flight = single_flight.SingleFlight()
+        event = Event()
+
+        async def func():
+            await event.wait()
+            raise ZeroDivisionError
+
+        tasks = [create_task(flight.run("key", func)) for _ in range(3)]
+        await sleep(0)
+        event.set()
+
+        for task in tasks:
+            with self.assertRaises(ZeroDivisionError):
+                await task
+        self.assertEqual({}, flight._calls)
+
+        with self.assertRaises(ZeroDivisionError):
+            await flight.run("key", func)
+
+    async def test__run__leader_cancelled(self):
+        flight = single_flight.SingleFlight()
+        event = Event()
+        calls = []
+
+        async def func(value):
+            calls.append(value)
+            await event.wait()
+            return value
+
+        leader = create_task(flight.run("key", lambda: func("leader")))
+        await sleep(0)
+        follower = create_task(flight.run("key", lambda: func("follower")))
+        await sleep(0)
+        leader.cancel()
+        await sleep(0)
+        event.set()
+
+        with self.assertRaises(CancelledError):
+            await leader
+        self.assertEqual("follower", await follower)
+        self.assertEqual(["leader", "follower"], calls)
+        self.assertEqual({}, flight._calls)
+
+    async def test__run__follower_cancelled(self):
+        flight = single_flight.SingleFlight()
+        event = Event()
+
+        async def func():
+            await event.wait()
+            return 42
+
+        leader = create_task(flight.run("key", func))
+        await sleep(0)
+        follower = create_task(flight.run("key", func))
+        await sleep(0)
+        follower.cancel()
+        await sleep(0)
+        event.set()
+
+        with self.assertRaises(CancelledError):
+            await follower
+        self.assertEqual(42, await leader)
+        self.assertEqual(0, flight.shared)
+
+    async def test__render(self):
+        flight = single_flight.SingleFlight()
+        flight.shared = 42
+        flight._calls = {"a": MagicMock(), "b": MagicMock()}
+
+        result = flight.render()
+
+        self.assertIn("daemon_db_single_flight_shared_total 42", result)
+        self.assertIn("daemon_db_single_flight_in_flight 2", result)
@@ -0,0 +1,209 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, MagicMock, call
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.future import select
+
+from daemon.database import slow_queries
+from daemon.metrics import current_endpoint
+from daemon.models.counter import Counter
+
+
+class TestSlowQueries(IsolatedAsyncioTestCase):
+    async def test__redact(self):
+        for parameters, executemany, expected in [
+            (("foo", 42), False, "(str, int)"),
+            ({"user_id": "foo", "value": None}, False, "{user_id: str, value: NoneType}"),
+            (None, False, "()"),
+            ([("foo", 1), ("bar", 2)], True, "2 parameter sets"),
+        ]:
+            with self.subTest(parameters=parameters):
+                self.assertEqual(expected, slow_queries.redact(parameters, executemany))
+
+    async def test__is_select(self):
+        for context, expected in [
+            (None, False),
+            (MagicMock(compiled=None), False),
+            (MagicMock(compiled=MagicMock(statement=select(Counter))), True),
+            (MagicMock(compiled=MagicMock(statement=Counter.__table__.delete())), False),
+        ]:
+            with self.subTest(context=context):
+                self.assertEqual(expected, slow_queries.is_select(context))
+
+    async def test__explain(self):
+        conn = MagicMock()
+        cursor = conn.connection.cursor.return_value
+        cursor.fetchall.return_value = [("Seq Scan on counter",), ("Planning Time: 0.1 ms",)]
+        parameters = MagicMock()
+
+        result = slow_queries.explain(conn, "SELECT 1", parameters)
+
+        self.assertEqual("Seq Scan on counter\nPlanning Time: 0.1 ms", result)
+        self.assertEqual(
+            [
+                call("SAVEPOINT slow_query_explain"),
+                call("EXPLAIN (ANALYZE, BUFFERS) SELECT 1", parameters),
+                call("ROLLBACK TO SAVEPOINT slow_query_explain"),
+                call("RELEASE SAVEPOINT slow_query_explain"),
+            ],
+            cursor.execute.call_args_list,
+        )
+        cursor.close.assert_called_once_with()
+
+    async def test__explain__error(self):
+        conn = MagicMock()
+        cursor = conn.connection.cursor.return_value
+        cursor.execute.side_effect = [None, ValueError, None, None]
+
+        with self.assertRaises(ValueError):
+            slow_queries.explain(conn, "SELECT 1", ())
+
+        cursor.execute.assert_any_call("ROLLBACK TO SAVEPOINT slow_query_explain")
+        cursor.close.assert_called_once_with()
+
+    async def test__constructor(self):
+        result = slow_queries.SlowQueryLog(0.5, 0.1)
+
+        self.assertEqual(0.5, result.threshold)
+        self.assertEqual(0.1, result.explain_rate)
+        self.assertEqual(0, result.slow)
+
+    @patch("daemon.database.slow_queries.event.listen")
+    async def test__attach(self, listen_patch: MagicMock):
+        log = slow_queries.SlowQueryLog(0.5)
+        engine = MagicMock()
+
+        log.attach(engine)
+
+        listen_patch.assert_has_calls(
+            [
+                call(engine, "before_cursor_execute", log._before_cursor_execute),
+                call(engine, "after_cursor_execute", log._after_cursor_execute),
+            ]
+        )
+
+    @patch("daemon.database.slow_queries.event.listen")
+    async def test__attach__disabled(self, listen_patch: MagicMock):
+        slow_queries.SlowQueryLog(0).attach(MagicMock())
+
+        listen_patch.assert_not_called()
+
+    @patch("daemon.database.slow_queries.logger.warning")
+    @patch("daemon.database.slow_queries.perf_counter")
+    async def test__cursor_execute__fast(self, perf_counter_patch: MagicMock, warning_patch: MagicMock):
+        log = slow_queries.SlowQueryLog(0.5)
+        conn, context = MagicMock(info={}), MagicMock()
+
+        perf_counter_patch.return_value = 1
+        log._before_cursor_execute(conn, None, "SELECT 1", (), context, False)
+        perf_counter_patch.return_value = 1.25
+        log._after_cursor_execute(conn, None, "SELECT 1", (), context, False)
+
+        warning_patch.assert_not_called()
+        self.assertEqual(0, log.slow)
+        self.assertEqual(1, context.slow_query_start)
+        self.assertEqual({}, conn.info)
+
+    @patch("daemon.database.slow_queries.logger.warning")
+    async def test__cursor_execute__no_context(self, warning_patch: MagicMock):
+        log = slow_queries.SlowQueryLog(0.5)
+        conn = MagicMock(info={})
+
+        log._before_cursor_execute(conn, None, "SELECT 1", (), None, False)
+        log._after_cursor_execute(conn, None, "SELECT 1", (), None, False)
+
+        warning_patch.assert_not_called()
+        self.assertEqual({}, conn.info)
+
+    @patch("daemon.database.slow_queries.logger.warning")
+    @patch("daemon.database.slow_queries.perf_counter")
+    async def test__cursor_execute__error(self, perf_counter_patch: MagicMock, warning_patch: MagicMock):
+        log = slow_queries.SlowQueryLog(0.5)
+        engine = create_engine("sqlite://")
+        log.attach(engine)
+
+        with engine.connect() as conn:
+            perf_counter_patch.return_value = 1
+            with self.assertRaises(OperationalError):
+                conn.exec_driver_sql("SELECT * FROM missing")
+
+            perf_counter_patch.side_effect = [5, 6]
+            conn.exec_driver_sql("SELECT 1")
+
+            self.assertEqual({}, conn.info)
+        warning_patch.assert_called_once_with("slow statement (1000.00 ms) in no endpoint: SELECT 1 parameters: ()")
+
+    @patch("daemon.database.slow_queries.logger.warning")
+    @patch("daemon.database.slow_queries.perf_counter")
+    async def test__cursor_execute__slow(self, perf_counter_patch: MagicMock, warning_patch: MagicMock):
+        for plan, endpoint, expected in [
+            (None, None, "slow statement (750.00 ms) in no endpoint: SELECT ? parameters: (str)"),
+            ("Seq", "/counter/get", "slow statement (750.00 ms) in /counter/get: SELECT ? parameters: (str)\nSeq"),
+        ]:
+            with self.subTest(plan=plan):
+                warning_patch.reset_mock()
+                log = slow_queries.SlowQueryLog(0.5)
+                log._explain = MagicMock(return_value=plan)
+                conn, context = MagicMock(info={}), MagicMock()
+                token = current_endpoint.set(endpoint)
+
+                perf_counter_patch.return_value = 1
+                log._before_cursor_execute(conn, None, "SELECT ?", ("secret",), context, False)
+                perf_counter_patch.return_value = 1.75
+                log._after_cursor_execute(conn, None, "SELECT ?", ("secret",), context, False)
+                current_endpoint.reset(token)
+
+                log._explain.assert_called_once_with(conn, "SELECT ?", ("secret",), context, False)
+                warning_patch.assert_called_once_with(expected)
+                self.assertEqual(1, log.slow)
+
+    @patch("daemon.database.slow_queries.explain")
+    @patch("daemon.database.slow_queries.random")
+    @patch("daemon.database.slow_queries.is_select")
+    async def test___explain(self, is_select_patch: MagicMock, random_patch: MagicMock, explain_patch: MagicMock):
+        for dialect, is_select, executemany, sample, expected in [
+            ("postgresql", True, False, 0.05, explain_patch()),
+            ("postgresql", True, False, 0.5, None),
+            ("postgresql", False, False, 0.05, None),
+            ("postgresql", True, True, 0.05, None),
+            ("sqlite", True, False, 0.05, None),
+        ]:
+            with self.subTest(dialect=dialect, is_select=is_select, executemany=executemany, sample=sample):
+                explain_patch.reset_mock()
+                is_select_patch.return_value = is_select
+                random_patch.return_value = sample
+                conn, parameters, context = MagicMock(), MagicMock(), MagicMock()
+                conn.dialect.name = dialect
+
+                log = slow_queries.SlowQueryLog(0.5, 0.1)
+
+                result = log._explain(conn, "SELECT 1", parameters, context, executemany)
+
+                self.assertEqual(expected, result)
+                if expected is not None:
+                    explain_patch.assert_called_once_with(conn, "SELECT 1", parameters)
+                else:
+                    explain_patch.assert_not_called()
+
+    @patch("daemon.database.slow_queries.logger.warning")
+    @patch("daemon.database.slow_queries.explain")
+    @patch("daemon.database.slow_queries.is_select", MagicMock(return_value=True))
+    async def test___explain__error(self, explain_patch: MagicMock, warning_patch: MagicMock):
+        explain_patch.side_effect = ValueError("syntax error")
+        conn = MagicMock()
+        conn.dialect.name = "postgresql"
+
+        result = slow_queries.SlowQueryLog(0.5, 1)._explain(conn, "SELECT 1", (), MagicMock(), False)
+
+        self.assertIsNone(result)
+        warning_patch.assert_called_once_with("could not explain slow statement: syntax error")
+
+    async def test__render(self):
+        log = slow_queries.SlowQueryLog(0.5)
+        log.slow = 3
+
+        result = log.render()
+
+        self.assertIn("# TYPE daemon_db_slow_statements_total counter", result)
+        self.assertIn("daemon_db_slow_statements_total 3", result)
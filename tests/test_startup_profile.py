@@ -0,0 +1,109 @@
+import os
+import subprocess  # noqa: S404
+import sys
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, MagicMock
+
+from daemon import startup_profile
+
+IMPORT_TIMES = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      1500 |       4000 | daemon.environment
+Traceback (most recent call last):
+import time:        30 |      25000 |     sqlalchemy
+"""
+
+
+class TestStartupProfile(IsolatedAsyncioTestCase):
+    @patch.dict(sys.modules, {"daemon.daemon": MagicMock()})
+    @patch("asyncio.run")
+    @patch("daemon.main.init_sentry")
+    @patch("daemon.startup_profile.perf_counter")
+    @patch("daemon.startup_profile.import_module")
+    async def test__measure_phases(
+        self,
+        import_module_patch: MagicMock,
+        perf_counter_patch: MagicMock,
+        init_sentry_patch: MagicMock,
+        run_patch: MagicMock,
+    ):
+        perf_counter_patch.side_effect = range(100)
+        daemon_module = sys.modules["daemon.daemon"]
+
+        result = startup_profile.measure_phases()
+
+        self.assertEqual(
+            ["environment", "logging", "database", "app", "server", "sentry", "startup", "openapi"],
+            list(result),
+        )
+        self.assertTrue(all(seconds == 1 for seconds in result.values()))
+        for name in ["daemon.environment", "daemon.logger", "daemon.database", "daemon.daemon", "daemon.main"]:
+            import_module_patch.assert_any_call(name)
+        init_sentry_patch.assert_called_once_with()
+        run_patch.assert_called_once()
+        run_patch.call_args[0][0].close()
+        daemon_module.app.openapi.assert_called_once_with()
+
+    async def test__parse_import_times(self):
+        result = startup_profile.parse_import_times(IMPORT_TIMES)
+
+        self.assertEqual(
+            [("_io", 0.00012, 0.00012), ("daemon.environment", 0.0015, 0.004), ("sqlalchemy", 0.00003, 0.025)],
+            result,
+        )
+
+    @patch("daemon.startup_profile.parse_import_times")
+    @patch("daemon.startup_profile.subprocess.run")
+    async def test__profile_startup(self, run_patch: MagicMock, parse_import_times_patch: MagicMock):
+        run_patch.return_value = MagicMock(returncode=0, stdout='log message\n{"app": 0.5}\n', stderr=IMPORT_TIMES)
+
+        result = startup_profile.profile_startup()
+
+        run_patch.assert_called_once_with(
+            [sys.executable, "-X", "importtime", "-c", startup_profile.PHASES_SCRIPT],
+            capture_output=True,
+            text=True,
+        )
+        parse_import_times_patch.assert_called_once_with(IMPORT_TIMES)
+        self.assertEqual(({"app": 0.5}, parse_import_times_patch()), result)
+
+    @patch("daemon.startup_profile.subprocess.run")
+    async def test__profile_startup__error(self, run_patch: MagicMock):
+        run_patch.return_value = MagicMock(returncode=1, stdout="", stderr=IMPORT_TIMES)
+
+        with self.assertRaises(RuntimeError) as context:
+            startup_profile.profile_startup()
+
+        self.assertEqual("startup failed:\nTraceback (most recent call last):", str(context.exception))
+
+    async def test__format_report(self):
+        phases = {"environment": 0.001, "app": 0.25}
+        imports = [("_io", 0.00012, 0.00012), ("daemon.environment", 0.0015, 0.004), ("sqlalchemy", 0.00003, 0.025)]
+
+        result = startup_profile.format_report(phases, imports, 2)
+
+        self.assertEqual(
+            [
+                "startup phase                  time [ms]",
+                "environment                          1.0",
+                "app                                250.0",
+                "total                              251.0",
+                "",
+                "self [ms]  cumulative [ms]  import",
+                "      0.0             25.0  sqlalchemy",
+                "      1.5              4.0  daemon.environment",
+            ],
+            result.splitlines(),
+        )
+
+    async def test__optional_imports(self):
+        # sentry and its integrations must only be imported if a sentry dsn is configured
+        code = "import sys, daemon.main, daemon.daemon; print(any(m.startswith('sentry_sdk') for m in sys.modules))"
+        process = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            env=os.environ | {"SENTRY_DSN": ""},
+        )
+
+        self.assertEqual("False", process.stdout.splitlines()[-1], process.stderr)
@@ -0,0 +1,112 @@
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+
+from asyncpg import Connection
+from sqlalchemy.util import LRUCache
+
+from daemon.database import statement_cache
+
+
+class TestStatementCache(TestCase):
+    def test__get_connect_args__other_driver(self):
+        for driver in ["mysql+aiomysql", "sqlite+aiosqlite", "postgresql+psycopg2"]:
+            with self.subTest(driver=driver):
+                self.assertEqual({}, statement_cache.get_connect_args(driver, 100, 300, False))
+
+    def test__get_connect_args(self):
+        result = statement_cache.get_connect_args("postgresql+asyncpg", 500, 60, False)
+
+        self.assertEqual(
+            {"prepared_statement_cache_size": 500, "statement_cache_size": 500, "max_cached_statement_lifetime": 60},
+            result,
+        )
+
+    @patch("daemon.database.statement_cache.get_pgbouncer_connection_class")
+    def test__get_connect_args__pgbouncer(self, get_pgbouncer_connection_class_patch: MagicMock):
+        result = statement_cache.get_connect_args("postgresql+asyncpg", 500, 60, True)
+
+        self.assertEqual(
+            {
+                "prepared_statement_cache_size": 0,
+                "statement_cache_size": 0,
+                "connection_class": get_pgbouncer_connection_class_patch(),
+            },
+            result,
+        )
+
+    def test__pgbouncer_connection(self):
+        cls = statement_cache.get_pgbouncer_connection_class()
+        first, second = cls._get_unique_id(MagicMock(), "stmt"), cls._get_unique_id(MagicMock(), "stmt")
+
+        self.assertTrue(issubclass(cls, Connection))
+        self.assertRegex(first, r"^__asyncpg_stmt_[0-9a-f]{32}__$")
+        self.assertNotEqual(first, second)
+
+    @patch("daemon.database.statement_cache.time")
+    def test__statement_cache(self, time_patch: MagicMock):
+        stats = statement_cache.StatementCacheStats(300)
+        cache = statement_cache.StatementCache(stats, 10)
+        time_patch.return_value = 1000
+
+        self.assertEqual(10, cache.capacity)
+        self.assertFalse("SELECT 1" in cache)
+        cache["SELECT 1"] = (stmt := MagicMock()), MagicMock(), 900
+        self.assertTrue("SELECT 1" in cache)
+        self.assertEqual(stmt, cache["SELECT 1"][0])
+        time_patch.return_value = 1201
+        self.assertFalse("SELECT 1" in cache)
+
+        self.assertEqual(1, stats.hits)
+        self.assertEqual(2, stats.misses)
+
+    @patch("daemon.database.statement_cache.time")
+    def test__statement_cache__no_lifetime(self, time_patch: MagicMock):
+        stats = statement_cache.StatementCacheStats(0)
+        cache = statement_cache.StatementCache(stats, 10)
+        cache["SELECT 1"] = MagicMock(), MagicMock(), 0
+        time_patch.return_value = 1e9
+
+        self.assertTrue("SELECT 1" in cache)
+        self.assertEqual(1, stats.hits)
+
+    def test__stats__constructor(self):
+        result = statement_cache.StatementCacheStats(300)
+
+        self.assertEqual(300, result.lifetime)
+        self.assertEqual(0, result.hits)
+        self.assertEqual(0, result.misses)
+
+    @patch("daemon.database.statement_cache.event.listen")
+    def test__stats__attach(self, listen_patch: MagicMock):
+        obj, engine = MagicMock(), MagicMock()
+
+        statement_cache.StatementCacheStats.attach(obj, engine)
+
+        listen_patch.assert_called_once_with(engine.pool, "connect", obj._on_connect)
+
+    def test__stats__on_connect(self):
+        stats = statement_cache.StatementCacheStats(300)
+        dbapi_connection = MagicMock(_prepared_statement_cache=LRUCache(42))
+
+        stats._on_connect(dbapi_connection, MagicMock())
+
+        self.assertIsInstance(dbapi_connection._prepared_statement_cache, statement_cache.StatementCache)
+        self.assertEqual(42, dbapi_connection._prepared_statement_cache.capacity)
+
+    def test__stats__on_connect__no_cache(self):
+        stats = statement_cache.StatementCacheStats(300)
+
+        for dbapi_connection in [MagicMock(_prepared_statement_cache=None), object()]:
+            with self.subTest(dbapi_connection=dbapi_connection):
+                stats._on_connect(dbapi_connection, MagicMock())
+
+                self.assertIsNone(getattr(dbapi_connection, "_prepared_statement_cache", None))
+
+    def test__stats__render(self):
+        stats = statement_cache.StatementCacheStats(300)
+        stats.hits, stats.misses = 42, 3
+
+        result = stats.render()
+
+        self.assertIn("daemon_db_statement_cache_hits_total 42", result)
+        self.assertIn("daemon_db_statement_cache_misses_total 3", result)
@@ -0,0 +1,178 @@
+import json
+from asyncio import Event
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, MagicMock
+
+from daemon import streaming
+from daemon.exceptions.api_exception import APIException
+from tests._utils import AsyncMock
+
+
+async def aiter(items):
+    for item in items:
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+class MyException(APIException):
+    status_code = 400
+    error = "my error"
+
+
+class TestStreaming(IsolatedAsyncioTestCase):
+    async def test__accepts_ndjson(self):
+        for headers, expected in [
+            ([], False),
+            ([(b"accept", b"application/json")], False),
+            ([(b"host", b"localhost"), (b"accept", b"application/x-ndjson")], True),
+            ([(b"accept", b"application/json, application/x-ndjson;q=0.9")], True),
+        ]:
+            with self.subTest(headers=headers):
+                self.assertEqual(expected, streaming.accepts_ndjson({"headers": headers}))
+
+    async def test__encode(self):
+        items = [{"a": 1}, {"b": [2, 3]}, "ü"]
+
+        for ndjson, expected in [
+            (False, b'[{"a":1},{"b":[2,3]},"\xc3\xbc"]'),
+            (True, b'{"a":1}\n{"b":[2,3]}\n"\xc3\xbc"\n'),
+        ]:
+            with self.subTest(ndjson=ndjson):
+                self.assertEqual([expected], [chunk async for chunk in streaming.encode(aiter(items), ndjson)])
+
+    async def test__encode__empty(self):
+        self.assertEqual([b"[]"], [chunk async for chunk in streaming.encode(aiter([]), False)])
+        self.assertEqual([b""], [chunk async for chunk in streaming.encode(aiter([]), True)])
+
+    @patch("daemon.streaming.CHUNK_SIZE", 10)
+    async def test__encode__chunks(self):
+        items = ["foo", "bar", "baz", "qux"]
+
+        result = [chunk async for chunk in streaming.encode(aiter(items), False)]
+
+        self.assertEqual([b'["foo","bar"', b',"baz","qux"', b"]"], result)
+        self.assertEqual(items, json.loads(b"".join(result)))
+
+    @patch("daemon.streaming.logger")
+    async def test__encode__exception(self, logger_patch: MagicMock):
+        for exception, error in [(MyException(), "my error"), (ZeroDivisionError(), "500 Internal Server Error")]:
+            with self.subTest(exception=exception):
+                logger_patch.reset_mock()
+
+                result = b"".join([chunk async for chunk in streaming.encode(aiter([1, exception]), True)])
+
+                self.assertEqual([1, {"error": error}], [json.loads(line) for line in result.splitlines()])
+                logger_patch.exception.assert_called_once_with("exception in streaming response", exc_info=exception)
+
+    async def test__response__constructor(self):
+        items, on_close = aiter([]), MagicMock()
+
+        response = streaming.StreamingJSONResponse(items, on_close)
+
+        self.assertIs(items, response.items)
+        self.assertIs(on_close, response._on_close)
+        self.assertEqual("application/json", response.headers["content-type"])
+
+    async def test__response__call(self):
+        for accept, media_type, body in [
+            (b"application/json", "application/json", b"[1,2]"),
+            (b"application/x-ndjson", "application/x-ndjson", b"1\n2\n"),
+        ]:
+            with self.subTest(accept=accept):
+                on_close = AsyncMock()
+                response = streaming.StreamingJSONResponse(aiter([1, 2]), on_close)
+                messages = []
+
+                async def send(message):
+                    messages.append(message)
+
+                async def receive():
+                    # the client does not disconnect before the response has been sent
+                    await Event().wait()
+
+                scope = {"type": "http", "headers": [(b"accept", accept)]}
+
+                await response(scope, receive, send)
+
+                self.assertEqual(200, messages[0]["status"])
+                self.assertIn((b"content-type", media_type.encode()), messages[0]["headers"])
+                self.assertEqual(body, b"".join(message.get("body", b"") for message in messages[1:]))
+                on_close.assert_called_once_with()
+
+    async def test__response__call__exception(self):
+        on_close = AsyncMock()
+        response = streaming.StreamingJSONResponse(aiter([]), on_close)
+
+        with patch("daemon.streaming.StreamingResponse.__call__", AsyncMock(side_effect=OSError)):
+            with self.assertRaises(OSError):
+                await response({"type": "http", "headers": []}, MagicMock(), MagicMock())
+
+        on_close.assert_called_once_with()
+
+    async def test__prefetch(self):
+        for items in [[], [1], [1, 2, 3]]:
+            with self.subTest(items=items):
+                fetched = []
+
+                async def gen():
+                    for item in items:
+                        fetched.append(item)
+                        yield item
+
+                result = await streaming.prefetch(gen())
+
+                self.assertEqual(items[:1], fetched)
+                self.assertEqual(items, [item async for item in result])
+
+    async def test__prefetch__exception(self):
+        with self.assertRaises(MyException):
+            await streaming.prefetch(aiter([MyException()]))
+
+    @patch("daemon.streaming.db")
+    async def test__close_session(self, db_patch: MagicMock):
+        events = []
+        db_patch.commit = AsyncMock(side_effect=lambda: events.append("commit"))
+        db_patch.close = AsyncMock(side_effect=lambda: events.append("close"))
+
+        await streaming.close_session()
+
+        self.assertEqual(["commit", "close"], events)
+
+    @patch("daemon.streaming.StreamingJSONResponse")
+    @patch("daemon.streaming.prefetch", new_callable=AsyncMock)
+    @patch("daemon.streaming.db")
+    async def test__stream_endpoint(self, db_patch: MagicMock, prefetch_patch: MagicMock, response_patch: MagicMock):
+        async def generator(foo, bar):
+            yield foo, bar
+
+        async def coroutine(foo, bar):
+            return aiter([(foo, bar)])
+
+        for func in [generator, coroutine]:
+            with self.subTest(func=func):
+                prefetch_patch.reset_mock()
+                db_patch.streaming = False
+
+                endpoint = streaming.stream_endpoint(func)
+                result = await endpoint(1, bar=2)
+
+                self.assertIs(func, endpoint.__wrapped__)
+                self.assertEqual(func.__name__, endpoint.__name__)
+                self.assertEqual([(1, 2)], [item async for item in prefetch_patch.call_args.args[0]])
+                self.assertTrue(db_patch.streaming)
+                response_patch.assert_called_with(prefetch_patch(), on_close=streaming.close_session)
+                self.assertEqual(response_patch(), result)
+
+    @patch("daemon.streaming.db")
+    async def test__stream_endpoint__early_exception(self, db_patch: MagicMock):
+        db_patch.streaming = False
+
+        async def func():
+            raise MyException
+            yield  # noqa
+
+        with self.assertRaises(MyException):
+            await streaming.stream_endpoint(func)()
+
+        self.assertFalse(db_patch.streaming)
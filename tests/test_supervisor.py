@@ -0,0 +1,137 @@
+import signal
+import socket
+from asyncio import start_server, open_connection
+from time import perf_counter
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, MagicMock
+
+from daemon import supervisor
+from tests._utils import mock_list
+
+
+class TestSupervisor(IsolatedAsyncioTestCase):
+    @patch("daemon.supervisor.logger.info")
+    async def test__bind_socket(self, _):
+        sock = supervisor.bind_socket("127.0.0.1", 0)
+
+        self.assertEqual(socket.IPPROTO_TCP, sock.proto)
+        self.assertEqual(1, sock.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR))
+        self.assertTrue(sock.get_inheritable())
+        self.assertEqual("127.0.0.1", sock.getsockname()[0])
+        sock.close()
+
+    @patch("daemon.supervisor.logger.info")
+    async def test__bind_socket__latency(self, _):
+        # responses written in multiple chunks (like uvicorn's headers and body) must not wait for delayed acks
+        async def handle(reader, writer):
+            while await reader.read(100):
+                for chunk in [b"head", b"body"]:
+                    writer.write(chunk)
+                    await writer.drain()
+            writer.close()
+
+        sock = supervisor.bind_socket("127.0.0.1", 0)
+        server = await start_server(handle, sock=sock)
+        reader, writer = await open_connection(*sock.getsockname())
+
+        durations = []
+        for _ in range(10):
+            start = perf_counter()
+            writer.write(b"request")
+            await writer.drain()
+            await reader.readexactly(8)
+            durations.append(perf_counter() - start)
+
+        writer.close()
+        await writer.wait_closed()
+        server.close()
+        await server.wait_closed()
+
+        self.assertLess(sorted(durations)[len(durations) // 2], 0.04)
+
+    async def test__constructor(self):
+        config, target, workers = mock_list(3)
+
+        result = supervisor.Supervisor(config, target, workers)
+
+        self.assertEqual(config, result._config)
+        self.assertEqual(target, result._target)
+        self.assertEqual(workers, result._workers)
+        self.assertEqual([], result._processes)
+        self.assertFalse(result._should_exit.is_set())
+        self.assertFalse(result._should_restart.is_set())
+
+    @patch("daemon.supervisor.multiprocessing.get_context")
+    async def test__start_worker(self, get_context_patch: MagicMock):
+        obj, sock = MagicMock(), MagicMock()
+
+        result = supervisor.Supervisor._start_worker(obj, sock)
+
+        get_context_patch.assert_called_once_with("spawn")
+        get_context_patch().Process.assert_called_once_with(target=obj._target, args=(obj._config, sock))
+        get_context_patch().Process().start.assert_called_once_with()
+        self.assertEqual(get_context_patch().Process(), result)
+
+    async def test__stop_worker(self):
+        process = MagicMock()
+        process.join.side_effect = lambda: process.terminate.assert_called_once_with()
+
+        supervisor.Supervisor._stop_worker(MagicMock(), process)
+
+        process.join.assert_called_once_with()
+
+    async def test__restart_workers(self):
+        old, new = mock_list(3), mock_list(3)
+        obj = MagicMock(_processes=list(old))
+        sock = MagicMock()
+        events = []
+        obj._start_worker.side_effect = lambda _: events.append("start") or new[events.count("start") - 1]
+        obj._stop_worker.side_effect = lambda p: events.append(old.index(p))
+
+        supervisor.Supervisor._restart_workers(obj, sock)
+
+        self.assertEqual(["start", 0, "start", 1, "start", 2], events)
+        obj._start_worker.assert_called_with(sock)
+        self.assertEqual(new, obj._processes)
+
+    async def test__handle_exit(self):
+        obj = MagicMock()
+
+        supervisor.Supervisor.handle_exit(obj, signal.SIGTERM, None)
+
+        obj._should_exit.set.assert_called_once_with()
+
+    async def test__handle_restart(self):
+        obj = MagicMock()
+
+        supervisor.Supervisor.handle_restart(obj, signal.SIGHUP, None)
+
+        obj._should_restart.set.assert_called_once_with()
+
+    @patch("daemon.supervisor.bind_socket")
+    @patch("daemon.supervisor.signal.signal")
+    async def test__run(self, signal_patch: MagicMock, bind_socket_patch: MagicMock):
+        obj = MagicMock(_workers=2)
+        sock = bind_socket_patch.return_value
+        dead, alive, replacement, restarted = mock_list(4)
+        dead.is_alive.return_value = False
+        alive.is_alive.return_value = True
+        obj._start_worker.side_effect = [dead, alive, replacement]
+        obj._should_exit.wait.side_effect = [False, False, True]
+        obj._should_restart.is_set.side_effect = [False, True]
+        obj._restart_workers.side_effect = lambda _: obj._processes.__setitem__(0, restarted)
+
+        supervisor.Supervisor.run(obj)
+
+        signal_patch.assert_any_call(signal.SIGINT, obj.handle_exit)
+        signal_patch.assert_any_call(signal.SIGTERM, obj.handle_exit)
+        signal_patch.assert_any_call(signal.SIGHUP, obj.handle_restart)
+        bind_socket_patch.assert_called_once_with(obj._config.host, obj._config.port)
+        self.assertEqual(3, obj._start_worker.call_count)
+        obj._should_restart.clear.assert_called_once_with()
+        obj._restart_workers.assert_called_once_with(sock)
+        self.assertEqual([restarted, alive], obj._processes)
+        for process in [restarted, alive]:
+            process.terminate.assert_called_once_with()
+            process.join.assert_called_once_with()
+        sock.close.assert_called_once_with()
@@ -13,6 +13,7 @@ class TestUtils(IsolatedAsyncioTestCase):
             out = MagicMock()
             out.__name__ = MagicMock()
             out.status_code = status_code
+            out.body = f'{{"error":{status_code}}}'
             return out
 
         args = [a := make_exception(401), b := make_exception(403), c := make_exception(403), d := make_exception(404)]
@@ -20,41 +21,41 @@ class TestUtils(IsolatedAsyncioTestCase):
         # noinspection PyTypeChecker
         result = utils.responses(default, *args)
 
-        a.assert_called_once_with()
-        a().make_dict.assert_called_once_with()
-        b.assert_called_once_with()
-        b().make_dict.assert_called_once_with()
-        c.assert_called_once_with()
-        c().make_dict.assert_called_once_with()
-        d.assert_called_once_with()
-        d().make_dict.assert_called_once_with()
+        for exception in args:
+            exception.assert_not_called()
         self.assertEqual(
             {
                 200: {"model": default},
                 401: {
-                    "description": b"Unauthorized",
+                    "description": "Unauthorized",
                     "content": {
                         "application/json": {
-                            "examples": {a.__name__: {"description": a.description, "value": a().make_dict()}},
+                            "examples": {a.__name__: {"description": a.description, "value": {"error": a.status_code}}},
                         },
                     },
                 },
                 403: {
-                    "description": b"Forbidden",
+                    "description": "Forbidden",
                     "content": {
                         "application/json": {
                             "examples": {
-                                f"{b.__name__} (1/2)": {"description": b.description, "value": b().make_dict()},
-                                f"{c.__name__} (2/2)": {"description": c.description, "value": c().make_dict()},
+                                f"{b.__name__} (1/2)": {
+                                    "description": b.description,
+                                    "value": {"error": b.status_code},
+                                },
+                                f"{c.__name__} (2/2)": {
+                                    "description": c.description,
+                                    "value": {"error": c.status_code},
+                                },
                             },
                         },
                     },
                 },
                 404: {
-                    "description": b"Not Found",
+                    "description": "Not Found",
                     "content": {
                         "application/json": {
-                            "examples": {d.__name__: {"description": d.description, "value": d().make_dict()}},
+                            "examples": {d.__name__: {"description": d.description, "value": {"error": d.status_code}}},
                         },
                     },
                 },
@@ -62,6 +63,31 @@ class TestUtils(IsolatedAsyncioTestCase):
             result,
         )
 
+    async def test__responses__memoized(self):
+        exception = MagicMock(status_code=404, body='{"error":404}')
+        exception.__name__ = "NotFoundException"
+        first, second = MagicMock(), MagicMock()
+
+        result = utils.responses(first, exception)
+        exception.body = '{"error":"changed"}'
+        second_result = utils.responses(second, exception)
+
+        self.assertEqual({"model": first}, result[200])
+        self.assertEqual({"model": second}, second_result[200])
+        self.assertIs(result[404], second_result[404])
+        examples = second_result[404]["content"]["application/json"]["examples"]
+        self.assertEqual({"error": 404}, examples["NotFoundException"]["value"])
+
+    @patch("daemon.utils.HTTPException")
+    async def test__make_error(self, httpexception_patch: MagicMock):
+        status_code = MagicMock()
+        kwargs = mock_dict(5, True)
+
+        result = utils.make_error(status_code, **kwargs)
+
+        httpexception_patch.assert_called_once_with(status_code)
+        self.assertEqual({**kwargs, "error": f"{status_code} {httpexception_patch().detail}"}, result)
+
     async def test__get_example(self):
         arg = MagicMock()
         arg.Config.schema_extra = {"example": (expected := MagicMock())}
@@ -0,0 +1,58 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch, MagicMock, call
+
+from daemon.database import warmup
+from tests._utils import AsyncMock
+
+
+class TestWarmUp(IsolatedAsyncioTestCase):
+    async def test__connect(self):
+        engine = MagicMock()
+        conn = engine.connect.return_value = AsyncMock()
+        statements = [(first := MagicMock(), {"id": None}), (second := MagicMock(), {"uuid": None})]
+
+        result = await warmup._connect(engine, statements)
+
+        conn.start.assert_called_once_with()
+        self.assertEqual(
+            [call(warmup.PING), call(first, {"id": None}), call(second, {"uuid": None})],
+            conn.execute.call_args_list,
+        )
+        conn.close.assert_not_called()
+        self.assertEqual(conn, result)
+
+    async def test__connect__error(self):
+        engine = MagicMock()
+        conn = engine.connect.return_value = AsyncMock()
+        conn.execute.side_effect = ValueError
+
+        with self.assertRaises(ValueError):
+            await warmup._connect(engine, [])
+
+        conn.close.assert_called_once_with()
+
+    @patch("daemon.database.warmup.logger.warning")
+    @patch("daemon.database.warmup._connect", new_callable=AsyncMock)
+    async def test__warm_up(self, connect_patch: AsyncMock, warning_patch: MagicMock):
+        connect_patch.side_effect = conns = [AsyncMock(), AsyncMock()]
+        engine, statements = MagicMock(), MagicMock()
+
+        result = await warmup.warm_up(engine, 2, statements)
+
+        self.assertEqual([call(engine, statements), call(engine, statements)], connect_patch.call_args_list)
+        for conn in conns:
+            conn.close.assert_called_once_with()
+        warning_patch.assert_not_called()
+        self.assertEqual(2, result)
+
+    @patch("daemon.database.warmup.logger.warning")
+    @patch("daemon.database.warmup._connect", new_callable=AsyncMock)
+    async def test__warm_up__error(self, connect_patch: AsyncMock, warning_patch: MagicMock):
+        conn = AsyncMock()
+        connect_patch.side_effect = [conn, OSError("connection refused"), OSError("timeout")]
+
+        result = await warmup.warm_up(MagicMock(), 3)
+
+        conn.close.assert_called_once_with()
+        warning_patch.assert_called_once_with("could not warm up 2 of 3 connections: connection refused")
+        self.assertEqual(1, result)